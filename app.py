@@ -5,9 +5,13 @@ Portfolio Project | Built with Groq + Tavily
 
 import streamlit as st
 import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from tavily import TavilyClient
-from groq import Groq
+from src.cache.llm_cache import get_llm_cache
+from src.cache.search_cache import get_search_cache
+from src.observability.metrics import estimate_tokens
+from src.providers.rate_limit import completion_usage, get_rate_limiter
+from src.providers.registry import get_provider_registry
 
 st.set_page_config(page_title="Multi-Agent Research Assistant", page_icon="🔬", layout="wide")
 
@@ -202,24 +206,75 @@ def get_api_keys():
     return keys
 
 
-def search_web(query, tavily_key, max_results=5):
-    client = TavilyClient(api_key=tavily_key)
-    return client.search(query, max_results=max_results).get("results", [])
+SEARCH_TIMEOUT_SECONDS = 15
 
 
-def call_llm(prompt, groq_key, system_prompt=None, max_tokens=4096):
-    client = Groq(api_key=groq_key)
+def get_search_client(tavily_key):
+    """Shared Tavily client whose HTTP session stays warm across reruns."""
+    return get_provider_registry().tavily(tavily_key)
+
+
+@st.cache_resource
+def get_search_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+
+
+def search_web(query, tavily_key, max_results=5, client=None, timeout=SEARCH_TIMEOUT_SECONDS, bypass_cache=False):
+    client = client or get_search_client(tavily_key)
+    return get_search_cache().search(
+        query,
+        max_results,
+        lambda: get_rate_limiter("tavily").call_sync(
+            lambda: client.search(query, max_results=max_results, timeout=timeout)
+        ).get("results", []),
+        executor=get_search_pool(),
+        bypass=bypass_cache,
+    )
+
+
+def search_many(queries, tavily_key, max_results=3, timeout=SEARCH_TIMEOUT_SECONDS):
+    """Run searches concurrently and keep whatever finishes within the timeout.
+
+    Failed or slow queries are dropped; results keep the order of ``queries``.
+    """
+    client = get_search_client(tavily_key)
+    bypass_cache = st.session_state.get("bypass_cache", False)
+    futures = [
+        get_search_pool().submit(search_web, q, tavily_key, max_results, client, timeout, bypass_cache)
+        for q in queries
+    ]
+    done, _ = wait(futures, timeout=timeout)
+    results = []
+    for future in futures:
+        if future in done and future.exception() is None:
+            results.extend(future.result())
+    return results
+
+
+def call_llm(prompt, groq_key, system_prompt=None, max_tokens=4096, use_cache=None):
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=messages,
-        temperature=0.7,
-        max_tokens=max_tokens
+    request = {"model": "llama-3.3-70b-versatile", "messages": messages, "temperature": 0.7, "max_tokens": max_tokens}
+
+    if use_cache is None:
+        use_cache = not st.session_state.get("bypass_cache", False)
+    llm_cache = get_llm_cache()
+    if use_cache:
+        cached = llm_cache.get(**request)
+        if cached is not None:
+            return cached
+
+    client = get_provider_registry().groq(groq_key)
+    response = get_rate_limiter("groq").call_sync(
+        lambda: client.chat.completions.create(**request),
+        tokens=estimate_tokens(messages) + max_tokens,
+        usage=completion_usage,
     )
-    return response.choices[0].message.content
+    content = response.choices[0].message.content
+    llm_cache.set(content, **request)
+    return content
 
 
 def parse_json_safely(text, default=None):
@@ -253,12 +308,7 @@ def run_researcher(query, keys, status_col):
     queries_raw = call_llm(search_prompt, keys["groq"], max_tokens=200)
     queries = [q.strip().strip('"\'-.0123456789') for q in queries_raw.strip().split("\n") if q.strip()][:3] or [query]
     
-    all_results = []
-    for q in queries:
-        try:
-            all_results.extend(search_web(q, keys["tavily"], 3))
-        except:
-            pass
+    all_results = search_many(queries, keys["tavily"], 3)
     
     unique = []
     seen = set()
@@ -382,6 +432,7 @@ def render_sidebar():
         c1, c2 = st.columns(2)
         c1.markdown(f"**Groq** {'✅' if keys['groq'] else '❌'}")
         c2.markdown(f"**Tavily** {'✅' if keys['tavily'] else '❌'}")
+        st.checkbox("Bypass response cache", key="bypass_cache", help="Always call the LLM, even for prompts answered before")
         
         st.divider()
         
@@ -0,0 +1,111 @@
+"""Recall@k and latency of the IVF index against exact search.
+
+Builds a NumPy vector store in a temporary directory from synthetic
+clustered unit vectors (embedding-like: many tight topics plus noise),
+then for each IVF configuration (``n_lists``, PQ on/off) and ``nprobe``
+reports:
+
+- recall@k: share of the exact top k found by the approximate search
+- p50 / p95 query latency in milliseconds, next to the exact scan's
+
+Pick the smallest ``nprobe`` whose recall is acceptable (0.95 is a common
+target) and set it with ``VECTOR_ANN_NPROBE``. Synthetic data is easier
+than real embeddings; confirm on a copy of a real store with ``--store``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.vectordb.ivf import default_n_lists
+from src.vectordb.numpy_store import NumpyVectorStore, normalize
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / "results"
+
+
+def synthetic_vectors(n: int, dims: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims)).astype(np.float32)
+    vectors = np.empty((n, dims), dtype=np.float32)
+    for start in range(0, n, 65536):
+        size = min(65536, n - start)
+        vectors[start:start + size] = centers[rng.integers(clusters, size=size)] + rng.normal(size=(size, dims))
+    return normalize(vectors)
+
+
+def time_queries(store: NumpyVectorStore, queries: np.ndarray, k: int, **kwargs: Any):
+    rows, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found, _ = store.nearest_rows(query, k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows.append(set(found.tolist()))
+    return rows, {"p50_ms": round(float(np.percentile(latencies, 50)), 3), "p95_ms": round(float(np.percentile(latencies, 95)), 3)}
+
+
+def run(args: argparse.Namespace) -> None:
+    tmp = None
+    if args.store:
+        store = NumpyVectorStore(path=args.store, ann_min_rows=0)
+        sample = np.sort(np.random.default_rng(args.seed).choice(store.count(), size=args.queries, replace=False))
+        queries = store._gather(sample)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        store = NumpyVectorStore(path=tmp.name, ann_min_rows=0)
+        vectors = synthetic_vectors(args.n + args.queries, args.dims, args.clusters, args.seed)
+        ids = [str(i) for i in range(args.n)]
+        for start in range(0, args.n, 65536):
+            chunk = slice(start, start + 65536)
+            store.add_embeddings(ids[chunk], vectors[chunk], ids[chunk])
+        queries = vectors[args.n:]
+    print(f"{store.count()} vectors, {len(queries)} queries, k={args.k}")
+
+    truth, exact_latency = time_queries(store, queries, args.k, exact=True)
+    print(json.dumps({"exact": exact_latency}))
+
+    n_lists = args.n_lists or default_n_lists(store.count())
+    results: List[Dict[str, Any]] = []
+    for pq in args.pq:
+        start = time.perf_counter()
+        store.build_index(n_lists=n_lists, pq_subvectors=pq, seed=args.seed)
+        build_seconds = round(time.perf_counter() - start, 2)
+        for nprobe in args.nprobe:
+            if nprobe > n_lists:
+                continue
+            found, latency = time_queries(store, queries, args.k, nprobe=nprobe)
+            recall = np.mean([len(a & b) / args.k for a, b in zip(found, truth)])
+            result = {"n_lists": n_lists, "pq_subvectors": pq, "nprobe": nprobe, "build_seconds": build_seconds,
+                      f"recall@{args.k}": round(float(recall), 4), **latency}
+            results.append(result)
+            print(json.dumps(result))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / "ann_recall.json"
+    report = {"vectors": store.count(), "queries": len(queries), "k": args.k, "exact": exact_latency, "results": results}
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {output}")
+    store.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", help="Benchmark an existing NumPy vector store (use a copy) instead of synthetic data")
+    parser.add_argument("--n", type=int, default=200_000, help="Synthetic vectors")
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=0, help="IVF cells (default about 4 * sqrt(N))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--pq", type=int, nargs="+", default=[0, 48], help="PQ subvectors per configuration (0 = no PQ)")
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,117 @@
+"""Compare embedding backends on throughput and retrieval quality.
+
+Each backend (torch fp32, ONNX fp32, ONNX int8) embeds the benchmark
+reference answers as a corpus and the benchmark queries as questions.
+Reported per backend:
+
+- load time and corpus throughput (docs/sec)
+- recall@k: share of queries whose own reference answer ranks in the top k
+- agreement@k: overlap of each query's top k with the fp32 torch top k
+
+Quantization is only worth switching to if recall stays within a point or
+two of fp32 while throughput improves. Requires the model to be downloadable
+(or already in the Hugging Face cache); ONNX backends additionally need
+``sentence-transformers[onnx]>=3.2``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.vectordb.embedders import DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS, EmbedderRegistry
+
+ROOT = Path(__file__).resolve().parents[1]
+QUERY_FILE = ROOT / "benchmarks" / "benchmark_queries.jsonl"
+RESULTS_DIR = ROOT / "results"
+
+
+def read_queries(path: Path) -> List[Dict[str, str]]:
+    with path.open("r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def top_k(query_vectors: np.ndarray, doc_vectors: np.ndarray, k: int) -> np.ndarray:
+    query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    doc_vectors = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def bench_backend(
+    registry: EmbedderRegistry,
+    model_name: str,
+    backend: str,
+    queries: List[str],
+    corpus: List[str],
+    repeat: int,
+    batch_size: int,
+    k: int,
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    model = registry.get(model_name, backend)
+    load_seconds = time.perf_counter() - start
+
+    model.encode(corpus[:batch_size], batch_size=batch_size)  # warm kernels
+    start = time.perf_counter()
+    for _ in range(repeat):
+        doc_vectors = np.asarray(model.encode(corpus, batch_size=batch_size), dtype=np.float32)
+    encode_seconds = time.perf_counter() - start
+    query_vectors = np.asarray(model.encode(queries, batch_size=batch_size), dtype=np.float32)
+
+    ranked = top_k(query_vectors, doc_vectors, k)
+    hits = sum(1 for idx, row in enumerate(ranked) if idx in row)
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "docs_per_second": round(len(corpus) * repeat / encode_seconds, 1),
+        f"recall@{k}": round(hits / len(queries), 4),
+        "ranked": ranked,
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    rows = read_queries(Path(args.queries))[: args.limit]
+    queries = [row["query"] for row in rows]
+    corpus = [row["reference_answer"] for row in rows]
+    registry = EmbedderRegistry()
+
+    results: List[Dict[str, Any]] = []
+    baseline: Optional[np.ndarray] = None
+    for backend in args.backends:
+        try:
+            result = bench_backend(registry, args.model, backend, queries, corpus, args.repeat, args.batch_size, args.k)
+        except Exception as exc:
+            print(f"{backend}: skipped ({exc})")
+            results.append({"backend": backend, "error": str(exc)})
+            continue
+        ranked = result.pop("ranked")
+        if backend == "torch":
+            baseline = ranked
+        if baseline is not None:
+            overlap = [len(set(a) & set(b)) / args.k for a, b in zip(ranked, baseline)]
+            result[f"agreement@{args.k}"] = round(float(np.mean(overlap)), 4)
+        results.append(result)
+        print(json.dumps(result))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / "embedding_backends.json"
+    report = {"model": args.model, "queries": len(queries), "repeat": args.repeat, "k": args.k, "results": results}
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default=str(QUERY_FILE))
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5, help="Encode the corpus this many times for stable timing")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    run(parser.parse_args())
@@ -0,0 +1,118 @@
+"""Entity extraction time against chat log length.
+
+``legacy_extract`` is the extractor as it was before interval-based overlap
+resolution: one ``re.finditer`` per rule, with the name lists as big regex
+alternations, and every match checked against all accepted spans with
+``any(...)``. That check is quadratic in the number of entities. Both
+versions run on synthetic chat logs of growing size. The benchmark reports
+milliseconds per log and how often the two disagree. The legacy check
+misses a match that strictly contains an accepted span, so a few
+disagreements are expected.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from src.nlp_tasks_simple import Entity, EntityExtractionResult, RuleBasedEntityExtractor
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / "results"
+
+MESSAGES = [
+    "Hi, do you have the iPhone 15 Pro in silver?",
+    "I want to buy 2 red Nike shoes for $150",
+    "Can you ship 3 pieces to New York, USA?",
+    "The Samsung Galaxy S24 I got for 800 dollars has a defect",
+    "Do you have a large dark blue shirt in XL?",
+    "I need 2 x Adidas socks shipped to San Diego",
+    "Is the 15 inch Dell laptop available in black or grey?",
+    "Please send five units to London, UK for €120 each",
+    "thanks, that's all",
+]
+
+
+def legacy_patterns():
+    return {
+        entity_type: [
+            (r'\b(' + '|'.join(pattern) + r')\b' if isinstance(pattern, tuple) else pattern, name)
+            for pattern, name in patterns
+        ]
+        for entity_type, patterns in RuleBasedEntityExtractor.ENTITY_PATTERNS.items()
+    }
+
+
+def legacy_extract(text: str, patterns=None) -> EntityExtractionResult:
+    entities = []
+    seen_spans = set()
+    for entity_type, type_patterns in (patterns or legacy_patterns()).items():
+        for pattern, _ in type_patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                span = (match.start(), match.end())
+                if any(s <= span[0] < e or s < span[1] <= e for s, e in seen_spans):
+                    continue
+                entities.append(Entity(text=match.group(), type=entity_type, start=match.start(),
+                                       end=match.end(), confidence=0.9))
+                seen_spans.add(span)
+    entities.sort(key=lambda e: e.start)
+    return EntityExtractionResult(text=text, entities=entities)
+
+
+def chat_log(n_chars: int, seed: int) -> str:
+    rng = random.Random(seed)
+    lines: List[str] = []
+    size = 0
+    while size < n_chars:
+        line = f"{rng.choice(['user', 'agent'])}: {rng.choice(MESSAGES)}"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def best_ms(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def run(args: argparse.Namespace) -> None:
+    extractor = RuleBasedEntityExtractor()
+    patterns = legacy_patterns()
+    results = []
+    for n_chars in args.sizes:
+        log = chat_log(n_chars, args.seed)
+        new = extractor.extract(log)
+        old = legacy_extract(log, patterns)
+        result = {
+            "chars": len(log),
+            "entities": len(new.entities),
+            "disagreements": len({(e.start, e.end, e.type) for e in new.entities}
+                                 ^ {(e.start, e.end, e.type) for e in old.entities}),
+            "legacy_ms": best_ms(lambda: legacy_extract(log, patterns), args.repeats),
+            "extract_ms": best_ms(lambda: extractor.extract(log), args.repeats),
+        }
+        result["speedup"] = round(result["legacy_ms"] / result["extract_ms"], 2)
+        results.append(result)
+        print(json.dumps(result))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / "entity_extractor.json"
+    output.write_text(json.dumps({"results": results}, indent=2), encoding="utf-8")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 4_000, 16_000, 64_000],
+                        help="Chat log lengths in characters")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per variant; the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,106 @@
+"""Throughput of the single-pass intent matcher against per-pattern regex search.
+
+``legacy_classify`` is the classifier as it was before ``IntentMatcher``:
+one ``re.search`` per pattern string per message. Both run over the same
+synthetic e-commerce messages (built from the pattern keywords, near misses
+like "wanted" or "behave", and filler words); the benchmark checks that
+every prediction agrees, then reports messages per second for ``classify``,
+``classify_batch`` and the legacy loop.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from src.nlp_tasks_simple import Intent, IntentPrediction, RuleBasedIntentClassifier
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / "results"
+
+FRAGMENTS = [
+    "hi there", "do you have", "the iphone 15 pro", "in silver", "i'm looking for", "red nike shoes",
+    "where can i get", "a new smartphone", "show me", "what product", "i want to buy", "add to cart",
+    "proceed to payment", "i'll take it", "the screen is broken", "i want a refund", "return policy",
+    "money back", "doesn't work", "not as described", "really disappointed", "five star review",
+    "i don't recommend it", "my thoughts", "great experience", "how long is shipping", "could you",
+    "more information", "specifications", "wanted nice phones", "they behave well", "whatever",
+    "ordering", "buying soon", "thanks", "for $150", "size 10", "to new york", "asap", "ok",
+]
+
+
+def legacy_classify(text: str) -> IntentPrediction:
+    patterns = RuleBasedIntentClassifier.INTENT_PATTERNS
+    text_lower = text.lower()
+    scores = {}
+    for intent_name, intent_patterns in patterns.items():
+        matches = sum(1 for pattern in intent_patterns if re.search(pattern, text_lower, re.IGNORECASE))
+        scores[intent_name] = matches / len(intent_patterns)
+    top_intent = max(scores, key=scores.get)
+    confidence = scores[top_intent]
+    if confidence == 0:
+        top_intent = Intent.INQUIRY.value
+        confidence = 0.5
+    return IntentPrediction(
+        text=text,
+        intent=top_intent,
+        confidence=min(confidence, 1.0),
+        reasoning=f"Matched {int(scores[top_intent] * len(patterns[top_intent]))} patterns",
+    )
+
+
+def synthetic_messages(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(n):
+        words = rng.sample(FRAGMENTS, rng.randint(1, 5))
+        message = " ".join(words)
+        messages.append(message.capitalize() + rng.choice(["", ".", "?", "!"]))
+    return messages
+
+
+def throughput(fn: Callable[[], object], n_messages: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(n_messages / best)
+
+
+def run(args: argparse.Namespace) -> None:
+    messages = synthetic_messages(args.n, args.seed)
+    classifier = RuleBasedIntentClassifier()
+
+    disagreements = [m for m in messages if classifier.classify(m) != legacy_classify(m)]
+    print(f"{len(messages)} messages, {len(disagreements)} disagreements with the legacy classifier")
+    for message in disagreements[:5]:
+        print(f"  {message!r}: {classifier.classify(message)} vs {legacy_classify(message)}")
+
+    report = {
+        "messages": len(messages),
+        "distinct_messages": len(set(messages)),
+        "disagreements": len(disagreements),
+        "legacy_per_second": throughput(lambda: [legacy_classify(m) for m in messages], len(messages), args.repeats),
+        "classify_per_second": throughput(lambda: [classifier.classify(m) for m in messages], len(messages), args.repeats),
+        "classify_batch_per_second": throughput(lambda: classifier.classify_batch(messages), len(messages), args.repeats),
+    }
+    report["speedup"] = round(report["classify_per_second"] / report["legacy_per_second"], 2)
+    print(json.dumps(report, indent=2))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / "intent_matcher.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20_000, help="Synthetic messages")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per variant; the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
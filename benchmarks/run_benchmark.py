@@ -10,10 +10,12 @@ import json
 import statistics
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from src.evaluation.metrics import RAGEvaluator
 from src.observability.metrics import MetricsCollector, estimate_tokens, summarize_metrics
+from src.providers.rate_limit import RateLimiter, is_rate_limit_error
+from src.providers.registry import get_provider_registry
 
 ROOT = Path(__file__).resolve().parents[1]
 QUERY_FILE = ROOT / "benchmarks" / "benchmark_queries.jsonl"
@@ -89,34 +91,50 @@ def deterministic_pipeline(query: str, reference_answer: str, mode: str) -> Dict
     }
 
 
-def live_pipeline(api_url: str, query: str) -> Dict[str, Any]:
-    import httpx
-    with httpx.Client(timeout=180) as client:
-        create = client.post(f"{api_url.rstrip('/')}/api/research", json={"query": query})
-        create.raise_for_status()
-        job_id = create.json()["job_id"]
-        while True:
-            status = client.get(f"{api_url.rstrip('/')}/api/research/{job_id}")
-            if status.status_code == 404:
-                raise RuntimeError(
-                    f"Research job {job_id} disappeared before completion. "
-                    "The API stores jobs in memory, so this usually means the "
-                    "Uvicorn reload process restarted the server. Run the API "
-                    "without --reload for live benchmarks."
-                )
-            status.raise_for_status()
-            payload = status.json()
-            if payload["status"] in {"completed", "error"}:
-                if payload["status"] == "error":
-                    error = payload.get("error") or "No error detail returned by API"
-                    raise RuntimeError(f"Research job {job_id} failed: {error}")
-                return payload["result"]
-            time.sleep(1)
+def is_backpressure(exc: Exception) -> bool:
+    """429 or 503 from the API's job queue, or a provider rate limit."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 503 or is_rate_limit_error(exc)
 
 
-def is_rate_limit_error(error: str) -> bool:
-    lowered = error.lower()
-    return "rate_limit" in lowered or "rate limit" in lowered or "429" in lowered
+def is_rate_limited(exc: Exception) -> bool:
+    """A provider rate limit, raised directly or reported by a failed job.
+
+    The API tags a job's error with the rate-limit code when a 429 failed it.
+    """
+    return is_rate_limit_error(exc) or is_rate_limit_error(str(exc))
+
+
+def live_pipeline(api_url: str, query: str, limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+    # Reuse one keep-alive pool across every query in the run.
+    client = get_provider_registry().http("research_api", timeout=180)
+    limiter = limiter or RateLimiter("research_api")
+
+    def submit():
+        response = client.post(f"{api_url.rstrip('/')}/api/research", json={"query": query})
+        response.raise_for_status()
+        return response
+
+    # Paced submissions; queue refusals are retried after their Retry-After.
+    create = limiter.call_sync(submit, retry_on=is_backpressure)
+    job_id = create.json()["job_id"]
+    while True:
+        status = client.get(f"{api_url.rstrip('/')}/api/research/{job_id}")
+        if status.status_code == 404:
+            raise RuntimeError(
+                f"Research job {job_id} disappeared before completion. "
+                "The default job store is in memory, so this usually means the "
+                "Uvicorn reload process restarted the server. Run the API "
+                "without --reload, or set JOB_STORE_URL=sqlite:///jobs.db."
+            )
+        status.raise_for_status()
+        payload = status.json()
+        if payload["status"] in {"completed", "error"}:
+            if payload["status"] == "error":
+                error = payload.get("error") or "No error detail returned by API"
+                raise RuntimeError(f"Research job {job_id} failed: {error}")
+            return payload["result"]
+        time.sleep(1)
 
 
 def aggregate(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -197,13 +215,14 @@ def run(args: argparse.Namespace) -> None:
     all_rows = []
     failures = []
     ablation_rows: Dict[str, List[Dict[str, Any]]] = {"multi_agent": [], "single_agent": []}
+    limiter = RateLimiter("research_api", requests_per_minute=args.requests_per_minute)
     for idx, item in enumerate(queries, start=1):
         absolute_idx = start_index + idx
         if args.live:
             completed = False
             print(f"[{absolute_idx}/{len(query_rows)}] live benchmark: {item['query']}", flush=True)
             try:
-                result = live_pipeline(args.api_url, item["query"])
+                result = live_pipeline(args.api_url, item["query"], limiter)
                 result["mode"] = "multi_agent"
                 all_rows.append(result)
                 ablation_rows["multi_agent"].append(result)
@@ -216,7 +235,7 @@ def run(args: argparse.Namespace) -> None:
                 print(f"[{absolute_idx}/{len(query_rows)}] failed: {exc}", flush=True)
                 if args.fail_fast:
                     raise
-                if is_rate_limit_error(str(exc)) and not args.continue_on_rate_limit:
+                if is_rate_limited(exc) and not args.continue_on_rate_limit:
                     print(
                         "Stopping early because the provider rate/token limit was reached. "
                         "Retry later with --start set to this query index.",
@@ -265,6 +284,12 @@ if __name__ == "__main__":
     parser.add_argument("--live", action="store_true", help="Call a running FastAPI backend instead of deterministic proxy")
     parser.add_argument("--api-url", default="http://localhost:8000")
     parser.add_argument("--delay-seconds", type=float, default=0, help="Sleep between live queries")
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=0,
+        help="Pace live job submissions with a token bucket (0 disables pacing)",
+    )
     parser.add_argument("--fail-fast", action="store_true", help="Stop on the first failed live query")
     parser.add_argument("--continue-on-rate-limit", action="store_true", help="Keep running after a provider rate-limit error")
     run(parser.parse_args())
@@ -0,0 +1,140 @@
+"""In-process event bus for pushing job progress to SSE subscribers.
+
+run_research_job publishes events as agents start and finish; each SSE
+connection awaits the job's channel instead of polling the job store, so an
+idle watcher costs one suspended coroutine. Every job keeps a short replay
+buffer so clients reconnecting with ``Last-Event-ID`` resume where they left
+off.
+
+Channels live in the worker process that runs the job. Subscribers on other
+workers should fall back to reading the job store.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+# Events kept per job for replay. A client whose Last-Event-ID has fallen
+# out of the buffer gets a state snapshot instead of the missed events, so
+# size it to the longest token stream a job publishes.
+DEFAULT_HISTORY_SIZE = 1024
+# Keep finished channels around briefly so late or reconnecting clients can
+# still replay the final events.
+DEFAULT_RETENTION_SECONDS = 300
+DEFAULT_HEARTBEAT_SECONDS = 15.0
+
+
+@dataclass
+class JobEvent:
+    id: int
+    data: Dict[str, Any]
+
+
+class _Channel:
+    def __init__(self, history_size: int, state: Dict[str, Any]):
+        self.history: Deque[JobEvent] = deque(maxlen=history_size)
+        self.state = dict(state)
+        self.last_id = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def publish(self, event: str, data: Dict[str, Any]) -> JobEvent:
+        self.last_id += 1
+        job_event = JobEvent(id=self.last_id, data={"event": event, **self.state, **data})
+        self.history.append(job_event)
+        # Wake every waiting subscriber at once, then arm a fresh event for
+        # the next publish.
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+        return job_event
+
+    def snapshot(self) -> JobEvent:
+        return JobEvent(id=self.last_id, data={"event": "snapshot", **self.state})
+
+    def events_after(self, cursor: int) -> list:
+        if not self.history or cursor >= self.last_id:
+            return []
+        offset = max(cursor - self.history[0].id + 1, 0)
+        return list(self.history)[offset:]
+
+
+class EventBus:
+    """Per-job fan-out of progress events with bounded replay."""
+
+    def __init__(
+        self,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+    ):
+        self.history_size = history_size
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[str, _Channel] = {}
+
+    def open(self, job_id: str, state: Optional[Dict[str, Any]] = None) -> None:
+        """Create a channel for a job before its first event."""
+        self._channels.setdefault(job_id, _Channel(self.history_size, state or {}))
+
+    def has_channel(self, job_id: str) -> bool:
+        return job_id in self._channels
+
+    def publish(self, job_id: str, event: str, data: Optional[Dict[str, Any]] = None, **state: Any) -> Optional[JobEvent]:
+        """Publish an event. Keyword arguments also update the job's tracked state."""
+        channel = self._channels.get(job_id)
+        if channel is None or channel.closed:
+            return None
+        channel.state.update(state)
+        return channel.publish(event, data or {})
+
+    def close(self, job_id: str) -> None:
+        """Mark a job finished; subscribers drain and exit, and the channel is dropped later."""
+        channel = self._channels.get(job_id)
+        if channel is None or channel.closed:
+            return
+        channel.closed = True
+        channel.publish("closed", {})
+        try:
+            asyncio.get_running_loop().call_later(self.retention_seconds, self._channels.pop, job_id, None)
+        except RuntimeError:
+            self._channels.pop(job_id, None)
+
+    async def subscribe(
+        self,
+        job_id: str,
+        last_event_id: Optional[int] = None,
+        heartbeat_seconds: float = DEFAULT_HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[Optional[JobEvent]]:
+        """Yield events for a job, or None when a heartbeat is due.
+
+        New subscribers (and resumers whose ``last_event_id`` fell out of the
+        replay buffer) first receive a snapshot of the current state.
+        """
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+
+        # Without a usable cursor, start from a snapshot of the current state.
+        cursor = -1 if last_event_id is None else last_event_id
+        while True:
+            # Take the wakeup before draining: anything published while this
+            # generator is paused at a yield sets it, or shows up as
+            # cursor < last_id below.
+            wakeup = channel._wakeup
+            stale = channel.history and cursor < channel.history[0].id - 1
+            if cursor < 0 or cursor > channel.last_id or stale:
+                snapshot = channel.snapshot()
+                cursor = snapshot.id
+                yield snapshot
+            for job_event in channel.events_after(cursor):
+                cursor = job_event.id
+                if job_event.data["event"] != "closed":
+                    yield job_event
+            if cursor < channel.last_id:
+                continue  # more arrived mid-drain
+            if channel.closed:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
@@ -0,0 +1,152 @@
+"""Bounded priority queue and worker pool for research jobs.
+
+A fixed number of workers pull jobs in priority order, so concurrency (and
+the request rate seen by Groq and Tavily) stays at a sustainable level no
+matter how many jobs arrive. Admission control keeps the backlog bounded:
+
+- at ``max_depth`` waiting jobs every submission is refused (HTTP 503)
+- at ``soft_limit`` waiting jobs low-priority submissions are refused (HTTP 429)
+
+Refusals carry a Retry-After estimate from the backlog and the moving
+average job duration.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_JOB_SECONDS = 30.0
+# Weight of the newest sample in the job duration moving average.
+DURATION_SMOOTHING = 0.2
+
+
+class QueueRejected(Exception):
+    """Submission refused; ``status_code`` is 429 (soft limit) or 503 (full)."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+@dataclass
+class QueueStats:
+    submitted: int = 0
+    rejected_429: int = 0
+    rejected_503: int = 0
+    completed: int = 0
+    failed: int = 0
+    peak_depth: int = 0
+
+
+class JobQueue:
+    """Priority queue drained by ``workers`` asyncio tasks."""
+
+    def __init__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        workers: int = 16,
+        max_depth: int = 100,
+        soft_limit: Optional[int] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.soft_limit = max_depth // 2 if soft_limit is None else soft_limit
+        self.stats = QueueStats()
+        self.avg_job_seconds = DEFAULT_JOB_SECONDS
+        self._heap: List[Tuple[int, int, str, tuple]] = []
+        self._counter = itertools.count()
+        self._running = 0
+        self._tasks: List[asyncio.Task] = []
+        self._ready: Optional[asyncio.Condition] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _ensure_started(self) -> None:
+        # Workers bind to the loop of the first submission.
+        if self._tasks:
+            return
+        self._ready = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def retry_after(self) -> int:
+        backlog = len(self._heap) + self._running
+        return max(1, math.ceil(backlog / self.workers * self.avg_job_seconds))
+
+    async def submit(self, job_id: str, *args: Any, priority: str = "normal") -> int:
+        """Enqueue a job; returns its 1-based queue position or raises QueueRejected."""
+        rank = PRIORITIES[priority]
+        depth = len(self._heap)
+        if depth >= self.max_depth:
+            self.stats.rejected_503 += 1
+            raise QueueRejected(503, self.retry_after(), "Research queue is full; retry later.")
+        if depth >= self.soft_limit and rank >= PRIORITIES["low"]:
+            self.stats.rejected_429 += 1
+            raise QueueRejected(429, self.retry_after(), "Research queue is busy; low-priority jobs are deferred.")
+
+        self._ensure_started()
+        entry = (rank, next(self._counter), job_id, args)
+        heapq.heappush(self._heap, entry)
+        self.stats.submitted += 1
+        self.stats.peak_depth = max(self.stats.peak_depth, len(self._heap))
+        async with self._ready:
+            self._ready.notify()
+        return self._rank(entry)
+
+    def _rank(self, entry: Tuple[int, int, str, tuple]) -> int:
+        return 1 + sum(1 for other in self._heap if other[:2] < entry[:2])
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, or None once a worker has it."""
+        for entry in self._heap:
+            if entry[2] == job_id:
+                return self._rank(entry)
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: bool(self._heap))
+                _, _, job_id, args = heapq.heappop(self._heap)
+            self._running += 1
+            start = time.monotonic()
+            try:
+                await self.handler(job_id, *args)
+                self.stats.completed += 1
+            except Exception:
+                # The handler records job errors itself; keep the worker alive.
+                self.stats.failed += 1
+                logger.exception("Research job %s crashed its worker", job_id)
+            finally:
+                self._running -= 1
+                elapsed = time.monotonic() - start
+                self.avg_job_seconds += DURATION_SMOOTHING * (elapsed - self.avg_job_seconds)
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._heap),
+            "running": self._running,
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "soft_limit": self.soft_limit,
+            "avg_job_seconds": round(self.avg_job_seconds, 2),
+            **asdict(self.stats),
+        }
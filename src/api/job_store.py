@@ -0,0 +1,501 @@
+"""Pluggable job storage for the research API.
+
+Status rows (status, progress, current_agent, ...) are small and polled
+often; result payloads are large and read once. Every backend keeps the two
+apart so a status poll never deserializes a full report.
+
+Identical requests are coalesced through in-flight claims: the first job
+to claim a request key runs, later callers are pointed at it until it
+finishes. The SQLite backend records which process holds each claim. On
+startup it fails jobs whose process is gone, so a crash cannot leave a
+key attached to a job that will never finish.
+
+Backends are selected with ``JOB_STORE_URL``:
+
+- ``memory://`` (default): process-local dict, lost on restart
+- ``sqlite:///path/to/jobs.db``: WAL-mode file shared by all workers on a host
+- ``redis://host:6379/0``: shared across hosts, needs the ``redis`` package
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+FINISHED_STATUSES = {"completed", "error"}
+DEFAULT_JOB_TTL_SECONDS = 3600
+# How often create() sweeps expired jobs in backends without native TTLs.
+EVICTION_INTERVAL_SECONDS = 60
+ORPHANED_JOB_ERROR = "The worker running this job exited before it finished"
+
+
+class JobStore(ABC):
+    """Storage interface for research job status rows and result blobs."""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._last_eviction = 0.0
+
+    @abstractmethod
+    def create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """Insert a new status row."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status row without the result, or None."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Atomically merge ``fields`` into the status row."""
+
+    @abstractmethod
+    def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Store the result blob for a job."""
+
+    @abstractmethod
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the result blob, or None if the job has not completed."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """Remove a job and its result."""
+
+    @abstractmethod
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop finished jobs older than the TTL. Returns the number removed."""
+
+    @abstractmethod
+    def claim_inflight(self, key: str, job_id: str) -> str:
+        """Atomically make ``job_id`` the running job for ``key``.
+
+        If an unfinished job already holds the key, that job's ID is
+        returned and nothing changes; otherwise ``job_id`` takes the claim
+        and is returned. Create the job row before claiming.
+        """
+
+    @abstractmethod
+    def release_inflight(self, key: str, job_id: str) -> None:
+        """Drop the claim on ``key`` if ``job_id`` still holds it."""
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def _maybe_evict(self) -> None:
+        now = time.time()
+        if now - self._last_eviction >= EVICTION_INTERVAL_SECONDS:
+            self._last_eviction = now
+            self.evict_expired(now)
+
+    @staticmethod
+    def _finished_at(fields: Dict[str, Any]) -> Optional[float]:
+        if fields.get("status") in FINISHED_STATUSES:
+            return time.time()
+        return None
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store. Fast, but lost on restart and not shared by workers."""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._finished: Dict[str, float] = {}
+        self._inflight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        self._maybe_evict()
+        with self._lock:
+            self._rows[job_id] = dict(fields)
+            # Answer-cache hits are created already completed.
+            finished_at = self._finished_at(fields)
+            if finished_at is not None:
+                self._finished[job_id] = finished_at
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.get(job_id)
+            return dict(row) if row is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            if job_id not in self._rows:
+                return
+            self._rows[job_id].update(fields)
+            finished_at = self._finished_at(fields)
+            if finished_at is not None:
+                self._finished[job_id] = finished_at
+
+    def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._results[job_id] = result
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._results.get(job_id)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._rows.pop(job_id, None)
+            self._results.pop(job_id, None)
+            self._finished.pop(job_id, None)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        cutoff = (now or time.time()) - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, finished in self._finished.items() if finished <= cutoff]
+        for job_id in expired:
+            self.delete(job_id)
+        return len(expired)
+
+    def claim_inflight(self, key: str, job_id: str) -> str:
+        with self._lock:
+            holder = self._inflight.get(key)
+            row = self._rows.get(holder) if holder else None
+            if row is not None and row.get("status") not in FINISHED_STATUSES:
+                return holder
+            self._inflight[key] = job_id
+            return job_id
+
+    def release_inflight(self, key: str, job_id: str) -> None:
+        with self._lock:
+            if self._inflight.get(key) == job_id:
+                del self._inflight[key]
+
+
+class SQLiteJobStore(JobStore):
+    """File-backed store in WAL mode so several uvicorn workers can share it."""
+
+    def __init__(self, path: str, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs(finished_at);
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS inflight (
+                key TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                owner TEXT,
+                claimed_at REAL
+            );
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(inflight)")}
+        for column, kind in (("owner", "TEXT"), ("claimed_at", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE inflight ADD COLUMN {column} {kind}")
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}"
+        self.reclaim_orphans()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        self._maybe_evict()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, data, finished_at) VALUES (?, ?, ?)",
+            (job_id, json.dumps(fields), self._finished_at(fields)),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent
+        # read-modify-write cycles from other workers cannot interleave.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row:
+                data = json.loads(row[0])
+                data.update(fields)
+                conn.execute(
+                    "UPDATE jobs SET data = ?, finished_at = COALESCE(?, finished_at) WHERE job_id = ?",
+                    (json.dumps(data), self._finished_at(fields), job_id),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO job_results (job_id, data) VALUES (?, ?)",
+            (job_id, json.dumps(result)),
+        )
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM job_results WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, job_id: str) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        cutoff = (now or time.time()) - self.ttl_seconds
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM job_results WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at <= ?)",
+                (cutoff,),
+            )
+            removed = conn.execute("DELETE FROM jobs WHERE finished_at <= ?", (cutoff,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def _owner_alive(self, owner: Optional[str], claimed_at: Optional[float], now: float) -> bool:
+        """Whether the process that claimed a key may still be running its job.
+
+        Processes on this host are checked directly. For other hosts (e.g.
+        containers sharing the file) the claim is trusted for one job TTL,
+        like the Redis backend's claim expiry.
+        """
+        host, _, pid = (owner or "").rpartition(":")
+        if host != self.host or not pid.isdigit():
+            return bool(owner) and claimed_at is not None and now - claimed_at < self.ttl_seconds
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # exists, owned by another user
+        return True
+
+    def _fail_job(self, conn: sqlite3.Connection, job_id: str, now: float) -> None:
+        conn.execute(
+            "UPDATE jobs SET data = json_set(data, '$.status', 'error', '$.error', ?), finished_at = ? "
+            "WHERE job_id = ? AND finished_at IS NULL",
+            (ORPHANED_JOB_ERROR, now, job_id),
+        )
+
+    def reclaim_orphans(self) -> int:
+        """Fail unfinished jobs whose claiming process is gone and drop their claims.
+
+        Runs on startup, so a crash or restart does not leave requests
+        coalescing onto jobs that will never finish. Returns the number of
+        claims dropped.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            claims = conn.execute("SELECT key, job_id, owner, claimed_at FROM inflight").fetchall()
+            orphaned = [(key, job_id) for key, job_id, owner, claimed_at in claims
+                        if not self._owner_alive(owner, claimed_at, now)]
+            for key, job_id in orphaned:
+                self._fail_job(conn, job_id, now)
+                conn.execute("DELETE FROM inflight WHERE key = ? AND job_id = ?", (key, job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(orphaned)
+
+    def claim_inflight(self, key: str, job_id: str) -> str:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A holder whose row is gone or finished no longer counts.
+            holder = conn.execute(
+                "SELECT inflight.job_id, inflight.owner, inflight.claimed_at FROM inflight "
+                "JOIN jobs ON jobs.job_id = inflight.job_id WHERE inflight.key = ? AND jobs.finished_at IS NULL",
+                (key,),
+            ).fetchone()
+            if holder is not None and not self._owner_alive(holder[1], holder[2], now):
+                # Its worker died; fail the job so watchers stop waiting on it.
+                self._fail_job(conn, holder[0], now)
+                holder = None
+            if holder is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO inflight (key, job_id, owner, claimed_at) VALUES (?, ?, ?, ?)",
+                    (key, job_id, self.owner, now),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return holder[0] if holder else job_id
+
+    def release_inflight(self, key: str, job_id: str) -> None:
+        self._conn().execute("DELETE FROM inflight WHERE key = ? AND job_id = ?", (key, job_id))
+
+
+class RedisJobStore(JobStore):
+    """Redis-backed store. Status rows are hashes, so each field update is atomic."""
+
+    def __init__(self, client: Any, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS, prefix: str = "research:job:"):
+        super().__init__(ttl_seconds)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS) -> "RedisJobStore":
+        import redis
+
+        return cls(redis.Redis.from_url(url), ttl_seconds=ttl_seconds)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    def _result_key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}:result"
+
+    def _inflight_key(self, key: str) -> str:
+        return f"{self.prefix}inflight:{key}"
+
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        self.client.hset(self._key(job_id), mapping={k: json.dumps(v) for k, v in fields.items()})
+        if self._finished_at(fields) is not None:
+            self._expire(job_id)
+
+    def _expire(self, job_id: str) -> None:
+        # Redis evicts on its own; no sweep needed. EXPIRE on a missing key is
+        # a no-op, so set_result() applies the TTL to a result written later.
+        self.client.expire(self._key(job_id), self.ttl_seconds)
+        self.client.expire(self._result_key(job_id), self.ttl_seconds)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hgetall(self._key(job_id))
+        if not raw:
+            return None
+        return {self._decode(k): json.loads(self._decode(v)) for k, v in raw.items()}
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        key = self._key(job_id)
+        if not self.client.exists(key):
+            return
+        self.client.hset(key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        if self._finished_at(fields) is not None:
+            self._expire(job_id)
+
+    def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        key = self._key(job_id)
+        ttl = self.client.ttl(key)
+        # A finished job's row already has a TTL; give the result the same one.
+        self.client.set(self._result_key(job_id), json.dumps(result), ex=ttl if ttl and ttl > 0 else None)
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._result_key(job_id))
+        return json.loads(self._decode(raw)) if raw else None
+
+    def delete(self, job_id: str) -> None:
+        self.client.delete(self._key(job_id), self._result_key(job_id))
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        return 0
+
+    def claim_inflight(self, key: str, job_id: str) -> str:
+        inflight_key = self._inflight_key(key)
+        # The TTL bounds how long a claim outlives a crashed worker.
+        if self.client.set(inflight_key, job_id, nx=True, ex=self.ttl_seconds):
+            return job_id
+        holder = self.client.get(inflight_key)
+        holder = self._decode(holder) if holder else None
+        row = self.get(holder) if holder else None
+        if row is not None and row.get("status") not in FINISHED_STATUSES:
+            return holder
+        # Stale claim. Two racing takeovers can both win here, which costs a
+        # duplicate run but never blocks a request.
+        self.client.set(inflight_key, job_id, ex=self.ttl_seconds)
+        return job_id
+
+    def release_inflight(self, key: str, job_id: str) -> None:
+        inflight_key = self._inflight_key(key)
+        holder = self.client.get(inflight_key)
+        if holder and self._decode(holder) == job_id:
+            self.client.delete(inflight_key)
+
+
+class AsyncJobStore:
+    """Awaitable view of a JobStore for use on the event loop.
+
+    SQLite calls can wait on the database lock and Redis calls on the
+    network, so both run in worker threads; the in-memory store answers
+    directly.
+    """
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._offload = not isinstance(store, InMemoryJobStore)
+
+    async def _run(self, fn, *args: Any, **kwargs: Any) -> Any:
+        if not self._offload:
+            return fn(*args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def create(self, job_id: str, fields: Dict[str, Any]) -> None:
+        await self._run(self.store.create, job_id, fields)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.store.get, job_id)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await self._run(self.store.update, job_id, **fields)
+
+    async def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        await self._run(self.store.set_result, job_id, result)
+
+    async def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.store.get_result, job_id)
+
+    async def delete(self, job_id: str) -> None:
+        await self._run(self.store.delete, job_id)
+
+    async def claim_inflight(self, key: str, job_id: str) -> str:
+        return await self._run(self.store.claim_inflight, key, job_id)
+
+    async def release_inflight(self, key: str, job_id: str) -> None:
+        await self._run(self.store.release_inflight, key, job_id)
+
+
+def create_job_store(url: Optional[str] = None, ttl_seconds: Optional[int] = None) -> JobStore:
+    """Build a job store from ``JOB_STORE_URL`` (or an explicit URL)."""
+    url = url or os.getenv("JOB_STORE_URL", "memory://")
+    if ttl_seconds is None:
+        ttl_seconds = int(os.getenv("JOB_TTL_SECONDS", str(DEFAULT_JOB_TTL_SECONDS)))
+
+    if url.startswith("memory://"):
+        return InMemoryJobStore(ttl_seconds=ttl_seconds)
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):], ttl_seconds=ttl_seconds)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore.from_url(url, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unsupported JOB_STORE_URL: {url}")
@@ -1,21 +1,66 @@
 """
 FastAPI Backend for Multi-Agent Research Assistant
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, List
+from src.api.events import DEFAULT_HISTORY_SIZE, EventBus
+from src.api.job_queue import JobQueue, QueueRejected
+from src.api.job_store import FINISHED_STATUSES, AsyncJobStore, create_job_store
+from src.api.streaming import IncrementalJSONParser
+from src.cache.answer_cache import CachedAnswer, get_answer_cache
+from src.cache.llm_cache import get_llm_cache
+from src.cache.search_cache import get_search_cache, normalize_query
+from src.observability.metrics import cache_stats, estimate_tokens
+from src.providers.rate_limit import (
+    RATE_LIMIT_ERROR_CODE,
+    completion_usage,
+    get_rate_limiter,
+    is_rate_limit_error,
+    is_retryable_error,
+    rate_limiter_metrics,
+)
+from src.providers.registry import get_provider_registry
+from src.vectordb.base import TENANT_PATTERN
+from src.vectordb.context_packer import pack_context
+from contextlib import asynccontextmanager
 import asyncio
+import hashlib
 import json
+import logging
+import os
 import uuid
 import re
+import threading
+import time
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("EMBEDDING_WARMUP", "0") == "1":
+        # Load the embedding model before the first request needs it.
+        from src.vectordb.embedders import warm_up
+        try:
+            backend = os.getenv("EMBEDDING_BACKEND", "torch")
+            load_times = await asyncio.to_thread(warm_up, None, backend)
+            logger.info("Embedding models warmed up: %s", load_times)
+        except Exception as exc:
+            logger.warning("Embedding warm-up failed: %s", exc)
+    yield
+    await job_queue.stop()
+    await get_provider_registry().aclose()
+
+
 app = FastAPI(
     title="Multi-Agent Research API",
     description="AI-powered research using autonomous agents",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -26,19 +71,154 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory job storage (use Redis in production)
-jobs = {}
+# Job status rows and results; backend chosen by JOB_STORE_URL. Calls are
+# awaited so a locked SQLite file or slow Redis never stalls the event loop.
+job_store = AsyncJobStore(create_job_store())
+
+# Upper bound on the synthesizer's output, and so on its token events.
+SYNTHESIS_MAX_TOKENS = 4000
+# Pushes progress to SSE subscribers of jobs running in this process. Each
+# streamed chunk (about one token) is one event; the replay buffer holds a
+# whole synthesizer stream plus the stage and field events around it.
+event_bus = EventBus(history_size=SYNTHESIS_MAX_TOKENS + DEFAULT_HISTORY_SIZE)
+# Poll interval for streams whose job runs in another worker process.
+STORE_POLL_SECONDS = 1.0
+# Token budget for the source excerpts sent to the researcher prompt. The
+# default keeps the prompt the size it was when each of the 5 sources was cut
+# at 300 characters: about 50 words, or 67 estimated tokens, plus its title.
+RESEARCH_CONTEXT_TOKENS = int(os.getenv("RESEARCH_CONTEXT_TOKENS", "400"))
+
+# Jobs run on the event loop with async provider clients, so one process
+# can drive many pipelines at once. A fixed pool of queue workers caps how
+# many talk to the providers concurrently; extra jobs wait in "pending" in
+# a bounded priority queue, and submissions beyond it are refused.
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "16"))
+JOB_QUEUE_MAX_DEPTH = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "100"))
+JOB_QUEUE_SOFT_LIMIT = int(os.getenv("JOB_QUEUE_SOFT_LIMIT", str(JOB_QUEUE_MAX_DEPTH // 2)))
+
+
+# The researcher reuses prior sources from the local vector store when
+# enough of them are close to the query, and only searches the web otherwise.
+# Unset: the backend default (./chroma_db or ./vector_index, see VECTOR_BACKEND).
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH") or None
+VECTOR_CACHE_MIN_SIMILARITY = float(os.getenv("VECTOR_CACHE_MIN_SIMILARITY", "0.6"))
+VECTOR_CACHE_MIN_HITS = int(os.getenv("VECTOR_CACHE_MIN_HITS", "3"))
+# Stored sources older than this are not reused (0 reuses any age).
+VECTOR_CACHE_MAX_AGE_SECONDS = float(os.getenv("VECTOR_CACHE_MAX_AGE_SECONDS", "604800"))
+# After a failure (e.g. the embedding model cannot be loaded) skip the
+# store and the answer cache for a while instead of paying the failure on
+# every job.
+VECTOR_STORE_RETRY_SECONDS = 300.0
+vector_cache_stats = cache_stats("vector_store")
+_vector_store = None
+_vector_store_failed_at: Optional[float] = None
+_vector_store_lock = threading.Lock()
+_background_tasks: set = set()
+
+
+def get_vector_store(tenant: Optional[str] = None):
+    """Open the shared vector store on first use; tenants get their own collection."""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            from src.vectordb.base import create_vector_store
+            _vector_store = create_vector_store(path=VECTOR_STORE_PATH)
+    return _vector_store.for_tenant(tenant) if tenant else _vector_store
+
+
+def vector_store_available() -> bool:
+    return _vector_store_failed_at is None or time.monotonic() - _vector_store_failed_at > VECTOR_STORE_RETRY_SECONDS
+
+
+def _vector_store_failed(action: str, exc: Exception) -> None:
+    global _vector_store_failed_at
+    _vector_store_failed_at = time.monotonic()
+    # Retrieval is an optimization; the pipeline falls back to a full run.
+    logger.warning("%s failed: %s", action, exc)
+
+
+def run_in_background(fn, *args) -> None:
+    """Run blocking bookkeeping in a thread without delaying the response."""
+    task = asyncio.create_task(asyncio.to_thread(fn, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def search_local_sources(query: str, n_results: int = 5, tenant: Optional[str] = None) -> List[dict]:
+    """Stored sources similar enough to the query, and fresh enough, to reuse, best first."""
+    if not vector_store_available():
+        return []
+    where = {"fetched_at": {"$gte": time.time() - VECTOR_CACHE_MAX_AGE_SECONDS}} if VECTOR_CACHE_MAX_AGE_SECONDS else None
+    try:
+        store = await asyncio.to_thread(get_vector_store, tenant)
+        hits = await asyncio.to_thread(store.search, query, n_results, where)
+    except Exception as exc:
+        _vector_store_failed("Vector store lookup", exc)
+        return []
+    return [
+        {
+            "title": hit["metadata"].get("title", ""),
+            "url": hit["metadata"].get("url", ""),
+            "content": hit["content"],
+            "score": hit["similarity"],
+            "source": "vector_store",
+        }
+        for hit in hits
+        if hit["similarity"] >= VECTOR_CACHE_MIN_SIMILARITY
+    ]
+
+
+def _index_sources(sources: List[dict], tenant: Optional[str] = None) -> None:
+    if not vector_store_available():
+        return
+    try:
+        vector_cache_stats.writes += get_vector_store(tenant).ingest(sources).added
+    except Exception as exc:
+        _vector_store_failed("Vector store write-back", exc)
+
+
+def remember_sources(sources: List[dict], tenant: Optional[str] = None) -> None:
+    """Index fresh web sources in the background so later queries can reuse them."""
+    run_in_background(_index_sources, sources, tenant)
+
+
+async def lookup_cached_answer(query: str) -> Optional[CachedAnswer]:
+    """A completed result for a semantically equivalent query, if one is cached."""
+    if not vector_store_available():
+        return None
+    try:
+        return await asyncio.to_thread(get_answer_cache().lookup, query)
+    except Exception as exc:
+        _vector_store_failed("Answer cache lookup", exc)
+        return None
+
+
+def _store_answer(query: str, result: dict, quality: float) -> None:
+    if not vector_store_available():
+        return
+    try:
+        get_answer_cache().store(query, result, quality)
+    except Exception as exc:
+        _vector_store_failed("Answer cache write", exc)
+
 
 class ResearchRequest(BaseModel):
     query: str
     max_iterations: int = 2
     citation_format: str = "apa"
     include_vector_search: bool = True
+    stream_synthesis: bool = True
+    bypass_cache: bool = False
+    priority: Literal["high", "normal", "low"] = "normal"
+    # Scopes stored-source reuse to the tenant's own collection; tenant jobs
+    # skip the shared answer cache.
+    tenant: Optional[str] = Field(default=None, pattern=TENANT_PATTERN.pattern)
 
 class ResearchResponse(BaseModel):
     job_id: str
     status: str
     message: str
+    queue_position: Optional[int] = None
 
 class JobStatus(BaseModel):
     job_id: str
@@ -47,6 +227,95 @@ class JobStatus(BaseModel):
     current_agent: Optional[str]
     result: Optional[dict]
     error: Optional[str] = None
+    queue_position: Optional[int] = None
+
+
+def inflight_key(request: ResearchRequest) -> str:
+    """Identity of a request for coalescing; options that only affect export are left out."""
+    payload = json.dumps({
+        "query": normalize_query(request.query),
+        "max_iterations": request.max_iterations,
+        "include_vector_search": request.include_vector_search,
+        "tenant": request.tenant,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def update_job(job_id: str, event: str, **fields) -> None:
+    """Persist a status change and push it to stream subscribers."""
+    await job_store.update(job_id, **fields)
+    event_bus.publish(job_id, event, **fields)
+
+
+@asynccontextmanager
+async def agent_stage(job_id: str, agent: str, progress: float):
+    """Publish agent_started/agent_finished around one pipeline stage."""
+    await update_job(job_id, "agent_started", current_agent=agent, progress=progress)
+    yield
+    event_bus.publish(job_id, "agent_finished", {"agent": agent})
+
+
+async def stream_completion(job_id: str, groq, parts: Optional[List[str]] = None, **kwargs) -> str:
+    """Consume a streamed Groq completion, forwarding it to SSE subscribers.
+
+    Each delta is published as a ``token`` event, and every top-level JSON
+    field is published as a ``field`` event the moment it closes, so clients
+    can render the title and summary long before generation finishes.
+    Deltas are collected in ``parts`` if given.
+    """
+    parser = IncrementalJSONParser()
+    parts = [] if parts is None else parts
+    stream = await groq.chat.completions.create(stream=True, **kwargs)
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        parts.append(delta)
+        publish_delta(job_id, parser, delta)
+    return "".join(parts)
+
+
+def publish_delta(job_id: str, parser: IncrementalJSONParser, delta: str) -> None:
+    event_bus.publish(job_id, "token", {"delta": delta})
+    for field, value in parser.feed(delta):
+        event_bus.publish(job_id, "field", {"field": field, "value": value})
+
+
+async def complete(job_id: str, groq, request: ResearchRequest, *, stream: bool = False, **kwargs) -> str:
+    """Run one Groq chat completion through the LLM response cache.
+
+    With ``stream`` the completion is forwarded to SSE subscribers as it
+    arrives; a cached completion is replayed as a single delta.
+    """
+    llm_cache = get_llm_cache()
+    content = None if request.bypass_cache else await llm_cache.get_async(**kwargs)
+    if content is not None:
+        if stream:
+            publish_delta(job_id, IncrementalJSONParser(), content)
+        return content
+
+    # Reserve the prompt estimate plus the completion ceiling; the limiter
+    # refunds the difference once actual usage is known.
+    prompt_tokens = estimate_tokens(kwargs["messages"])
+    limiter = get_rate_limiter("groq")
+    if stream:
+        streamed: List[str] = []
+        content = await limiter.call(
+            lambda: stream_completion(job_id, groq, streamed, **kwargs),
+            tokens=prompt_tokens + kwargs.get("max_tokens", 0),
+            usage=lambda text: prompt_tokens + estimate_tokens(text),
+            # Once tokens have reached subscribers, a retry would repeat them.
+            retry_on=lambda exc: not streamed and is_retryable_error(exc),
+        )
+    else:
+        response = await limiter.call(
+            lambda: groq.chat.completions.create(**kwargs),
+            tokens=prompt_tokens + kwargs.get("max_tokens", 0),
+            usage=completion_usage,
+        )
+        content = response.choices[0].message.content
+    await llm_cache.set_async(content, **kwargs)
+    return content
 
 
 def parse_llm_json(content: Optional[str]) -> dict:
@@ -184,80 +453,160 @@ async def root():
 async def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/metrics")
+async def metrics():
+    """Process-level cache counters and provider connection pool usage."""
+    from src.observability.metrics import cache_metrics
+    from src.vectordb.embedders import embedder_registry
+    return {
+        "caches": cache_metrics(),
+        "providers": get_provider_registry().stats(),
+        "embedders": embedder_registry.stats(),
+        "queue": job_queue.snapshot(),
+        "rate_limits": rate_limiter_metrics()
+    }
+
 @app.post("/api/research", response_model=ResearchResponse)
-async def create_research(request: ResearchRequest, background_tasks: BackgroundTasks):
+async def create_research(request: ResearchRequest):
     """Start a new research job."""
     job_id = str(uuid.uuid4())
     
-    jobs[job_id] = {
+    if not request.bypass_cache and request.tenant is None:
+        cached = await lookup_cached_answer(request.query)
+        if cached is not None:
+            await job_store.create(job_id, {
+                "status": "completed",
+                "progress": 1.0,
+                "current_agent": None,
+                "query": request.query,
+                "created_at": datetime.now().isoformat()
+            })
+            await job_store.set_result(job_id, {
+                **cached.result,
+                "cached": {
+                    "query": cached.query,
+                    "similarity": round(cached.similarity, 4),
+                    "age_seconds": round(cached.age_seconds, 1),
+                },
+            })
+            return ResearchResponse(
+                job_id=job_id,
+                status="completed",
+                message=f"Served from the answer cache (similar query answered {cached.age_seconds:.0f}s ago). Set bypass_cache to re-run."
+            )
+    
+    await job_store.create(job_id, {
         "status": "pending",
         "progress": 0.0,
         "current_agent": None,
         "query": request.query,
-        "result": None,
         "created_at": datetime.now().isoformat()
-    }
-    
-    # Add background task to run research
-    background_tasks.add_task(run_research_job, job_id, request)
+    })
+    # Single flight: an identical request already running absorbs this one,
+    # and the caller follows that job's status, stream and result.
+    owner = await job_store.claim_inflight(inflight_key(request), job_id)
+    if owner != job_id:
+        await job_store.delete(job_id)
+        owner_job = await job_store.get(owner) or {}
+        return ResearchResponse(
+            job_id=owner,
+            status=owner_job.get("status", "pending"),
+            message=f"Identical research job already in progress. Poll /api/research/{owner} for status.",
+            queue_position=job_queue.position(owner)
+        )
+    event_bus.open(job_id, {"status": "pending", "progress": 0.0, "current_agent": None})
+    try:
+        position = await job_queue.submit(job_id, request, priority=request.priority)
+    except QueueRejected as exc:
+        await job_store.release_inflight(inflight_key(request), job_id)
+        await job_store.delete(job_id)
+        event_bus.close(job_id)
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail, "retry_after": exc.retry_after},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     
     return ResearchResponse(
         job_id=job_id,
         status="pending",
-        message="Research job created. Poll /api/research/{job_id} for status."
+        message="Research job created. Poll /api/research/{job_id} for status.",
+        queue_position=position
     )
 
 @app.get("/api/research/{job_id}", response_model=JobStatus)
 async def get_research_status(job_id: str):
     """Get status of a research job."""
-    if job_id not in jobs:
+    job = await job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
+    # Only completed jobs pay for loading the result blob.
+    result = await job_store.get_result(job_id) if job["status"] == "completed" else None
     return JobStatus(
         job_id=job_id,
         status=job["status"],
         progress=job["progress"],
         current_agent=job["current_agent"],
-        result=job["result"],
-        error=job.get("error")
+        result=result,
+        error=job.get("error"),
+        queue_position=job_queue.position(job_id) if job["status"] == "pending" else None
     )
 
 @app.get("/api/research/{job_id}/stream")
-async def stream_research(job_id: str):
-    """Stream research progress using SSE."""
-    if job_id not in jobs:
+async def stream_research(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream research progress using SSE.
+
+    Events are pushed as agents start and finish. Reconnecting clients send
+    ``Last-Event-ID`` to replay what they missed; idle connections receive
+    heartbeat comments.
+    """
+    if await job_store.get(job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
+
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
     async def event_generator():
+        if event_bus.has_channel(job_id):
+            async for event in event_bus.subscribe(job_id, resume_from):
+                if event is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"id: {event.id}\ndata: {json.dumps(event.data)}\n\n"
+            return
+
+        # The job runs in another worker process (or finished long ago), so
+        # there is nothing to subscribe to here; follow the shared store.
         while True:
-            job = jobs.get(job_id, {})
+            job = await job_store.get(job_id) or {}
             data = {
+                "event": "snapshot",
                 "status": job.get("status"),
                 "progress": job.get("progress"),
                 "current_agent": job.get("current_agent")
             }
             yield f"data: {json.dumps(data)}\n\n"
-            
-            if job.get("status") in ["completed", "error"]:
+
+            if not job or job.get("status") in FINISHED_STATUSES:
                 break
-            
-            await asyncio.sleep(0.5)
+
+            await asyncio.sleep(STORE_POLL_SECONDS)
     
     return StreamingResponse(
         event_generator(),
-        media_type="text/event-stream"
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.get("/api/research/{job_id}/export/markdown")
 async def export_markdown(job_id: str, citation_format: str = "apa"):
     """Export research as Markdown."""
-    if job_id not in jobs or not jobs[job_id].get("result"):
+    result = await job_store.get_result(job_id)
+    if not result:
         raise HTTPException(status_code=404, detail="Job not found or not completed")
     
     from src.export.exporters import MarkdownExporter
     
-    result = jobs[job_id]["result"]
     md = MarkdownExporter.generate(
         result["synthesis"],
         result["research"],
@@ -274,12 +623,12 @@ async def export_markdown(job_id: str, citation_format: str = "apa"):
 @app.get("/api/research/{job_id}/export/pdf")
 async def export_pdf(job_id: str):
     """Export research as PDF."""
-    if job_id not in jobs or not jobs[job_id].get("result"):
+    result = await job_store.get_result(job_id)
+    if not result:
         raise HTTPException(status_code=404, detail="Job not found or not completed")
     
     from src.export.exporters import PDFExporter
     
-    result = jobs[job_id]["result"]
     pdf_bytes = PDFExporter().generate(
         result["synthesis"],
         result["research"],
@@ -295,95 +644,140 @@ async def export_pdf(job_id: str):
 async def run_research_job(job_id: str, request: ResearchRequest):
     """Background task to run research pipeline."""
     try:
-        jobs[job_id]["status"] = "running"
-        
-        # Import here to avoid circular imports
-        from groq import Groq
-        from tavily import TavilyClient
-        from dotenv import load_dotenv
-        import os
-
-        load_dotenv()
-        
-        groq_key = os.getenv("GROQ_API_KEY")
-        tavily_key = os.getenv("TAVILY_API_KEY")
-        
-        if not groq_key or not tavily_key:
-            raise ValueError("API keys not configured")
-
-        from src.observability.metrics import MetricsCollector, estimate_tokens
-        collector = MetricsCollector(request.query)
-        
-        # Researcher
-        jobs[job_id]["current_agent"] = "researcher"
-        jobs[job_id]["progress"] = 0.25
-        
-        tavily = TavilyClient(api_key=tavily_key)
-        groq = Groq(api_key=groq_key)
-        
+        await _run_pipeline(job_id, request)
+    except Exception as e:
+        error = str(e)
+        if is_rate_limit_error(e) and not is_rate_limit_error(error):
+            # Tavily's message doesn't say it was a 429; tag it so clients can tell.
+            error = f"{RATE_LIMIT_ERROR_CODE}: {error}"
+        await update_job(job_id, "error", status="error", error=error)
+    finally:
+        await job_store.release_inflight(inflight_key(request), job_id)
+        event_bus.close(job_id)
+
+
+# Workers start with the first submission so they bind to the serving loop.
+job_queue = JobQueue(
+    run_research_job,
+    workers=MAX_CONCURRENT_JOBS,
+    max_depth=JOB_QUEUE_MAX_DEPTH,
+    soft_limit=JOB_QUEUE_SOFT_LIMIT,
+)
+
+
+async def _run_pipeline(job_id: str, request: ResearchRequest):
+    """Run every agent without blocking the event loop."""
+    await update_job(job_id, "running", status="running")
+
+    # Import here to avoid circular imports
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    groq_key = os.getenv("GROQ_API_KEY")
+    tavily_key = os.getenv("TAVILY_API_KEY")
+
+    if not groq_key or not tavily_key:
+        raise ValueError("API keys not configured")
+
+    from src.observability.metrics import MetricsCollector
+    collector = MetricsCollector(request.query)
+
+    providers = get_provider_registry()
+    tavily = providers.async_tavily(tavily_key)
+    groq = providers.async_groq(groq_key)
+
+    # Researcher
+    async with agent_stage(job_id, "researcher", 0.25):
         with collector.agent_timer("researcher", input_tokens=estimate_tokens(request.query), output_tokens=2000):
-            search_results = tavily.search(request.query, max_results=5)
-            sources = search_results.get("results", [])
-            
-            sources_text = "\n".join([f"- {s['title']}: {s['content'][:300]}" for s in sources[:5]])
-            findings_response = groq.chat.completions.create(
+            async def fetch_sources():
+                search_results = await get_rate_limiter("tavily").call(
+                    lambda: tavily.search(request.query, max_results=5)
+                )
+                return search_results.get("results", [])
+
+            sources = []
+            retrieval = "web"
+            if request.include_vector_search and not request.bypass_cache:
+                local_sources = await search_local_sources(request.query, tenant=request.tenant)
+                if len(local_sources) >= VECTOR_CACHE_MIN_HITS:
+                    sources, retrieval = local_sources, "vector_store"
+                    vector_cache_stats.vector_hits += 1
+                else:
+                    vector_cache_stats.misses += 1
+            if not sources:
+                sources = await get_search_cache().search_async(
+                    request.query, 5, fetch_sources, bypass=request.bypass_cache
+                )
+                if request.include_vector_search:
+                    remember_sources(sources, request.tenant)
+
+            # Relevance-ordered, deduplicated and cut at sentence boundaries
+            # instead of a blind 300 characters per source.
+            sources_text = pack_context(
+                sources[:5], RESEARCH_CONTEXT_TOKENS, template="- {title}: {content}", separator="\n"
+            ).text
+            findings_content = await complete(
+                job_id,
+                groq,
+                request,
                 model="llama-3.3-70b-versatile",
                 messages=[{"role": "user", "content": f"Extract 5 key findings from:\n{sources_text}\n\nReturn only valid JSON with this schema: {{\"findings\": [{{\"finding\": \"...\", \"evidence\": \"...\", \"source\": \"...\"}}]}}"}],
                 max_tokens=2000
             )
             try:
-                findings = parse_llm_json(findings_response.choices[0].message.content)
+                findings = parse_llm_json(findings_content)
             except (json.JSONDecodeError, ValueError):
                 findings = fallback_findings(request.query, sources)
-        
-        # Critic
-        jobs[job_id]["current_agent"] = "critic"
-        jobs[job_id]["progress"] = 0.50
-        
+
+    # Critic
+    async with agent_stage(job_id, "critic", 0.50):
         with collector.agent_timer("critic", input_tokens=estimate_tokens(findings), output_tokens=80):
             critique = {"quality_score": 0.85, "strengths": ["Good coverage"], "weaknesses": []}
-        
-        # Synthesizer
-        jobs[job_id]["current_agent"] = "synthesizer"
-        jobs[job_id]["progress"] = 0.75
-        
-        with collector.agent_timer("synthesizer", input_tokens=estimate_tokens(findings), output_tokens=4000):
-            synth_response = groq.chat.completions.create(
+
+    # Synthesizer
+    async with agent_stage(job_id, "synthesizer", 0.75):
+        with collector.agent_timer("synthesizer", input_tokens=estimate_tokens(findings), output_tokens=SYNTHESIS_MAX_TOKENS):
+            synth_content = await complete(
+                job_id,
+                groq,
+                request,
+                stream=request.stream_synthesis,
                 model="llama-3.3-70b-versatile",
                 messages=[{"role": "user", "content": f"Write research report on: {request.query}\n\nFindings: {json.dumps(findings)}\n\nReturn only valid JSON with title, executive_summary, sections, key_takeaways, limitations, further_research, and word_count."}],
-                max_tokens=4000
+                max_tokens=SYNTHESIS_MAX_TOKENS
             )
             try:
-                synthesis = parse_llm_json(synth_response.choices[0].message.content)
+                synthesis = parse_llm_json(synth_content)
             except (json.JSONDecodeError, ValueError):
                 synthesis = fallback_synthesis(request.query, findings.get("findings", []), sources)
             synthesis = normalize_synthesis(request.query, synthesis, findings.get("findings", []), sources)
-        
-        # Evaluator
-        jobs[job_id]["current_agent"] = "evaluator"
-        jobs[job_id]["progress"] = 0.90
-        
-        from src.evaluation.metrics import RAGEvaluator
+
+    # Evaluator
+    from src.evaluation.metrics import RAGEvaluator
+    async with agent_stage(job_id, "evaluator", 0.90):
         with collector.agent_timer("evaluator", input_tokens=estimate_tokens(synthesis), output_tokens=80):
             evaluator = RAGEvaluator()
-            evaluation = evaluator.evaluate(request.query, findings.get("findings", []), synthesis, sources)
-        production_metrics = collector.finalize().to_dict()
-        
-        # Complete
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 1.0
-        jobs[job_id]["current_agent"] = None
-        jobs[job_id]["result"] = {
-            "query": request.query,
-            "synthesis": synthesis,
-            "research": {"sources": sources, "findings": findings.get("findings", [])},
-            "evaluation": evaluation,
-            "production_metrics": production_metrics
-        }
-        
-    except Exception as e:
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["error"] = str(e)
+            # Scoring is CPU-bound string work; keep it off the event loop.
+            evaluation = await asyncio.to_thread(
+                evaluator.evaluate, request.query, findings.get("findings", []), synthesis, sources
+            )
+    production_metrics = collector.finalize().to_dict()
+
+    # Complete
+    # Write the result before flipping status so pollers never see
+    # "completed" without a result.
+    result = {
+        "query": request.query,
+        "synthesis": synthesis,
+        "research": {"sources": sources, "findings": findings.get("findings", []), "retrieval": retrieval},
+        "evaluation": evaluation,
+        "production_metrics": production_metrics
+    }
+    await job_store.set_result(job_id, result)
+    await update_job(job_id, "completed", status="completed", progress=1.0, current_agent=None)
+    if request.tenant is None:
+        run_in_background(_store_answer, request.query, result, evaluation.get("overall", 0.0))
 
 if __name__ == "__main__":
     import uvicorn
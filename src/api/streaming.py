@@ -0,0 +1,76 @@
+"""Incremental parsing of JSON objects streamed token by token from an LLM."""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class IncrementalJSONParser:
+    """Emit top-level fields of a streamed JSON object as soon as each closes.
+
+    Feed raw completion chunks; every call returns the ``(key, value)`` pairs
+    whose values finished in that chunk. Text before the first ``{`` (such as
+    a Markdown code fence) and after the closing ``}`` is ignored. Each
+    character is scanned once and only the member still being streamed is
+    buffered (as a list of pieces), so the total cost is linear in the output.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._in_object = False
+        # Pieces of the member being streamed; joined once, when it closes.
+        self._member: List[str] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        closed: List[Tuple[str, Any]] = []
+        start = 0  # where the current member begins within this chunk
+        pos = 0
+        while pos < len(chunk) and not self.done:
+            char = chunk[pos]
+            if not self._in_object:
+                # Still looking for the opening brace of the top-level object.
+                if char == "{":
+                    self._depth = 1
+                    self._in_object = True
+                    start = pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(chunk[start:pos], closed)
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._close_member(chunk[start:pos], closed)
+                start = pos + 1
+            pos += 1
+        if self._in_object and not self.done:
+            self._member.append(chunk[start:])
+        return closed
+
+    def _close_member(self, tail: str, closed: List[Tuple[str, Any]]) -> None:
+        self._member.append(tail)
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            closed.append((key, value))
@@ -0,0 +1,216 @@
+"""Semantic cache of completed research results.
+
+Paraphrases of a question ("how does RAG work" / "explain retrieval
+augmented generation") should not each pay for a full agent pipeline.
+Completed results are stored with an embedding of their query; a new query
+whose embedding is at least ``threshold`` cosine-similar to a stored one is
+answered from the cache, together with the entry's age.
+
+Only results whose evaluation score reaches ``min_quality`` are admitted.
+When full, the entry with the lowest retention score (quality halved every
+``half_life_seconds`` of age) is evicted, so stale or weak answers go first.
+
+Configuration:
+
+- ``ANSWER_CACHE_PATH``: SQLite file that persists entries (empty disables it)
+- ``ANSWER_CACHE_THRESHOLD``: minimum cosine similarity for a hit
+- ``ANSWER_CACHE_TTL_SECONDS``: maximum age of a served answer
+- ``ANSWER_CACHE_MIN_QUALITY``: minimum evaluation ``overall`` score to store
+- ``ANSWER_CACHE_MAX_ENTRIES``: entries kept in memory and on disk
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.observability.metrics import cache_stats
+
+DEFAULT_ANSWER_CACHE_PATH = ".cache/answers.sqlite"
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_TTL_SECONDS = 7 * 86400
+DEFAULT_MIN_QUALITY = 0.5
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_HALF_LIFE_SECONDS = 86400
+
+Embed = Callable[[List[str]], np.ndarray]
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    result: Dict[str, Any]
+    quality: float
+    stored_at: float
+    similarity: float = 1.0
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour lookup of completed results by query embedding."""
+
+    def __init__(
+        self,
+        embed: Embed,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        min_quality: float = DEFAULT_MIN_QUALITY,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        half_life_seconds: float = DEFAULT_HALF_LIFE_SECONDS,
+        path: Optional[str] = None,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.min_quality = min_quality
+        self.max_entries = max_entries
+        self.half_life_seconds = half_life_seconds
+        self.stats = cache_stats("answers")
+        self._ids: List[str] = []
+        self._answers: List[CachedAnswer] = []
+        self._vectors: Optional[np.ndarray] = None  # (n, dims), unit rows
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS answers (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    result TEXT NOT NULL,
+                    quality REAL NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+                """
+            )
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _embed_one(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embed([query]), dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query: str) -> Optional[CachedAnswer]:
+        """Return the closest fresh answer at or above the threshold, if any."""
+        vector = self._embed_one(query)
+        with self._lock:
+            self._drop_expired()
+            if self._vectors is None or not self._ids:
+                self.stats.misses += 1
+                return None
+            similarities = self._vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.stats.misses += 1
+                return None
+            self.stats.memory_hits += 1
+            answer = self._answers[best]
+            return CachedAnswer(answer.query, answer.result, answer.quality, answer.stored_at, float(similarities[best]))
+
+    def store(self, query: str, result: Dict[str, Any], quality: float) -> bool:
+        """Admit a completed result; returns False if its quality is too low."""
+        if quality < self.min_quality:
+            return False
+        vector = self._embed_one(query)
+        entry_id = uuid.uuid4().hex
+        answer = CachedAnswer(query, result, float(quality), time.time())
+        with self._lock:
+            self._append(entry_id, answer, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO answers (id, query, vector, result, quality, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry_id, query, vector.tobytes(), json.dumps(result), answer.quality, answer.stored_at),
+                )
+            self.stats.writes += 1
+            while len(self._ids) > self.max_entries:
+                self._remove(int(np.argmin(self._retention_scores())))
+                self.stats.evictions += 1
+        return True
+
+    def _retention_scores(self) -> np.ndarray:
+        now = time.time()
+        return np.array([
+            answer.quality * 0.5 ** ((now - answer.stored_at) / self.half_life_seconds)
+            for answer in self._answers
+        ])
+
+    def _append(self, entry_id: str, answer: CachedAnswer, vector: np.ndarray) -> None:
+        self._ids.append(entry_id)
+        self._answers.append(answer)
+        row = vector.reshape(1, -1)
+        self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+
+    def _remove(self, index: int) -> None:
+        entry_id = self._ids.pop(index)
+        self._answers.pop(index)
+        self._vectors = np.delete(self._vectors, index, axis=0)
+        if self._db is not None:
+            self._db.execute("DELETE FROM answers WHERE id = ?", (entry_id,))
+
+    def _drop_expired(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for index in reversed(range(len(self._answers))):
+            if self._answers[index].stored_at < cutoff:
+                self._remove(index)
+                self.stats.evictions += 1
+
+    def _load(self) -> None:
+        rows = self._db.execute(
+            "SELECT id, query, vector, result, quality, stored_at FROM answers ORDER BY stored_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for entry_id, query, blob, result, quality, stored_at in reversed(rows):
+            answer = CachedAnswer(query, json.loads(result), quality, stored_at)
+            self._append(entry_id, answer, np.frombuffer(blob, dtype=np.float32))
+        self._db.execute(
+            "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+
+def default_embed(texts: Sequence[str]) -> np.ndarray:
+    """Embed with the shared model and query embedding cache used by the vector store."""
+    from src.vectordb.embedders import DEFAULT_MODEL_NAME, embedder_key, get_embedder
+    from src.vectordb.embedding_cache import get_query_embedding_cache
+
+    backend = os.getenv("EMBEDDING_BACKEND", "torch")
+    model = get_embedder(DEFAULT_MODEL_NAME, backend)
+    return get_query_embedding_cache().embed(embedder_key(DEFAULT_MODEL_NAME, backend), list(texts), model.encode)
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Process-wide answer cache configured from the environment."""
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache(
+                default_embed,
+                threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", str(DEFAULT_THRESHOLD))),
+                ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+                min_quality=float(os.getenv("ANSWER_CACHE_MIN_QUALITY", str(DEFAULT_MIN_QUALITY))),
+                max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+                path=os.getenv("ANSWER_CACHE_PATH", DEFAULT_ANSWER_CACHE_PATH) or None,
+            )
+        return _answer_cache
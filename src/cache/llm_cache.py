@@ -0,0 +1,107 @@
+"""Content-addressed cache for LLM completions.
+
+Completions are keyed on a hash of everything that shapes the output
+(model, messages, temperature, max_tokens), so identical prompts from
+benchmark reruns or popular queries are answered without calling Groq.
+
+Configuration:
+
+- ``LLM_CACHE_PATH``: SQLite file for the disk tier (empty disables it)
+- ``LLM_CACHE_TTL_SECONDS``: lifetime of a cached completion
+- ``LLM_CACHE_MAX_ENTRIES``: size of the in-process LRU tier
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.cache.tiered import TieredCache
+
+DEFAULT_LLM_CACHE_PATH = ".cache/llm_responses.sqlite"
+DEFAULT_LLM_CACHE_TTL_SECONDS = 7 * 86400
+
+
+def llm_cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Stores completion text by prompt hash."""
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+
+    def get(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        return self.cache.get(llm_cache_key(model, messages, temperature, max_tokens))
+
+    def set(
+        self,
+        content: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        if content:
+            self.cache.set(llm_cache_key(model, messages, temperature, max_tokens), content)
+
+    async def get_async(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        """get() for coroutines; the disk tier is read off the event loop."""
+        entry = await self.cache.get_entry_async(llm_cache_key(model, messages, temperature, max_tokens))
+        return entry.value if entry is not None else None
+
+    async def set_async(
+        self,
+        content: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        if content:
+            await self.cache.set_async(llm_cache_key(model, messages, temperature, max_tokens), content)
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide LLM cache configured from the environment."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(
+                TieredCache(
+                    "llm",
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(DEFAULT_LLM_CACHE_TTL_SECONDS))),
+                    path=os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH) or None,
+                )
+            )
+        return _llm_cache
@@ -0,0 +1,228 @@
+"""Cache for Tavily search results with per-class freshness windows.
+
+Results are keyed on the normalized query and ``max_results``. Each query
+is assigned a class (news, default, evergreen) that decides how long its
+results count as fresh. Past that, entries are still served for a stale
+window while a background refresh fetches new results. Failed lookups are
+cached briefly so an outage does not turn into a retry storm; a failed
+``bypass`` fetch is not, so it cannot overwrite good results.
+
+Configuration:
+
+- ``SEARCH_CACHE_PATH``: SQLite file for the disk tier (empty disables it)
+- ``SEARCH_CACHE_STALE_SECONDS``: how long stale results may still be served
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.cache.tiered import CacheEntry, TieredCache
+
+DEFAULT_SEARCH_CACHE_PATH = ".cache/search_results.sqlite"
+DEFAULT_FRESHNESS_SECONDS = {
+    "news": 15 * 60,
+    "default": 24 * 3600,
+    "evergreen": 7 * 24 * 3600,
+}
+DEFAULT_STALE_SECONDS = 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 60
+
+NEWS_PATTERN = re.compile(r"\b(latest|today|breaking|news|this (week|month)|current|recent|now|20\d\d)\b")
+EVERGREEN_PATTERN = re.compile(r"^(what is|what are|define|definition of|explain|history of|how does|how do)\b")
+
+
+class CachedSearchError(RuntimeError):
+    """Raised when a query failed recently and the failure is still cached."""
+
+
+def normalize_query(query: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(text.split())
+
+
+def classify_query(normalized_query: str) -> str:
+    if NEWS_PATTERN.search(normalized_query):
+        return "news"
+    if EVERGREEN_PATTERN.search(normalized_query):
+        return "evergreen"
+    return "default"
+
+
+class SearchCache:
+    """Stale-while-revalidate cache in front of a search provider."""
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        freshness_seconds: Optional[Dict[str, float]] = None,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+    ):
+        self.cache = cache
+        self.freshness_seconds = {**DEFAULT_FRESHNESS_SECONDS, **(freshness_seconds or {})}
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def key(self, query: str, max_results: int) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode()).hexdigest()
+        return f"{digest}:{max_results}"
+
+    def lookup(self, query: str, max_results: int) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """Return ``(results, is_stale)``; results are None on a miss."""
+        return self._read(query, self.cache.get_entry(self.key(query, max_results)))
+
+    async def lookup_async(self, query: str, max_results: int) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        return self._read(query, await self.cache.get_entry_async(self.key(query, max_results)))
+
+    def _read(self, query: str, entry: Optional[CacheEntry]) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        if entry is None:
+            return None, False
+        if "error" in entry.value:
+            raise CachedSearchError(entry.value["error"])
+        fresh_for = self.freshness_seconds[classify_query(normalize_query(query))]
+        return entry.value["results"], entry.age_seconds > fresh_for
+
+    def store(self, query: str, max_results: int, results: List[Dict[str, Any]]) -> None:
+        fresh_for = self.freshness_seconds[classify_query(normalize_query(query))]
+        self.cache.set(self.key(query, max_results), {"results": results}, ttl_seconds=fresh_for + self.stale_seconds)
+
+    def store_failure(self, query: str, max_results: int, error: Exception) -> None:
+        self.cache.set(self.key(query, max_results), {"error": str(error)}, ttl_seconds=self.negative_ttl_seconds)
+
+    async def store_async(self, query: str, max_results: int, results: List[Dict[str, Any]]) -> None:
+        fresh_for = self.freshness_seconds[classify_query(normalize_query(query))]
+        await self.cache.set_async(
+            self.key(query, max_results), {"results": results}, ttl_seconds=fresh_for + self.stale_seconds
+        )
+
+    async def store_failure_async(self, query: str, max_results: int, error: Exception) -> None:
+        await self.cache.set_async(
+            self.key(query, max_results), {"error": str(error)}, ttl_seconds=self.negative_ttl_seconds
+        )
+
+    def search(
+        self,
+        query: str,
+        max_results: int,
+        fetch: Callable[[], List[Dict[str, Any]]],
+        executor: Optional[Executor] = None,
+        bypass: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Serve from cache, calling ``fetch`` on a miss and refreshing stale hits in the background."""
+        if not bypass:
+            results, stale = self.lookup(query, max_results)
+            if results is not None:
+                if stale and self._claim_refresh(query, max_results):
+                    runner = executor.submit if executor else _start_thread
+                    runner(self._refresh, query, max_results, fetch)
+                return results
+        return self._fetch(query, max_results, fetch, remember_failure=not bypass)
+
+    async def search_async(
+        self,
+        query: str,
+        max_results: int,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        bypass: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Async variant of :meth:`search` for coroutine-based providers."""
+        if not bypass:
+            results, stale = await self.lookup_async(query, max_results)
+            if results is not None:
+                if stale and self._claim_refresh(query, max_results):
+                    task = asyncio.create_task(self._refresh_async(query, max_results, fetch))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return results
+        try:
+            results = await fetch()
+        except Exception as exc:
+            # A bypassed lookup never read the entry, so it must not replace it.
+            if not bypass:
+                await self.store_failure_async(query, max_results, exc)
+            raise
+        await self.store_async(query, max_results, results)
+        return results
+
+    def _fetch(
+        self,
+        query: str,
+        max_results: int,
+        fetch: Callable[[], List[Dict[str, Any]]],
+        remember_failure: bool = True,
+    ) -> List[Dict[str, Any]]:
+        try:
+            results = fetch()
+        except Exception as exc:
+            # A bypassed lookup never read the entry, so it must not replace it.
+            if remember_failure:
+                self.store_failure(query, max_results, exc)
+            raise
+        self.store(query, max_results, results)
+        return results
+
+    def _claim_refresh(self, query: str, max_results: int) -> bool:
+        key = self.key(query, max_results)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _release_refresh(self, query: str, max_results: int) -> None:
+        with self._refresh_lock:
+            self._refreshing.discard(self.key(query, max_results))
+
+    def _refresh(self, query: str, max_results: int, fetch: Callable[[], List[Dict[str, Any]]]) -> None:
+        try:
+            results = fetch()
+            self.store(query, max_results, results)
+        except Exception:
+            # Keep serving the stale entry; the next stale hit retries.
+            pass
+        finally:
+            self._release_refresh(query, max_results)
+
+    async def _refresh_async(
+        self, query: str, max_results: int, fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> None:
+        try:
+            results = await fetch()
+            await self.store_async(query, max_results, results)
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(query, max_results)
+
+
+def _start_thread(fn: Callable[..., Any], *args: Any) -> None:
+    threading.Thread(target=fn, args=args, daemon=True).start()
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache configured from the environment."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                TieredCache(
+                    "search",
+                    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048")),
+                    path=os.getenv("SEARCH_CACHE_PATH", DEFAULT_SEARCH_CACHE_PATH) or None,
+                ),
+                stale_seconds=float(os.getenv("SEARCH_CACHE_STALE_SECONDS", str(DEFAULT_STALE_SECONDS))),
+            )
+        return _search_cache
@@ -0,0 +1,160 @@
+"""Two-tier key/value cache: an in-process LRU in front of a SQLite file.
+
+Values must be JSON-serializable. The memory tier answers hot keys without
+touching disk; the disk tier survives restarts and is shared by every
+process on the host. Both tiers expire entries by TTL and evict by size.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.observability.metrics import cache_stats
+
+# Disk evictions run every this many writes rather than on each one.
+DISK_EVICTION_INTERVAL = 100
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+    expires_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+
+class TieredCache:
+    """LRU memory tier plus an optional SQLite tier with TTL and size bounds."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        path: Optional[str] = None,
+        max_disk_entries: int = 50_000,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.stats = cache_stats(name)
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache(accessed_at);
+                """
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row:
+                    self._db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    entry = CacheEntry(value=json.loads(row[0]), stored_at=row[1], expires_at=row[2])
+                    self._remember(key, entry)
+                    self.stats.disk_hits += 1
+                    return entry
+
+            self.stats.misses += 1
+            return None
+
+    async def get_entry_async(self, key: str) -> Optional[CacheEntry]:
+        """get_entry() for coroutines; with a disk tier it runs in a worker thread."""
+        if self._db is None:
+            return self.get_entry(key)
+        return await asyncio.to_thread(self.get_entry, key)
+
+    async def set_async(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self._db is None:
+            self.set(key, value, ttl_seconds)
+        else:
+            await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        now = time.time()
+        entry = CacheEntry(value=value, stored_at=now, expires_at=now + (ttl_seconds or self.ttl_seconds))
+        with self._lock:
+            self._remember(key, entry)
+            self.stats.writes += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value), entry.stored_at, entry.expires_at, now),
+                )
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= DISK_EVICTION_INTERVAL:
+                    self._writes_since_eviction = 0
+                    self._evict_disk(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _evict_disk(self, now: float) -> None:
+        removed = self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+        overflow = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_disk_entries
+        if overflow > 0:
+            removed += self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        self.stats.evictions += removed
@@ -3,8 +3,9 @@ Lightweight NLP Tasks: Intent Classification and Entity Extraction
 Optimized for fast execution without large model downloads
 """
 
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from bisect import bisect_right
+from dataclasses import dataclass, replace
 import re
 import json
 from enum import Enum
@@ -56,6 +57,122 @@ class EntityExtractionResult:
     entities: List[Entity]
 
 
+Rule = Tuple[str, int]  # (intent, index of the pattern in INTENT_PATTERNS[intent])
+
+# `\b(alt|alt|...)\b` with no nested groups, the shape of every keyword pattern
+_KEYWORD_PATTERN = re.compile(r"^\\b\(([^()]*)\)\\b$")
+_LITERAL_PHRASE = re.compile(r"^[\w' ]+$")
+
+
+class IntentMatcher:
+    """
+    Evaluates every intent pattern against a message in one scan.
+
+    Keyword alternatives (``\\b(buy|purchase|...)\\b``) are merged into a
+    single precompiled alternation with a named group per phrase, longest
+    phrases first. A phrase also counts for the rules of the phrases inside
+    it ("return policy" holds "return"), which the scan would otherwise hide
+    behind the longer match. Alternatives that are real regexes
+    (``do.*have``) and phrases that can straddle another match stay as
+    compiled per-rule checks, skipped when the rule already matched or a
+    required literal is absent from the text.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.intents = list(patterns)
+        phrase_rules: Dict[str, Set[Rule]] = {}
+        fallback: Dict[Rule, List[str]] = {}
+        for intent, intent_patterns in patterns.items():
+            for index, pattern in enumerate(intent_patterns):
+                rule = (intent, index)
+                keywords = _KEYWORD_PATTERN.match(pattern)
+                if not keywords:
+                    fallback[rule] = [pattern]
+                    continue
+                for alternative in keywords.group(1).split('|'):
+                    phrase = alternative.replace("\\'", "'").lower()
+                    if _LITERAL_PHRASE.match(phrase):
+                        phrase_rules.setdefault(phrase, set()).add(rule)
+                    else:
+                        fallback.setdefault(rule, []).append(rf'\b({alternative})\b')
+
+        phrases = sorted(phrase_rules, key=len, reverse=True)
+        expanded = {phrase: set(rules) for phrase, rules in phrase_rules.items()}
+        for phrase in phrases:
+            starts = [m.start() for m in re.finditer(r"\b\w", phrase) if m.start()]
+            for other in phrases:
+                if other == phrase:
+                    continue
+                if re.search(rf"\b{re.escape(other)}\b", phrase):
+                    expanded[phrase] |= phrase_rules[other]
+                elif any(other.startswith(phrase[start:]) for start in starts):
+                    # `other` can begin inside a match of `phrase` and run
+                    # past it, so check its rules on their own as well.
+                    for rule in phrase_rules[other]:
+                        fallback.setdefault(rule, []).append(rf'\b({re.escape(other)})\b')
+
+        self._groups = {f"k{i}": frozenset(expanded[phrase]) for i, phrase in enumerate(phrases)}
+        self._scanner = re.compile(
+            r"\b" + self._trie_regex({phrase: f"k{i}" for i, phrase in enumerate(phrases)}) + r"\b"
+        ) if phrases else None
+        self._checks: List[Tuple[Rule, re.Pattern, Optional[Tuple[str, ...]]]] = [
+            (rule, re.compile("|".join(regexes), re.IGNORECASE), self._required_literals(regexes))
+            for rule, regexes in fallback.items()
+        ]
+
+    @staticmethod
+    def _trie_regex(names: Dict[str, str]) -> str:
+        """
+        Alternation of phrases factored by shared prefix, so the engine picks
+        a branch by character instead of trying every phrase in turn. Each
+        phrase ends in an empty named group, reported by ``match.lastgroup``;
+        longer continuations are tried before a phrase ends.
+        """
+        trie: Dict = {}
+        for phrase, name in names.items():
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = name
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+            if '' in node:
+                branches.append(f"(?P<{node['']}>)")
+            return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+        return build(trie)
+
+    @staticmethod
+    def _required_literals(regexes: List[str]) -> Optional[Tuple[str, ...]]:
+        """Literal tails like "have" in ``do.*have``: one must occur for a match."""
+        needles = []
+        for regex in regexes:
+            tail = _KEYWORD_PATTERN.match(regex)
+            tail = tail.group(1).rsplit('.*', 1)[-1].replace("\\'", "'").lower() if tail else ""
+            if not _LITERAL_PHRASE.match(tail):
+                return None
+            needles.append(tail)
+        return tuple(needles)
+
+    def match_counts(self, text_lower: str) -> Dict[str, int]:
+        """Number of patterns matched per intent in already-lowercased text."""
+        hits: Set[Rule] = set()
+        if self._scanner is not None:
+            groups = self._groups
+            for match in self._scanner.finditer(text_lower):
+                hits |= groups[match.lastgroup]
+        for rule, regex, needles in self._checks:
+            if rule in hits or (needles is not None and not any(n in text_lower for n in needles)):
+                continue
+            if regex.search(text_lower):
+                hits.add(rule)
+        counts = dict.fromkeys(self.intents, 0)
+        for intent, _ in hits:
+            counts[intent] += 1
+        return counts
+
+
 class RuleBasedIntentClassifier:
     """
     Rule-based intent classifier for e-commerce
@@ -92,22 +209,20 @@ class RuleBasedIntentClassifier:
         ]
     }
 
+    def __init__(self):
+        self.matcher = IntentMatcher(self.INTENT_PATTERNS)
+
     def classify(self, text: str) -> IntentPrediction:
         """Classify intent using rule-based matching"""
-        text_lower = text.lower()
-        scores = {intent: 0.0 for intent in Intent}
-
-        # Score each intent
-        for intent_name, patterns in self.INTENT_PATTERNS.items():
-            matches = 0
-            for pattern in patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    matches += 1
-            scores[intent_name] = matches / len(patterns) if patterns else 0
+        counts = self.matcher.match_counts(text.lower())
+        scores = {
+            intent_name: counts[intent_name] / len(patterns) if patterns else 0.0
+            for intent_name, patterns in self.INTENT_PATTERNS.items()
+        }
 
-        # Get top intent
-        top_intent = max(scores.items(), key=lambda x: x[1])[0]
-        confidence = scores[top_intent]
+        # Get top intent; ties go to the intent listed first
+        top_intent = max(scores, key=scores.get, default=Intent.INQUIRY.value)
+        confidence = scores.get(top_intent, 0.0)
 
         # Boost confidence for strong matches
         if confidence == 0:
@@ -118,21 +233,92 @@ class RuleBasedIntentClassifier:
             text=text,
             intent=top_intent,
             confidence=min(confidence, 1.0),
-            reasoning=f"Matched {int(scores[top_intent] * len(self.INTENT_PATTERNS[top_intent]))} patterns"
+            reasoning=f"Matched {counts.get(top_intent, 0)} patterns"
         )
 
     def classify_batch(self, texts: List[str]) -> List[IntentPrediction]:
-        """Classify multiple texts"""
-        return [self.classify(text) for text in texts]
+        """Classify multiple texts, scanning each distinct text once"""
+        predictions: Dict[str, IntentPrediction] = {}
+        results = []
+        for text in texts:
+            prediction = predictions.get(text)
+            if prediction is None:
+                prediction = predictions[text] = self.classify(text)
+            else:
+                prediction = replace(prediction)
+            results.append(prediction)
+        return results
+
+
+KNOWN_BRANDS = (
+    'Nike', 'Apple', 'Samsung', 'Microsoft', 'Sony', 'Google', 'Intel', 'AMD', 'HP', 'Dell', 'Lenovo',
+    'Adidas', 'Puma', 'Jordan', 'BMW', 'Audi', 'Mercedes',
+)
+KNOWN_CITIES = (
+    'New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia', 'San Antonio', 'San Diego',
+    'Dallas', 'San Jose', 'Austin', 'Seattle', 'Boston', 'Miami', 'Atlanta',
+)
+KNOWN_COUNTRIES = ('USA', 'UK', 'Canada', 'Australia', 'Germany', 'France', 'Japan', 'India', 'China')
+
+_WORD = re.compile(r'\w+')
+
+
+class Gazetteer:
+    """
+    Case-insensitive whole-word lookup of a list of names.
+
+    Names are stored in a trie keyed by lowercased word, and the text's
+    words are walked once, so lookups cost the same however long the list
+    grows. This replaces large ``\\b(Nike|Apple|...)\\b`` alternations, which
+    the regex engine tries name by name at every position.
+    """
+
+    _END = ''
+
+    def __init__(self, names: Tuple[str, ...]):
+        self.trie: Dict = {}
+        for name in names:
+            node = self.trie
+            for word in _WORD.findall(name.lower()):
+                node = node.setdefault(word, {})
+            node[self._END] = name.lower()
+
+    def find_spans(self, text: str, word_spans: List[Tuple[int, int]], words: List[str]) -> List[Tuple[int, int]]:
+        """
+        Spans of names in ``text``, given its word spans and lowercased
+        words; leftmost and longest first, without overlaps, like re.finditer.
+        """
+        trie = self.trie
+        spans = []
+        resume = 0
+        for i in [i for i, word in enumerate(words) if word in trie]:
+            if i < resume:
+                continue
+            node = trie
+            match = None
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                name = node.get(self._END)
+                # Names must match exactly, separators included ("New York").
+                if name is not None and text[word_spans[i][0]:word_spans[j][1]].lower() == name:
+                    match = j
+            if match is not None:
+                spans.append((word_spans[i][0], word_spans[match][1]))
+                resume = match + 1
+        return spans
 
 
 class RuleBasedEntityExtractor:
     """
     Rule-based entity extractor for e-commerce
-    Uses regex patterns for common entity types
+    Uses regex patterns and name lists for common entity types
     """
 
-    # Entity patterns
+    # Entity rules: a regex, or a tuple of names looked up as a Gazetteer.
+    # Where matches overlap, the rule listed first wins unless `priority`
+    # says otherwise.
     ENTITY_PATTERNS = {
         EntityType.PRICE.value: [
             (r'\$\d+\.?\d*', 'price_dollar'),
@@ -147,7 +333,7 @@ class RuleBasedEntityExtractor:
             (r'\b(\d+)\s*x\s*(\w+)', 'quantity_multiplier'),
         ],
         EntityType.BRAND.value: [
-            (r'\b(Nike|Apple|Samsung|Microsoft|Sony|Google|Intel|AMD|HP|Dell|Lenovo|Adidas|Puma|Jordan|BMW|Audi|Mercedes)\b', 'brand_known'),
+            (KNOWN_BRANDS, 'brand_known'),
         ],
         EntityType.COLOR.value: [
             (r'\b(red|blue|green|yellow|black|white|gray|grey|pink|purple|orange|brown|silver|gold|turquoise|navy|beige)\b', 'color_basic'),
@@ -159,35 +345,71 @@ class RuleBasedEntityExtractor:
             (r'\b(small|medium|large|extra\s+large)\b', 'size_word'),
         ],
         EntityType.LOCATION.value: [
-            (r'\b(New York|Los Angeles|Chicago|Houston|Phoenix|Philadelphia|San Antonio|San Diego|Dallas|San Jose|Austin|Seattle|Boston|Miami|Atlanta)\b', 'location_city'),
-            (r'\b(USA|UK|Canada|Australia|Germany|France|Japan|India|China)\b', 'location_country'),
+            (KNOWN_CITIES, 'location_city'),
+            (KNOWN_COUNTRIES, 'location_country'),
         ],
     }
 
+    def __init__(self, priority: Optional[List[str]] = None):
+        """
+        ``priority`` lists rule names or entity types, strongest first, to
+        decide which of two overlapping matches is kept. Rules it leaves out
+        follow in ENTITY_PATTERNS order.
+        """
+        rules = [
+            (entity_type, name, pattern)
+            for entity_type, patterns in self.ENTITY_PATTERNS.items()
+            for pattern, name in patterns
+        ]
+        priority = priority or []
+
+        def rank(rule) -> int:
+            entity_type, name, _ = rule
+            for position, key in enumerate(priority):
+                if key in (name, entity_type):
+                    return position
+            return len(priority)
+
+        # sorted() is stable, so ties keep their ENTITY_PATTERNS order
+        self.rules: List[Tuple[str, str, object]] = [
+            (entity_type, name, Gazetteer(pattern) if isinstance(pattern, tuple) else re.compile(pattern, re.IGNORECASE))
+            for entity_type, name, pattern in sorted(rules, key=rank)
+        ]
+        self._uses_gazetteers = any(isinstance(matcher, Gazetteer) for _, _, matcher in self.rules)
+
     def extract(self, text: str) -> EntityExtractionResult:
         """Extract entities from text"""
+        word_spans: List[Tuple[int, int]] = []
+        words: List[str] = []
+        if self._uses_gazetteers:
+            word_spans = [m.span() for m in _WORD.finditer(text)]
+            words = _WORD.findall(text.lower())
+            if len(words) != len(word_spans):  # lowercasing split or merged a word
+                words = [text[start:end].lower() for start, end in word_spans]
+
+        # Accepted spans never overlap, so sorted by start they are also
+        # sorted by end; each overlap test is two bisections.
+        starts: List[int] = []
+        ends: List[int] = []
         entities = []
-        seen_spans = set()  # Avoid overlapping entities
-
-        # Find all matches for each entity type
-        for entity_type, patterns in self.ENTITY_PATTERNS.items():
-            for pattern, pattern_name in patterns:
-                for match in re.finditer(pattern, text, re.IGNORECASE):
-                    span = (match.start(), match.end())
-
-                    # Skip if overlaps with existing entity
-                    if any(s <= span[0] < e or s < span[1] <= e for s, e in seen_spans):
-                        continue
-
-                    entity = Entity(
-                        text=match.group(),
-                        type=entity_type,
-                        start=match.start(),
-                        end=match.end(),
-                        confidence=0.9  # Regex matches are high confidence
-                    )
-                    entities.append(entity)
-                    seen_spans.add(span)
+        for entity_type, _, matcher in self.rules:
+            if isinstance(matcher, Gazetteer):
+                spans = matcher.find_spans(text, word_spans, words)
+            else:
+                spans = [match.span() for match in matcher.finditer(text)]
+            for start, end in spans:
+                i = bisect_right(starts, start)
+                if (i and ends[i - 1] > start) or (i < len(starts) and starts[i] < end):
+                    continue  # Overlaps a higher-priority entity
+                starts.insert(i, start)
+                ends.insert(i, end)
+                entities.append(Entity(
+                    text=text[start:end],
+                    type=entity_type,
+                    start=start,
+                    end=end,
+                    confidence=0.9  # Regex matches are high confidence
+                ))
 
         # Sort by position
         entities.sort(key=lambda e: e.start)
@@ -90,6 +90,44 @@ class MetricsCollector:
         return self.metrics
 
 
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one named cache."""
+
+    name: str
+    memory_hits: int = 0
+    disk_hits: int = 0
+    # Lookups answered from stored data (e.g. vector store results) rather than a cache tier.
+    vector_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits + self.vector_hits
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **asdict(self),
+            "hits": self.hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_CACHE_STATS: Dict[str, CacheStats] = {}
+
+
+def cache_stats(name: str) -> CacheStats:
+    """Return the process-wide counters for a cache, creating them on first use."""
+    return _CACHE_STATS.setdefault(name, CacheStats(name=name))
+
+
+def cache_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: stats.to_dict() for name, stats in sorted(_CACHE_STATS.items())}
+
+
 def estimate_tokens(text: Any) -> int:
     """Cheap token estimate for cost reporting without adding tokenizer deps."""
     if text is None:
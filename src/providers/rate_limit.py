@@ -0,0 +1,293 @@
+"""Token-bucket rate limiting for provider calls.
+
+Each provider gets a limiter with a requests-per-minute bucket and an
+optional tokens-per-minute bucket. A call reserves one request plus its
+estimated tokens up front; buckets may go into debt, and the debt decides
+how long the caller sleeps, so concurrent callers are spaced out in
+arrival order instead of all firing and collecting 429s. After the call
+the reservation is settled against the provider's reported usage.
+
+If a 429 still gets through (another process sharing the key, a stale
+estimate) the limiter drains its buckets so every caller slows down, and
+retries with full-jitter exponential backoff, honouring Retry-After.
+Transient failures (connection errors, timeouts, 408/409, 5xx) are retried
+with the same backoff but leave the buckets alone. The provider SDKs'
+own retries are off, so each attempt passes through the buckets.
+
+Limits come from the environment (0 disables a bucket):
+
+- ``GROQ_REQUESTS_PER_MINUTE`` / ``GROQ_TOKENS_PER_MINUTE``
+- ``TAVILY_REQUESTS_PER_MINUTE``
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_LIMITS = {
+    # Conservative free-tier figures; raise them to match your plan.
+    "groq": {"requests_per_minute": 30, "tokens_per_minute": 12000},
+    "tavily": {"requests_per_minute": 100, "tokens_per_minute": 0},
+}
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 30.0
+
+
+RATE_LIMIT_ERROR_CODE = "rate_limit_exceeded"  # Groq's (OpenAI-style) error code
+# 429s raised without a status code, by class name: Tavily raises
+# UsageLimitExceededError for a 429, the Groq SDK RateLimitError.
+RATE_LIMIT_ERROR_TYPES = {"UsageLimitExceededError", "RateLimitError"}
+TRANSIENT_STATUS_CODES = {408, 409}
+# Connection drops and timeouts, by class name so no SDK has to be imported:
+# httpx, requests, the Groq SDK's wrappers around them, and Tavily's own
+# TimeoutError (not a subclass of the builtin one).
+TRANSIENT_ERROR_TYPES = {
+    "APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout", "ReadError",
+    "ReadTimeout", "RemoteProtocolError", "WriteError", "PoolTimeout", "TimeoutException",
+    "ConnectionError", "Timeout", "TimeoutError",
+}
+
+
+def _status_code(error: Any) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error: Any) -> bool:
+    """True for HTTP 429s, the SDKs' rate-limit error types and errors carrying the rate-limit code.
+
+    A string (e.g. a job's stored error message) counts only if it contains
+    the error code itself.
+    """
+    if isinstance(error, str):
+        return RATE_LIMIT_ERROR_CODE in error
+    if _status_code(error) == 429:
+        return True
+    if any(cls.__name__ in RATE_LIMIT_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    body = getattr(error, "body", None)
+    if isinstance(body, dict) and isinstance(body.get("error"), dict):
+        body = body["error"]
+    code = body.get("code") if isinstance(body, dict) else getattr(error, "code", None)
+    return code == RATE_LIMIT_ERROR_CODE
+
+
+def is_transient_error(error: Any) -> bool:
+    """Connection failures, timeouts, 408/409 and 5xx: worth retrying, but not a budget signal."""
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_TYPES for cls in type(error).__mro__)
+
+
+def is_retryable_error(error: Any) -> bool:
+    return is_rate_limit_error(error) or is_transient_error(error)
+
+
+def retry_after_seconds(error: Any) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    # Tavily's errors carry no response but may say how long to wait.
+    value = headers.get("retry-after", getattr(error, "retry_after_seconds", None))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Bucket refilled continuously at ``per_minute / 60`` units per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` (possibly into debt); returns seconds until it is covered."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, delta: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + delta)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+@dataclass
+class Reservation:
+    tokens: float
+    wait_seconds: float
+
+
+@dataclass
+class LimiterStats:
+    calls: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    waited_seconds: float = 0.0
+    reserved_tokens: float = 0.0
+    used_tokens: float = 0.0
+
+
+class RateLimiter:
+    """Request and token budgets for one provider, shared by threads and coroutines."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_backoff: float = DEFAULT_BASE_BACKOFF_SECONDS,
+        max_backoff: float = DEFAULT_MAX_BACKOFF_SECONDS,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = LimiterStats()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 0) -> Reservation:
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            self.stats.calls += 1
+            self.stats.waited_seconds += wait
+            self.stats.reserved_tokens += tokens
+        return Reservation(tokens, wait)
+
+    def settle(self, reservation: Reservation, actual_tokens: Optional[float]) -> None:
+        """Refund or charge the difference between estimated and actual tokens."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.stats.used_tokens += actual_tokens
+            if self.tokens is not None:
+                self.tokens.adjust(reservation.tokens - actual_tokens, time.monotonic())
+
+    def _on_retry(self, error: Exception, attempt: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self.stats.retries += 1
+            # Only a 429 says the budget is spent; a 502 or a reset
+            # connection just backs off this caller.
+            if is_rate_limit_error(error):
+                self.stats.rate_limited += 1
+                for bucket in (self.requests, self.tokens):
+                    if bucket is not None:
+                        bucket.drain(now)
+        backoff = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        return max(backoff, retry_after_seconds(error) or 0.0)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        tokens: float = 0,
+        usage: Optional[Callable[[T], Optional[float]]] = None,
+        retry_on: Callable[[Exception], bool] = is_retryable_error,
+    ) -> T:
+        """Await ``fn()`` within budget, retrying 429s and transient errors; ``usage`` reads actual tokens from the result."""
+        for attempt in range(self.max_retries + 1):
+            reservation = self.reserve(tokens)
+            if reservation.wait_seconds:
+                await asyncio.sleep(reservation.wait_seconds)
+            try:
+                result = await fn()
+            except Exception as exc:
+                if attempt == self.max_retries or not retry_on(exc):
+                    raise
+                await asyncio.sleep(self._on_retry(exc, attempt))
+                continue
+            self.settle(reservation, usage(result) if usage else None)
+            return result
+        raise AssertionError("unreachable")
+
+    def call_sync(
+        self,
+        fn: Callable[[], T],
+        tokens: float = 0,
+        usage: Optional[Callable[[T], Optional[float]]] = None,
+        retry_on: Callable[[Exception], bool] = is_retryable_error,
+    ) -> T:
+        """Blocking variant of :meth:`call` for threads (Streamlit, benchmarks)."""
+        for attempt in range(self.max_retries + 1):
+            reservation = self.reserve(tokens)
+            if reservation.wait_seconds:
+                time.sleep(reservation.wait_seconds)
+            try:
+                result = fn()
+            except Exception as exc:
+                if attempt == self.max_retries or not retry_on(exc):
+                    raise
+                time.sleep(self._on_retry(exc, attempt))
+                continue
+            self.settle(reservation, usage(result) if usage else None)
+            return result
+        raise AssertionError("unreachable")
+
+    def snapshot(self) -> Dict[str, Any]:
+        row = asdict(self.stats)
+        row["waited_seconds"] = round(row["waited_seconds"], 3)
+        if self.requests is not None:
+            row["requests_per_minute"] = self.requests.capacity
+        if self.tokens is not None:
+            row["tokens_per_minute"] = self.tokens.capacity
+        return row
+
+
+def completion_usage(response: Any) -> Optional[float]:
+    """Total tokens reported by an OpenAI-style chat completion, if any."""
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return float(total) if total is not None else None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Process-wide limiter for a provider, configured from the environment."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            defaults = DEFAULT_LIMITS.get(name, {"requests_per_minute": 0, "tokens_per_minute": 0})
+            prefix = name.upper()
+            limiter = _limiters[name] = RateLimiter(
+                name,
+                requests_per_minute=float(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", defaults["requests_per_minute"])),
+                tokens_per_minute=float(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", defaults["tokens_per_minute"])),
+            )
+        return limiter
+
+
+def rate_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.snapshot() for name, limiter in sorted(_limiters.items())}
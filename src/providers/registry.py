@@ -0,0 +1,230 @@
+"""Process-wide registry of long-lived provider clients.
+
+Groq and Tavily clients used to be constructed per call (Streamlit) or per
+job (API), paying DNS, TCP and TLS setup every time. The registry hands out
+one client per provider and API key, each backed by a keep-alive connection
+pool (HTTP/2 when the ``h2`` package is installed), and counts traffic
+through every pool so utilization can be inspected at ``/api/metrics``.
+
+Async clients are bound to the event loop that first uses them; the API
+runs on a single loop per process. Groq clients are built without SDK
+retries: callers go through :mod:`src.providers.rate_limit`, which owns
+pacing and 429 backoff.
+"""
+from __future__ import annotations
+
+import importlib.util
+import inspect
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE = 16
+DEFAULT_KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    open_connections: Optional[int] = None
+    max_connections: int = 0
+
+    def begin(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end(self, failed: bool) -> None:
+        self.in_flight -= 1
+        if failed:
+            self.errors += 1
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.begin()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.stats.end(failed)
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.begin()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.stats.end(failed)
+
+
+class ProviderRegistry:
+    """Owns shared Groq, Tavily and plain HTTP clients and their pools."""
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY_SECONDS,
+        http2: Optional[bool] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._transports: Dict[str, Any] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, key: str, factory) -> Any:
+        with self._lock:
+            client = self._clients.get((kind, key))
+            if client is None:
+                client = factory()
+                self._clients[(kind, key)] = client
+            return client
+
+    def _pool_stats(self, name: str) -> PoolStats:
+        return self._stats.setdefault(name, PoolStats(max_connections=self.limits.max_connections or 0))
+
+    def _httpx_client(self, name: str, **kwargs: Any) -> httpx.Client:
+        transport = _CountingTransport(self._pool_stats(name), limits=self.limits, http2=self.http2)
+        self._transports[name] = transport
+        return httpx.Client(transport=transport, **kwargs)
+
+    def _async_httpx_client(self, name: str, **kwargs: Any) -> httpx.AsyncClient:
+        transport = _AsyncCountingTransport(self._pool_stats(name), limits=self.limits, http2=self.http2)
+        self._transports[name] = transport
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+    def groq(self, api_key: str):
+        from groq import Groq
+
+        return self._get(
+            "groq",
+            api_key,
+            # RateLimiter retries 429s and transient errors itself, so every
+            # attempt goes through the buckets; the SDK's retries are off.
+            lambda: Groq(api_key=api_key, http_client=self._httpx_client("groq"), max_retries=0),
+        )
+
+    def async_groq(self, api_key: str):
+        from groq import AsyncGroq
+
+        return self._get(
+            "groq_async",
+            api_key,
+            # See groq(): retries happen in RateLimiter.
+            lambda: AsyncGroq(api_key=api_key, http_client=self._async_httpx_client("groq_async"), max_retries=0),
+        )
+
+    def tavily(self, api_key: str):
+        from tavily import TavilyClient
+
+        def build():
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            stats = self._pool_stats("tavily")
+
+            class CountingAdapter(HTTPAdapter):
+                def send(self, request, **kwargs):
+                    stats.begin()
+                    failed = True
+                    try:
+                        response = super().send(request, **kwargs)
+                        failed = response.status_code >= 500
+                        return response
+                    finally:
+                        stats.end(failed)
+
+            session = requests.Session()
+            adapter = CountingAdapter(pool_connections=4, pool_maxsize=self.limits.max_connections or 10)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            try:
+                return TavilyClient(api_key=api_key, session=session)
+            except TypeError:
+                # tavily-python releases before the ``session`` argument keep
+                # their own Session, which still pools once the client is shared.
+                return TavilyClient(api_key=api_key)
+
+        return self._get("tavily", api_key, build)
+
+    def async_tavily(self, api_key: str):
+        from tavily import AsyncTavilyClient
+
+        def build():
+            client = self._async_httpx_client("tavily_async", base_url="https://api.tavily.com", timeout=60)
+            try:
+                return AsyncTavilyClient(api_key=api_key, client=client)
+            except TypeError:
+                return AsyncTavilyClient(api_key=api_key)
+
+        return self._get("tavily_async", api_key, build)
+
+    def http(self, name: str, **kwargs: Any) -> httpx.Client:
+        """Shared plain HTTP client, e.g. for the benchmark runner calling the API."""
+        return self._get("http", name, lambda: self._httpx_client(name, **kwargs))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-pool request counters and open connections."""
+        report = {}
+        for name, stats in sorted(self._stats.items()):
+            pool = getattr(self._transports.get(name), "_pool", None)
+            if pool is not None:
+                stats.open_connections = len(getattr(pool, "connections", []))
+            row = asdict(stats)
+            if stats.open_connections is not None and stats.max_connections:
+                row["utilization"] = round(stats.open_connections / stats.max_connections, 4)
+            report[name] = row
+        return report
+
+    async def aclose(self) -> None:
+        """Close every client and its connection pool."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            result = client.close()
+            if inspect.isawaitable(result):
+                await result
+
+
+_registry: Optional[ProviderRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Process-wide registry shared by the API, the Streamlit app and benchmarks."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderRegistry(
+                max_connections=int(os.getenv("PROVIDER_MAX_CONNECTIONS", str(DEFAULT_MAX_CONNECTIONS))),
+                max_keepalive_connections=int(os.getenv("PROVIDER_MAX_KEEPALIVE", str(DEFAULT_MAX_KEEPALIVE))),
+            )
+        return _registry
@@ -0,0 +1,389 @@
+"""
+Backend-independent vector store: chunked ingest, dense and hybrid search, RAG context.
+
+Backends only store and look up chunk vectors; chunking, deduplication,
+embedding, BM25 fusion and parent collapsing live here so every backend
+returns the same hits for the same corpus. Backends are selected with
+``VECTOR_BACKEND``:
+
+- ``chroma`` (default): ChromaDB collection, see ``chroma_store.py``
+- ``numpy``: memory-mapped float32 segments, exact or IVF search, see ``numpy_store.py``
+
+Searches take a ``where`` filter over chunk metadata (``title``, ``url``,
+``domain``, ``source``, ``tenant``, ``fetched_at``; syntax in ``filters.py``).
+Tenants get their own collection or directory through ``for_tenant``, so a
+tenant's queries never scan, or filter out, another tenant's chunks.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from src.vectordb.bm25 import BM25Index, reciprocal_rank_fusion
+from src.vectordb.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_TOKENS, iter_chunks
+from src.vectordb.context_packer import DEFAULT_CONTEXT_TOKENS, pack_context
+from src.vectordb.embedders import DEFAULT_MODEL_NAME, embedder_key, get_embedder
+from src.vectordb.embedding_cache import get_query_embedding_cache
+from src.vectordb.filters import Where, matches
+
+DEFAULT_INGEST_BATCH_SIZE = 256
+DEFAULT_EMBED_BATCH_SIZE = 64
+DEFAULT_HYBRID_CANDIDATES = 50
+DEFAULT_RRF_K = 60
+# Chunks fetched per requested document before collapsing hits to parents.
+CHUNK_FANOUT = 4
+VECTOR_BACKENDS = ("chroma", "numpy")
+DEFAULT_STORE_PATHS = {"chroma": "./chroma_db", "numpy": "./vector_index"}
+# Tenant names become collection and directory names.
+TENANT_PATTERN = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9_-]{0,38}[A-Za-z0-9])?$")
+# BM25 hits fetched per candidate when a filter may discard some of them.
+FILTERED_LEXICAL_FANOUT = 4
+
+
+@dataclass
+class IngestStats:
+    """Counters for one bulk ingest run."""
+    received: int = 0  # documents
+    chunks: int = 0
+    skipped: int = 0  # empty documents, chunks duplicated in the stream or already stored
+    added: int = 0  # chunks written
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.received / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "chunks": self.chunks,
+            "skipped": self.skipped,
+            "added": self.added,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "docs_per_second": round(self.docs_per_second, 1),
+        }
+
+
+def collapse_to_parents(hits: List[Dict]) -> List[Dict]:
+    """Keep the best-ranked chunk per parent document, preserving order.
+
+    The returned hit takes the parent's ID; the chunk that matched is kept
+    under ``chunk_id``. Documents stored before chunking have no parent
+    and are their own parent.
+    """
+    seen = set()
+    docs = []
+    for hit in hits:
+        parent_id = hit["metadata"].get("parent_id", hit["id"])
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        docs.append({**hit, "id": parent_id, "chunk_id": hit["id"]})
+    return docs
+
+
+def domain_of(url: str) -> str:
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class VectorStore(ABC):
+    """Vector store for research documents.
+
+    Subclasses implement storage: ``count``, ``_existing_ids``, ``_write``,
+    ``_nearest``, ``_fetch``, ``_pages`` and ``_open_tenant``. Hits are dicts with ``id``,
+    ``content``, ``metadata`` and ``similarity`` (cosine, higher is closer).
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        embedding_backend: Optional[str] = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    ):
+        self.model_name = model_name
+        # torch (fp32), onnx or int8; see src/vectordb/embedders.py
+        self.embedding_backend = embedding_backend or os.getenv("EMBEDDING_BACKEND", "torch")
+        self.query_cache = get_query_embedding_cache()
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        # Lexical index over the same documents; rebuilt from storage on
+        # first hybrid query after a restart.
+        self.bm25 = BM25Index()
+        self.tenant: Optional[str] = None
+        self._tenants: Dict[str, "VectorStore"] = {}
+        self._tenants_lock = threading.Lock()
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored chunks."""
+
+    @abstractmethod
+    def _existing_ids(self, ids: List[str]) -> set:
+        """The subset of ``ids`` already stored."""
+
+    @abstractmethod
+    def _write(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict]) -> None:
+        """Store new chunks; ``embeddings`` is a (len(ids), dims) float32 array."""
+
+    @abstractmethod
+    def _touch(self, fetched_at: Dict[str, float]) -> None:
+        """Move stored chunks' ``fetched_at`` metadata forward to the given times."""
+
+    @abstractmethod
+    def _nearest(self, embedding: Sequence[float], n_results: int, where: Optional[Where] = None) -> List[Dict]:
+        """The ``n_results`` chunks matching ``where`` closest to ``embedding``, best first."""
+
+    @abstractmethod
+    def _fetch(self, ids: List[str]) -> List[Dict]:
+        """Stored chunks by ID (missing IDs are skipped), without a similarity."""
+
+    @abstractmethod
+    def _pages(self, page_size: int) -> Iterator[List[Tuple[str, str]]]:
+        """All stored (id, text) pairs in pages of ``page_size``."""
+
+    @abstractmethod
+    def _open_tenant(self, tenant: str) -> "VectorStore":
+        """A store over ``tenant``'s own collection, sharing this store's settings."""
+
+    def for_tenant(self, tenant: str) -> "VectorStore":
+        """The store holding ``tenant``'s documents, opened once and reused."""
+        if not TENANT_PATTERN.match(tenant):
+            raise ValueError(f"Invalid tenant name: {tenant!r}")
+        with self._tenants_lock:
+            store = self._tenants.get(tenant)
+            if store is None:
+                store = self._tenants[tenant] = self._open_tenant(tenant)
+                store.tenant = tenant
+            return store
+
+    @property
+    def embedder(self):
+        """Shared embedding model, loaded on first use."""
+        return get_embedder(self.model_name, self.embedding_backend)
+
+    def _generate_id(self, text: str) -> str:
+        """Generate unique ID from text content."""
+        return hashlib.md5(text.encode()).hexdigest()
+
+    @staticmethod
+    def _content(doc: Dict) -> str:
+        return doc.get("content", doc.get("snippet", ""))
+
+    def _chunk_records(self, doc: Dict) -> Iterator[Tuple[str, str, Dict]]:
+        """Yield (chunk id, text, metadata) records for a source dict.
+
+        Chunk IDs are ``<parent id>:<chunk index>`` where the parent ID is the
+        content hash, and the metadata links each chunk back to its parent.
+        """
+        content = self._content(doc)
+        if not content:
+            return
+        parent_id = self._generate_id(content)
+        url = doc.get("url", "")
+        fetched_at = float(doc.get("fetched_at") or time.time())
+        for chunk in iter_chunks(content, self.chunk_tokens, self.chunk_overlap):
+            metadata = {
+                "title": doc.get("title", ""),
+                "url": url,
+                "domain": domain_of(url),
+                "source": doc.get("source", "web"),
+                "tenant": self.tenant or "",
+                "fetched_at": fetched_at,
+                "parent_id": parent_id,
+                "chunk_index": chunk.index,
+            }
+            yield f"{parent_id}:{chunk.index}", chunk.text, metadata
+
+    def add_documents(self, documents: List[Dict]) -> List[str]:
+        """Add documents to the vector store; returns their parent IDs."""
+        documents = list(documents)
+        self.ingest(documents)
+        return [self._generate_id(content) for content in map(self._content, documents) if content]
+
+    def ingest(
+        self,
+        documents: Iterable[Dict],
+        batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+        embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    ) -> IngestStats:
+        """Stream documents into the store in bounded batches.
+
+        Accepts any iterator and chunks documents lazily, so memory stays at
+        one batch of chunks regardless of corpus or document size. IDs are
+        derived from content hashes: chunks duplicated within the stream and
+        chunks already stored are dropped before embedding, so re-ingesting
+        a corpus is safe.
+        """
+        stats = IngestStats()
+        start = perf_counter()
+        batch: Dict[str, Tuple[str, str, Dict]] = {}
+
+        for doc in documents:
+            stats.received += 1
+            produced = 0
+            for record in self._chunk_records(doc):
+                produced += 1
+                if record[0] in batch:
+                    stats.skipped += 1
+                    continue
+                batch[record[0]] = record
+                if len(batch) >= batch_size:
+                    self._flush_batch(batch, stats, embed_batch_size)
+                    batch = {}
+            if not produced:
+                stats.skipped += 1
+            stats.chunks += produced
+
+        if batch:
+            self._flush_batch(batch, stats, embed_batch_size)
+        stats.seconds = perf_counter() - start
+        return stats
+
+    def _flush_batch(self, batch: Dict[str, Tuple[str, str, Dict]], stats: IngestStats, embed_batch_size: int) -> None:
+        existing = self._existing_ids(list(batch))
+        records = [record for doc_id, record in batch.items() if doc_id not in existing]
+        stats.skipped += len(batch) - len(records)
+        stats.batches += 1
+        # Re-ingested content was fetched again, so max-age filters must see it as fresh.
+        self._touch({doc_id: batch[doc_id][2]["fetched_at"] for doc_id in existing if doc_id in batch})
+        if not records:
+            return
+
+        ids, texts, metadatas = (list(column) for column in zip(*records))
+        embeddings = np.asarray(self.embedder.encode(texts, batch_size=embed_batch_size), dtype=np.float32)
+        self._write(ids, embeddings, texts, metadatas)
+        self.bm25.add_many(zip(ids, texts))
+        stats.added += len(records)
+
+    def add_embeddings(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict]] = None,
+    ) -> int:
+        """Store chunks whose embeddings were computed elsewhere; returns how many were new."""
+        existing = self._existing_ids(list(ids))
+        keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+        metadatas = metadatas if metadatas is not None else [{} for _ in ids]
+        self._touch({
+            doc_id: metadatas[i]["fetched_at"]
+            for i, doc_id in enumerate(ids) if doc_id in existing and "fetched_at" in metadatas[i]
+        })
+        if not keep:
+            return 0
+        new_ids = [ids[i] for i in keep]
+        new_texts = [texts[i] for i in keep]
+        self._write(new_ids, np.asarray(embeddings, dtype=np.float32)[keep], new_texts, [metadatas[i] for i in keep])
+        self.bm25.add_many(zip(new_ids, new_texts))
+        return len(keep)
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries through the shared query embedding cache."""
+        model_key = embedder_key(self.model_name, self.embedding_backend)
+        return self.query_cache.embed(model_key, queries, self.embedder.encode)
+
+    def _query_chunks(self, query: str, n_results: int, where: Optional[Where] = None) -> List[Dict]:
+        """Dense search over individual chunks."""
+        if not self.count():
+            return []
+        return self._nearest(self._embed_queries([query])[0], max(1, n_results), where)
+
+    def search(self, query: str, n_results: int = 5, where: Optional[Where] = None) -> List[Dict]:
+        """Search for similar documents, one hit per parent document.
+
+        ``where`` restricts hits to chunks whose metadata matches, e.g.
+        ``{"domain": "arxiv.org", "fetched_at": {"$gte": cutoff}}``.
+        """
+        return collapse_to_parents(self._query_chunks(query, n_results * CHUNK_FANOUT, where))[:n_results]
+
+    def _sync_bm25(self, page_size: int = 1000) -> None:
+        """Index any stored documents the BM25 index has not seen yet."""
+        total = self.count()
+        if len(self.bm25) >= total:
+            return
+        for page in self._pages(page_size):
+            self.bm25.add_many(page)
+            if len(self.bm25) >= total:
+                break
+
+    def hybrid_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        candidates: int = DEFAULT_HYBRID_CANDIDATES,
+        rrf_k: int = DEFAULT_RRF_K,
+        where: Optional[Where] = None,
+    ) -> List[Dict]:
+        """Fuse dense and BM25 rankings with reciprocal rank fusion.
+
+        Each retriever contributes its top ``candidates`` chunks; a chunk's
+        fused score is the sum of ``1 / (rrf_k + rank)`` over the rankings it
+        appears in, and fused hits are then collapsed to parent documents.
+        Hits carry ``similarity`` (dense, None if BM25-only), ``bm25`` (None
+        if dense-only) and ``rrf_score``. The BM25 index holds no metadata,
+        so with ``where`` its hits are over-fetched and checked one by one.
+        """
+        self._sync_bm25()
+        dense = {doc["id"]: doc for doc in self._query_chunks(query, candidates, where)}
+        lexical_hits = self.bm25.search(query, candidates * FILTERED_LEXICAL_FANOUT if where else candidates)
+        fetched = {}
+        if where:
+            fetched = {doc["id"]: doc for doc in self._fetch([doc_id for doc_id, _ in lexical_hits if doc_id not in dense])}
+            lexical_hits = [
+                (doc_id, score) for doc_id, score in lexical_hits
+                if doc_id in dense or (doc_id in fetched and matches(fetched[doc_id]["metadata"], where))
+            ][:candidates]
+        lexical = dict(lexical_hits)
+        fused = reciprocal_rank_fusion([list(dense), list(lexical)], k=rrf_k)[:n_results * CHUNK_FANOUT]
+
+        missing = [doc_id for doc_id, _ in fused if doc_id not in dense and doc_id not in fetched]
+        for doc in list(fetched.values()) + (self._fetch(missing) if missing else []):
+            dense.setdefault(doc["id"], {**doc, "similarity": None})
+
+        docs = []
+        for doc_id, score in fused:
+            if doc_id in dense:
+                docs.append({**dense[doc_id], "bm25": lexical.get(doc_id), "rrf_score": score})
+        return collapse_to_parents(docs)[:n_results]
+
+    def get_context(
+        self,
+        query: str,
+        n_results: int = 3,
+        token_budget: int = DEFAULT_CONTEXT_TOKENS,
+        hybrid: bool = False,
+        where: Optional[Where] = None,
+    ) -> str:
+        """Get relevant context for RAG, packed into ``token_budget`` tokens."""
+        if hybrid:
+            docs = self.hybrid_search(query, n_results, where=where)
+        else:
+            docs = self.search(query, n_results, where)
+        return pack_context(docs, token_budget).text
+
+
+def create_vector_store(backend: Optional[str] = None, path: Optional[str] = None, **kwargs: Any) -> VectorStore:
+    """Open a vector store from ``VECTOR_BACKEND`` (or an explicit backend name)."""
+    backend = (backend or os.getenv("VECTOR_BACKEND", "chroma")).lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unsupported VECTOR_BACKEND: {backend} (expected one of {', '.join(VECTOR_BACKENDS)})")
+    path = path or DEFAULT_STORE_PATHS[backend]
+    if backend == "numpy":
+        from src.vectordb.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(path=path, **kwargs)
+    # Imported lazily: chromadb is heavy and optional with the numpy backend.
+    from src.vectordb.chroma_store import ChromaVectorStore
+    return ChromaVectorStore(persist_dir=path, **kwargs)
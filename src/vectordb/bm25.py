@@ -0,0 +1,117 @@
+"""In-process BM25 index kept alongside the vector collection.
+
+Dense embeddings blur exact tokens such as error codes, version strings and
+identifiers; BM25 matches them literally. Postings are stored per term as two
+parallel ``array('I')`` columns (document number, term frequency), 8 bytes
+per posting instead of a Python object each, and are viewed as numpy arrays
+at query time so scoring a term is one vectorized pass over its postings.
+
+Documents are append-only and identified by the same content-hash IDs as
+the Chroma collection, so re-adding a known ID is a no-op.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Keeps identifiers like ``ERR_CONN_RESET``, ``v1.2.3`` and ``gpt-4o`` intact.
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[.\-][a-z0-9_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over an append-only document set."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._doc_lengths = array("I")
+        self._total_length = 0
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def add(self, doc_id: str, text: str) -> bool:
+        """Index one document; returns False if the ID is already indexed."""
+        terms: Dict[str, int] = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        with self._lock:
+            if doc_id in self._positions:
+                return False
+            position = len(self._ids)
+            self._ids.append(doc_id)
+            self._positions[doc_id] = position
+            self._doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+            for term, count in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("I"))
+                postings[0].append(position)
+                postings[1].append(count)
+        return True
+
+    def add_many(self, records: Iterable[Tuple[str, str]]) -> int:
+        return sum(self.add(doc_id, text) for doc_id, text in records)
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """Return up to ``n_results`` ``(doc_id, score)`` pairs, best first."""
+        terms = set(tokenize(query))
+        if not terms or n_results <= 0:
+            return []
+        # Scoring reads zero-copy views of the postings, and an array cannot
+        # grow while a view is alive, so score under the lock and let the
+        # views die with the helper's frame.
+        with self._lock:
+            return self._score(terms, n_results)
+
+    def _score(self, terms: Iterable[str], n_results: int) -> List[Tuple[str, float]]:
+        n_docs = len(self._ids)
+        postings = [self._postings[term] for term in terms if term in self._postings]
+        if not n_docs or not postings:
+            return []
+        lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32).astype(np.float32)
+        norms = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / n_docs or 1.0))
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for doc_column, tf_column in postings:
+            docs = np.frombuffer(doc_column, dtype=np.uint32)
+            tfs = np.frombuffer(tf_column, dtype=np.uint32).astype(np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            # Each document appears once per term, so fancy-index += is safe.
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norms[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > n_results:
+            candidates = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._ids[idx], float(scores[idx])) for idx in ranked]
+
+    def stats(self) -> Dict[str, int]:
+        postings = sum(len(docs) for docs, _ in self._postings.values())
+        return {"documents": len(self._ids), "terms": len(self._postings), "postings": postings}
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists by summing ``1 / (k + rank)`` per list."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -3,70 +3,106 @@ ChromaDB Vector Store for Semantic Search and RAG
 """
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
-import hashlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import copy
+import threading
+import time
 
-class ChromaVectorStore:
+import numpy as np
+
+# IngestStats and collapse_to_parents used to live here.
+from src.vectordb.base import IngestStats, VectorStore, collapse_to_parents  # noqa: F401
+from src.vectordb.bm25 import BM25Index
+from src.vectordb.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_TOKENS
+from src.vectordb.embedders import DEFAULT_MODEL_NAME
+from src.vectordb.filters import Where, normalize_where
+
+
+class ChromaVectorStore(VectorStore):
     """Vector store for research documents using ChromaDB."""
-    
-    def __init__(self, collection_name: str = "research_docs", persist_dir: str = "./chroma_db"):
-        self.client = chromadb.Client(Settings(
-            chroma_db_impl="duckdb+parquet",
-            persist_directory=persist_dir,
-            anonymized_telemetry=False
-        ))
+
+    def __init__(
+        self,
+        collection_name: str = "research_docs",
+        persist_dir: str = "./chroma_db",
+        model_name: str = DEFAULT_MODEL_NAME,
+        embedding_backend: Optional[str] = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        client: Optional["chromadb.ClientAPI"] = None,
+    ):
+        super().__init__(model_name, embedding_backend, chunk_tokens, chunk_overlap)
+        # An injected client (e.g. chromadb.EphemeralClient) replaces persist_dir.
+        # chromadb >= 0.4 persists through PersistentClient; the old
+        # duckdb+parquet Settings are rejected at startup.
+        self.client = client or chromadb.PersistentClient(
+            path=persist_dir,
+            settings=Settings(anonymized_telemetry=False)
+        )
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
             metadata={"hnsw:space": "cosine"}
         )
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    def _generate_id(self, text: str) -> str:
-        """Generate unique ID from text content."""
-        return hashlib.md5(text.encode()).hexdigest()
-    
-    def add_documents(self, documents: List[Dict]) -> List[str]:
-        """Add documents to the vector store."""
-        ids = []
-        texts = []
-        metadatas = []
-        
-        for doc in documents:
-            content = doc.get("content", doc.get("snippet", ""))
-            if not content:
-                continue
-            
-            doc_id = self._generate_id(content)
-            ids.append(doc_id)
-            texts.append(content[:2000])  # Limit text size
-            metadatas.append({
-                "title": doc.get("title", ""),
-                "url": doc.get("url", ""),
-                "source": doc.get("source", "web")
-            })
-        
-        if texts:
-            embeddings = self.embedder.encode(texts).tolist()
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
-        
-        return ids
-    
-    def search(self, query: str, n_results: int = 5) -> List[Dict]:
-        """Search for similar documents."""
-        query_embedding = self.embedder.encode([query]).tolist()
-        
+        self._backfill_fetched_at()
+
+    def _backfill_fetched_at(self, page_size: int = 1000) -> None:
+        """Date chunks stored before ``fetched_at`` was recorded to now.
+
+        Otherwise they would fail every max-age filter. Chroma cannot filter
+        on a missing field, so this pages through the collection's metadata.
+        """
+        now = time.time()
+        for offset in range(0, self.collection.count(), page_size):
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            missing = [
+                (doc_id, dict(metadata or {}))
+                for doc_id, metadata in zip(page["ids"], page["metadatas"])
+                if "fetched_at" not in (metadata or {})
+            ]
+            if missing:
+                self.collection.update(
+                    ids=[doc_id for doc_id, _ in missing],
+                    metadatas=[{**metadata, "fetched_at": now} for _, metadata in missing],
+                )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        return set(self.collection.get(ids=ids, include=[])["ids"])
+
+    def _write(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict]) -> None:
+        # upsert, so a chunk written concurrently by another process is harmless
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings.tolist(),
+            documents=texts,
+            metadatas=metadatas
+        )
+
+    def _touch(self, fetched_at: Dict[str, float]) -> None:
+        if not fetched_at:
+            return
+        stored = self.collection.get(ids=list(fetched_at), include=["metadatas"])
+        ids, metadatas = [], []
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = dict(metadata or {})
+            if float(metadata.get("fetched_at") or 0) < fetched_at[doc_id]:
+                metadata["fetched_at"] = float(fetched_at[doc_id])
+                ids.append(doc_id)
+                metadatas.append(metadata)
+        if ids:
+            self.collection.update(ids=ids, metadatas=metadatas)
+
+    def _nearest(self, embedding: Sequence[float], n_results: int, where: Optional[Where] = None) -> List[Dict]:
+        # Chroma applies the filter inside the HNSW search rather than after it.
         results = self.collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results,
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+            n_results=min(n_results, self.collection.count()),
+            where=normalize_where(where),
             include=["documents", "metadatas", "distances"]
         )
-        
+
         docs = []
         for i in range(len(results["ids"][0])):
             docs.append({
@@ -75,14 +111,30 @@ class ChromaVectorStore:
                 "metadata": results["metadatas"][0][i],
                 "similarity": 1 - results["distances"][0][i]  # Convert distance to similarity
             })
-        
+
         return docs
-    
-    def get_context(self, query: str, n_results: int = 3) -> str:
-        """Get relevant context for RAG."""
-        docs = self.search(query, n_results)
-        context = "\n\n".join([
-            f"Source: {d['metadata'].get('title', 'Unknown')}\n{d['content']}"
-            for d in docs
-        ])
-        return context
+
+    def _fetch(self, ids: List[str]) -> List[Dict]:
+        fetched = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        return [
+            {"id": doc_id, "content": content, "metadata": metadata}
+            for doc_id, content, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"])
+        ]
+
+    def _pages(self, page_size: int) -> Iterator[List[Tuple[str, str]]]:
+        total = self.collection.count()
+        for offset in range(0, total, page_size):
+            page = self.collection.get(limit=page_size, offset=offset, include=["documents"])
+            yield list(zip(page["ids"], page["documents"]))
+
+    def _open_tenant(self, tenant: str) -> "ChromaVectorStore":
+        store = copy.copy(self)
+        store.collection = self.client.get_or_create_collection(
+            name=f"{self.collection.name}__{tenant}",
+            metadata={"hnsw:space": "cosine"}
+        )
+        store.bm25 = BM25Index()
+        store._tenants = {}
+        store._tenants_lock = threading.Lock()
+        store._backfill_fetched_at()
+        return store
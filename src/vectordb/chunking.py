@@ -0,0 +1,59 @@
+"""Split documents into overlapping, token-bounded chunks for embedding.
+
+The embedding models truncate input (MiniLM at 256 word pieces), so a long
+page embedded whole only ever represents its opening paragraphs. Documents
+are cut into windows of at most ``max_tokens`` tokens that prefer to end on
+a sentence boundary and overlap the previous window by ``overlap`` tokens,
+so a fact straddling a boundary is fully inside at least one chunk.
+
+Tokens are approximated with a word/punctuation regex rather than the
+model tokenizer: it needs no model download, and word pieces only run
+slightly above word count for English, which the default budget leaves
+room for.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+DEFAULT_CHUNK_TOKENS = 192
+DEFAULT_CHUNK_OVERLAP = 32
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = frozenset(".!?")
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    start: int  # character offsets into the source text
+    end: int
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Iterator[Chunk]:
+    """Yield chunks of ``text`` lazily, in order."""
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    overlap = max(0, min(overlap, max_tokens // 2))
+    spans = [match.span() for match in TOKEN_PATTERN.finditer(text)]
+    start, index = 0, 0
+    while start < len(spans):
+        end = min(start + max_tokens, len(spans))
+        if end < len(spans):
+            # Back off to the last sentence end in the second half of the window.
+            for cut in range(end - 1, start + max_tokens // 2 - 1, -1):
+                if text[spans[cut][0]] in SENTENCE_END:
+                    end = cut + 1
+                    break
+        first, last = spans[start][0], spans[end - 1][1]
+        yield Chunk(index, text[first:last], first, last)
+        if end == len(spans):
+            return
+        start = max(end - overlap, start + 1)
+        index += 1
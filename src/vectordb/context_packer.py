@@ -0,0 +1,135 @@
+"""Assemble retrieved passages into a prompt context under a token budget.
+
+Passages are taken in relevance order, near-duplicates (syndicated articles,
+mirrored docs, overlapping chunks) are dropped using MinHash signatures over
+word 3-shingles, and a passage that does not fit is trimmed at a sentence
+boundary rather than mid-sentence. Packing then carries on, since a later,
+shorter passage may still fit. Tokens are counted with
+:func:`src.observability.metrics.estimate_tokens`, the same estimate used
+for cost reporting, so the budget maps directly onto reported input cost.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.observability.metrics import estimate_tokens
+
+DEFAULT_CONTEXT_TOKENS = 1200
+DEFAULT_DEDUPE_THRESHOLD = 0.8
+DEFAULT_TEMPLATE = "Source: {title}\n{content}"
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+# estimate_tokens counts words / 0.75; budgets are enforced in words.
+WORDS_PER_TOKEN = 0.75
+SCORE_KEYS = ("rrf_score", "similarity", "score")
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240607)
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    used: int
+    duplicates: int
+    truncated: bool
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of the text's word shingles."""
+    words = text.lower().split()
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # crc32 < 2**32 and a < 2**31, so a * h + b stays inside uint64.
+    return ((np.outer(hashes, _HASH_A) + _HASH_B) % _MERSENNE_PRIME).min(axis=0)
+
+
+def _relevance(doc: Dict) -> float:
+    for key in SCORE_KEYS:
+        if doc.get(key) is not None:
+            return float(doc[key])
+    return 0.0
+
+
+def _trim_to_sentences(content: str, max_words: int) -> str:
+    kept: List[str] = []
+    words = 0
+    for sentence in _SENTENCE_SPLIT.split(content):
+        count = len(sentence.split())
+        if words + count > max_words:
+            break
+        kept.append(sentence)
+        words += count
+    return " ".join(kept)
+
+
+def pack_context(
+    docs: Sequence[Dict],
+    token_budget: int = DEFAULT_CONTEXT_TOKENS,
+    template: str = DEFAULT_TEMPLATE,
+    separator: str = "\n\n",
+    dedupe_threshold: Optional[float] = DEFAULT_DEDUPE_THRESHOLD,
+) -> PackedContext:
+    """Pack ``docs`` (search hits or raw sources) into at most ``token_budget`` tokens.
+
+    ``template`` is formatted with ``title`` and ``content``; titles are read
+    from the hit's metadata or the source dict itself. Set
+    ``dedupe_threshold`` to None to keep near-duplicates.
+    """
+    budget_words = int(token_budget * WORDS_PER_TOKEN)
+    separator_words = len(separator.split())
+    ordered = sorted(docs, key=_relevance, reverse=True)
+    signatures: List[np.ndarray] = []
+    parts: List[str] = []
+    used_words = 0
+    duplicates = 0
+    truncated = False
+
+    for doc in ordered:
+        content = (doc.get("content") or doc.get("snippet") or "").strip()
+        if not content:
+            continue
+        if dedupe_threshold is not None:
+            signature = minhash(content)
+            if any(np.mean(signature == seen) >= dedupe_threshold for seen in signatures):
+                duplicates += 1
+                continue
+            signatures.append(signature)
+
+        title = doc.get("metadata", {}).get("title") or doc.get("title") or "Unknown"
+        overhead = len(template.format(title=title, content="").split()) + (separator_words if parts else 0)
+        remaining = budget_words - used_words - overhead
+        if remaining <= 0:
+            truncated = True
+            break
+        if len(content.split()) > remaining:
+            trimmed = _trim_to_sentences(content, remaining)
+            if not trimmed and not parts:
+                # A single oversized sentence: better a cut passage than none.
+                trimmed = " ".join(content.split()[:remaining])
+            truncated = True
+            if not trimmed:
+                # Its first sentence alone overflows; a shorter passage may still fit.
+                continue
+            content = trimmed
+        part = template.format(title=title, content=content)
+        parts.append(part)
+        used_words += overhead + len(content.split())
+
+    text = separator.join(parts)
+    return PackedContext(
+        text=text,
+        tokens=estimate_tokens(text) if text else 0,
+        used=len(parts),
+        duplicates=duplicates,
+        truncated=truncated,
+    )
@@ -0,0 +1,110 @@
+"""Process-wide registry of sentence embedding models.
+
+Loading a SentenceTransformer costs seconds and hundreds of MB, so every
+vector store in a process shares one instance per model. Models load
+lazily on first use (or explicitly via :func:`warm_up`), at most once even
+when several threads ask at the same time.
+
+Each model can run on one of several CPU backends:
+
+- ``torch``: full-precision PyTorch (default)
+- ``onnx``: ONNX Runtime, fp32
+- ``int8``: ONNX Runtime with the dynamically quantized int8 export
+
+The ONNX backends need ``sentence-transformers>=3.2`` installed with the
+``onnx`` extra. ``benchmarks/embedding_backends.py`` compares their
+throughput and retrieval recall.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BACKEND = "torch"
+EMBEDDING_BACKENDS = ("torch", "onnx", "int8")
+# Quantized export published next to the model on the Hugging Face Hub.
+INT8_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def embedder_key(model_name: str, backend: str = DEFAULT_BACKEND) -> str:
+    """Name a model/backend pair; also used to key cached query embeddings."""
+    return model_name if backend == DEFAULT_BACKEND else f"{model_name}@{backend}"
+
+
+@dataclass
+class EmbedderLoad:
+    model_name: str
+    backend: str
+    load_seconds: float
+
+
+class EmbedderRegistry:
+    """Lazily loads and shares embedding models by name."""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._loads: Dict[str, EmbedderLoad] = {}
+        self._model_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str = DEFAULT_MODEL_NAME, backend: str = DEFAULT_BACKEND) -> Any:
+        key = embedder_key(model_name, backend)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model_lock = self._model_locks.setdefault(key, threading.Lock())
+        # Per-model lock: concurrent callers wait for a single load, while
+        # different models can load in parallel.
+        with model_lock:
+            model = self._models.get(key)
+            if model is None:
+                start = perf_counter()
+                model = self._load(model_name, backend)
+                self._loads[key] = EmbedderLoad(model_name, backend, round(perf_counter() - start, 3))
+                self._models[key] = model
+        return model
+
+    def register(self, model_name: str, model: Any, backend: str = DEFAULT_BACKEND) -> None:
+        """Install an already-built model, e.g. a custom or test embedder."""
+        self._models[embedder_key(model_name, backend)] = model
+
+    def is_loaded(self, model_name: str, backend: str = DEFAULT_BACKEND) -> bool:
+        return embedder_key(model_name, backend) in self._models
+
+    def warm_up(
+        self, model_names: Optional[Iterable[str]] = None, backend: str = DEFAULT_BACKEND
+    ) -> Dict[str, float]:
+        """Load models ahead of the first request; returns load seconds per model."""
+        for model_name in model_names or [DEFAULT_MODEL_NAME]:
+            self.get(model_name, backend)
+        return {name: load.load_seconds for name, load in self._loads.items()}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: asdict(load) for name, load in sorted(self._loads.items())}
+
+    @staticmethod
+    def _load(model_name: str, backend: str = DEFAULT_BACKEND) -> Any:
+        from sentence_transformers import SentenceTransformer
+
+        if backend == "torch":
+            return SentenceTransformer(model_name)
+        if backend == "onnx":
+            return SentenceTransformer(model_name, backend="onnx")
+        if backend == "int8":
+            return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": INT8_ONNX_FILE})
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+
+
+embedder_registry = EmbedderRegistry()
+
+
+def get_embedder(model_name: str = DEFAULT_MODEL_NAME, backend: str = DEFAULT_BACKEND) -> Any:
+    return embedder_registry.get(model_name, backend)
+
+
+def warm_up(model_names: Optional[Iterable[str]] = None, backend: str = DEFAULT_BACKEND) -> Dict[str, float]:
+    return embedder_registry.warm_up(model_names, backend)
@@ -0,0 +1,121 @@
+"""LRU cache of query embeddings.
+
+Retrieval in revision loops and across users re-embeds the same questions
+over and over. Vectors are cached as compact float32 arrays keyed on the
+model name and the normalized query, so repeated searches skip the
+transformer forward pass. Set ``QUERY_EMBEDDING_CACHE_PATH`` to persist the
+cache to an ``.npz`` file across restarts.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from src.observability.metrics import cache_stats
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def normalize_text(text: str) -> str:
+    # MiniLM-style models lowercase their input anyway, so casing and
+    # spacing variants share one embedding.
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU mapping (model, normalized query) to a float32 vector."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.stats = cache_stats("query_embeddings")
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return f"{model_name}\x1f{normalize_text(text)}"
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        key = self.key(model_name, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.memory_hits += 1
+            return vector
+
+    def put(self, model_name: str, text: str, vector: np.ndarray) -> None:
+        key = self.key(model_name, text)
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        vector.flags.writeable = False
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            self.stats.writes += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def embed(self, model_name: str, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return embeddings for ``texts``, encoding only the ones not cached."""
+        vectors: List[Optional[np.ndarray]] = [self.get(model_name, text) for text in texts]
+        missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = np.asarray(encode([texts[idx] for idx in missing]), dtype=np.float32)
+            for idx, vector in zip(missing, encoded):
+                self.put(model_name, texts[idx], vector)
+                vectors[idx] = vector
+        return np.vstack(vectors)
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            matrix = np.vstack(list(self._entries.values())) if keys else np.zeros((0, 0), dtype=np.float32)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=matrix)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with np.load(path) as data:
+            for key, vector in zip(data["keys"], data["vectors"]):
+                vector = vector.astype(np.float32)
+                vector.flags.writeable = False
+                self._entries[str(key)] = vector
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_query_cache: Optional[QueryEmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Process-wide cache shared by every vector store instance."""
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            path = os.getenv("QUERY_EMBEDDING_CACHE_PATH") or None
+            _query_cache = QueryEmbeddingCache(
+                max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES))),
+                path=path,
+            )
+            if path:
+                atexit.register(_query_cache.save)
+        return _query_cache
@@ -0,0 +1,128 @@
+"""Metadata filters shared by the vector store backends.
+
+Filters use Chroma's ``where`` syntax, so the Chroma backend passes them
+through unchanged and the NumPy backend translates them to SQL over its
+metadata sidecar:
+
+- ``{"source": "web"}``: equality, short for ``{"source": {"$eq": "web"}}``
+- ``{"fetched_at": {"$gte": 1717000000}}``: ``$eq $ne $gt $gte $lt $lte $in $nin``
+- ``{"$and": [...]}`` and ``{"$or": [...]}``; several keys in one dict are ANDed
+
+A chunk without the field never matches a condition on it.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Where = Dict[str, Any]
+
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+COMPARISONS: Dict[str, Tuple[str, Callable[[Any, Any], bool]]] = {
+    "$eq": ("=", lambda value, target: value == target),
+    "$ne": ("!=", lambda value, target: value != target),
+    "$gt": (">", lambda value, target: value > target),
+    "$gte": (">=", lambda value, target: value >= target),
+    "$lt": ("<", lambda value, target: value < target),
+    "$lte": ("<=", lambda value, target: value <= target),
+    "$in": ("IN", lambda value, targets: value in targets),
+    "$nin": ("NOT IN", lambda value, targets: value not in targets),
+}
+LOGICAL = ("$and", "$or")
+
+
+def _clauses(where: Where) -> List[Tuple[str, Any]]:
+    if not isinstance(where, dict) or not where:
+        raise ValueError(f"Filter must be a non-empty dict, got {where!r}")
+    clauses = []
+    for key, value in where.items():
+        if key in LOGICAL:
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"{key} needs a non-empty list of filters")
+        elif not FIELD_PATTERN.match(key):
+            raise ValueError(f"Invalid metadata field in filter: {key!r}")
+        clauses.append((key, value))
+    return clauses
+
+
+def _comparison(condition: Any) -> Tuple[str, Any]:
+    if not isinstance(condition, dict):
+        return "$eq", condition
+    if len(condition) != 1:
+        raise ValueError(f"Use one operator per condition, got {condition!r}")
+    operator, target = next(iter(condition.items()))
+    if operator not in COMPARISONS:
+        raise ValueError(f"Unsupported filter operator: {operator}")
+    if operator in ("$in", "$nin") and not isinstance(target, (list, tuple)):
+        raise ValueError(f"{operator} needs a list")
+    return operator, target
+
+
+def normalize_where(where: Optional[Where]) -> Optional[Where]:
+    """Validate a filter and rewrite it into the strict form Chroma accepts.
+
+    Chroma wants one key per dict, so sibling keys become an explicit ``$and``.
+    """
+    if where is None:
+        return None
+    parts = []
+    for key, value in _clauses(where):
+        if key in LOGICAL:
+            children = [normalize_where(child) for child in value]
+            parts.append(children[0] if len(children) == 1 else {key: children})
+        else:
+            operator, target = _comparison(value)
+            parts.append({key: {operator: list(target) if operator in ("$in", "$nin") else target}})
+    return parts[0] if len(parts) == 1 else {"$and": parts}
+
+
+def matches(metadata: Dict[str, Any], where: Optional[Where]) -> bool:
+    """Evaluate a filter against one chunk's metadata."""
+    if where is None:
+        return True
+    for key, value in _clauses(where):
+        if key == "$and":
+            ok = all(matches(metadata, child) for child in value)
+        elif key == "$or":
+            ok = any(matches(metadata, child) for child in value)
+        else:
+            operator, target = _comparison(value)
+            try:
+                ok = metadata.get(key) is not None and COMPARISONS[operator][1](metadata[key], target)
+            except TypeError:  # e.g. comparing a string field with a number
+                ok = False
+        if not ok:
+            return False
+    return True
+
+
+def field_expression(field: str, column: str = "metadata") -> str:
+    """SQLite expression for a field of a JSON metadata column."""
+    return f"json_extract({column}, '$.{field}')"
+
+
+def to_sql(where: Where, column: str = "metadata") -> Tuple[str, List[Any]]:
+    """Translate a filter to a SQLite condition over a JSON metadata column."""
+    sql: List[str] = []
+    params: List[Any] = []
+    for key, value in _clauses(where):
+        if key in LOGICAL:
+            children = [to_sql(child, column) for child in value]
+            joiner = " AND " if key == "$and" else " OR "
+            sql.append("(" + joiner.join(child_sql for child_sql, _ in children) + ")")
+            for _, child_params in children:
+                params.extend(child_params)
+            continue
+        operator, target = _comparison(value)
+        expression = field_expression(key, column)
+        if operator in ("$in", "$nin") and not target:
+            sql.append("0" if operator == "$in" else f"({expression} IS NOT NULL)")
+        elif operator in ("$in", "$nin"):
+            placeholders = ", ".join("?" * len(target))
+            sql.append(f"({expression} IS NOT NULL AND {expression} {COMPARISONS[operator][0]} ({placeholders}))")
+            params.extend(target)
+        else:
+            # Missing fields are NULL and fail every comparison, $ne included.
+            sql.append(f"({expression} IS NOT NULL AND {expression} {COMPARISONS[operator][0]} ?)")
+            params.append(target)
+    return " AND ".join(sql), params
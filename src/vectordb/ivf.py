@@ -0,0 +1,222 @@
+"""Inverted-file (IVF) approximate nearest-neighbour index over unit vectors.
+
+A spherical k-means coarse quantizer splits the vectors into ``n_lists``
+cells. A query scores the centroids and only scans the rows of its
+``nprobe`` closest cells, so the work per query drops from N rows to about
+``N * nprobe / n_lists``. Raising ``nprobe`` buys recall with latency;
+``nprobe == n_lists`` scans everything.
+
+With ``pq_subvectors`` > 0 each row's residual from its centroid is also
+product-quantized to one byte per subvector. Because ``q·x = q·c + q·r``,
+a query's inner products with every codeword are computed once (a
+``pq_subvectors x 256`` table) and a row is scored by summing table entries
+for its codes, reading ``pq_subvectors`` bytes per row instead of
+``4 * dims``. Approximate scores only pick candidates; the store reranks
+them against the full vectors.
+
+Rows are the owning store's row numbers. Per-cell postings are ``array``
+columns viewed as numpy arrays at query time, like the BM25 postings.
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+import threading
+from array import array
+from typing import List, Optional
+
+import numpy as np
+
+DEFAULT_NPROBE = 8
+DEFAULT_KMEANS_ITERATIONS = 20
+PQ_CODEWORDS = 256
+# k-means needs a few dozen points per centroid to place it sensibly.
+MIN_POINTS_PER_LIST = 39
+TRAINING_POINTS_PER_LIST = 256
+# Codebooks converge long before this many residuals per subvector.
+PQ_TRAINING_POINTS = 64 * PQ_CODEWORDS
+ASSIGN_BATCH = 65536
+
+
+def default_n_lists(n_vectors: int) -> int:
+    """About ``4 * sqrt(N)`` cells, with enough training points for each."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_LIST))
+
+
+def assign(points: np.ndarray, centroids: np.ndarray, spherical: bool = True) -> np.ndarray:
+    """Index of the closest centroid per point (cosine if ``spherical``, else Euclidean)."""
+    bias = None if spherical else 0.5 * np.einsum("kd,kd->k", centroids, centroids)
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), ASSIGN_BATCH):
+        scores = points[start:start + ASSIGN_BATCH] @ centroids.T
+        if bias is not None:
+            # argmin |x - c|^2 == argmax (x·c - |c|^2 / 2)
+            scores -= bias
+        labels[start:start + ASSIGN_BATCH] = np.argmax(scores, axis=1)
+    return labels
+
+
+def kmeans(
+    points: np.ndarray,
+    k: int,
+    iterations: int = DEFAULT_KMEANS_ITERATIONS,
+    spherical: bool = True,
+    seed: int = 0,
+) -> np.ndarray:
+    """Lloyd's k-means seeded from random points; spherical keeps centroids unit-length."""
+    rng = np.random.default_rng(seed)
+    points = np.asarray(points, dtype=np.float32)
+    centroids = points[rng.choice(len(points), size=k, replace=len(points) < k)].copy()
+    for _ in range(iterations):
+        labels = assign(points, centroids, spherical)
+        counts = np.bincount(labels, minlength=k)
+        filled = counts > 0
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.add.reduceat(points[order], starts[filled], axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        # Re-seed empty cells so every cell ends up holding rows.
+        if not filled.all():
+            centroids[~filled] = points[rng.choice(len(points), size=int((~filled).sum()))]
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms == 0, 1, norms)
+    return centroids
+
+
+class IVFIndex:
+    """Coarse-quantized inverted lists with optional product-quantized residuals."""
+
+    def __init__(self, centroids: np.ndarray, codebooks: Optional[np.ndarray] = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        # (pq_subvectors, 256, dims / pq_subvectors) or None
+        self.codebooks = None if codebooks is None or not len(codebooks) else np.asarray(codebooks, dtype=np.float32)
+        self._rows: List[array] = [array("q") for _ in range(self.n_lists)]
+        self._codes: List[bytearray] = [bytearray() for _ in range(self.n_lists)]
+        self._lock = threading.Lock()
+        self.size = 0
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def pq_subvectors(self) -> int:
+        return 0 if self.codebooks is None else len(self.codebooks)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def train(
+        cls,
+        sample: np.ndarray,
+        n_lists: Optional[int] = None,
+        pq_subvectors: int = 0,
+        iterations: int = DEFAULT_KMEANS_ITERATIONS,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Fit centroids (and PQ codebooks) to a sample of unit vectors; the index starts empty."""
+        sample = np.asarray(sample, dtype=np.float32)
+        n_lists = n_lists or default_n_lists(len(sample))
+        centroids = kmeans(sample, n_lists, iterations, spherical=True, seed=seed)
+        codebooks = None
+        if pq_subvectors:
+            dims = sample.shape[1]
+            if dims % pq_subvectors:
+                raise ValueError(f"pq_subvectors must divide the vector dimension ({dims})")
+            subset = sample[np.random.default_rng(seed).permutation(len(sample))[:PQ_TRAINING_POINTS]]
+            residuals = subset - centroids[assign(subset, centroids)]
+            parts = residuals.reshape(len(subset), pq_subvectors, dims // pq_subvectors)
+            codebooks = np.stack([
+                kmeans(parts[:, j], PQ_CODEWORDS, iterations, spherical=False, seed=seed + j)
+                for j in range(pq_subvectors)
+            ])
+        return cls(centroids, codebooks)
+
+    def _encode(self, vectors: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        residuals = vectors - self.centroids[labels]
+        parts = residuals.reshape(len(vectors), self.pq_subvectors, -1)
+        codes = np.empty((len(vectors), self.pq_subvectors), dtype=np.uint8)
+        for j, codebook in enumerate(self.codebooks):
+            codes[:, j] = assign(parts[:, j], codebook, spherical=False)
+        return codes
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """File store rows under their closest cells; ``vectors`` must be unit-length."""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(rows):
+            return
+        labels = assign(vectors, self.centroids)
+        codes = self._encode(vectors, labels) if self.codebooks is not None else None
+        order = np.argsort(labels, kind="stable")
+        cells, starts = np.unique(labels[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        with self._lock:
+            for cell, start, end in zip(cells, starts, ends):
+                members = order[start:end]
+                self._rows[cell].frombytes(rows[members].tobytes())
+                if codes is not None:
+                    self._codes[cell].extend(codes[members].tobytes())
+            self.size += len(rows)
+
+    def search(self, query: np.ndarray, nprobe: int = DEFAULT_NPROBE, n_candidates: Optional[int] = None) -> np.ndarray:
+        """Candidate rows from the ``nprobe`` closest cells.
+
+        Without PQ every row in those cells is returned. With PQ the rows are
+        ranked by approximate score and the best ``n_candidates`` returned.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        centroid_scores = self.centroids @ query
+        nprobe = max(1, min(nprobe, self.n_lists))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        # Postings are read through zero-copy views, and an array cannot grow
+        # while one is alive, so copy them out under the lock.
+        with self._lock:
+            rows = np.concatenate([np.frombuffer(self._rows[cell], dtype=np.int64) for cell in probe])
+            if self.codebooks is None:
+                return rows
+            codes = np.concatenate([np.frombuffer(self._codes[cell], dtype=np.uint8) for cell in probe])
+            sizes = [len(self._rows[cell]) for cell in probe]
+        codes = codes.reshape(-1, self.pq_subvectors)
+
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.pq_subvectors, -1))
+        approx = np.repeat(centroid_scores[probe], sizes)
+        approx += table[np.arange(self.pq_subvectors), codes].sum(axis=1)
+        if n_candidates is not None and len(rows) > n_candidates:
+            rows = rows[np.argpartition(-approx, n_candidates - 1)[:n_candidates]]
+        return rows
+
+    def save(self, path: str) -> None:
+        """Write the index atomically as an ``.npz`` archive."""
+        with self._lock:
+            offsets = np.cumsum([0] + [len(rows) for rows in self._rows])
+            arrays = {
+                "centroids": self.centroids,
+                "codebooks": self.codebooks if self.codebooks is not None else np.empty(0, dtype=np.float32),
+                "offsets": offsets,
+                "rows": np.concatenate([np.frombuffer(rows, dtype=np.int64) for rows in self._rows]),
+                "codes": np.frombuffer(b"".join(self._codes), dtype=np.uint8),
+            }
+            buffer = io.BytesIO()
+            np.savez(buffer, **arrays)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            index = cls(data["centroids"], data["codebooks"])
+            offsets, rows, codes = data["offsets"], data["rows"], data["codes"]
+        width = index.pq_subvectors
+        for cell in range(index.n_lists):
+            start, end = int(offsets[cell]), int(offsets[cell + 1])
+            index._rows[cell].frombytes(rows[start:end].tobytes())
+            if width:
+                index._codes[cell].extend(codes[start * width:end * width].tobytes())
+        index.size = int(offsets[-1])
+        return index
@@ -0,0 +1,510 @@
+"""
+Pure-NumPy vector store: memory-mapped float32 segments with exact search.
+
+Layout of the store directory:
+
+- ``segments/000000.f32``, ``000001.f32``, ...: raw row-major float32 unit
+  vectors, ``segment_rows`` rows per segment. Segments are append-only;
+  when one is full the next is started, so a full segment never changes.
+- ``metadata.sqlite``: chunk ID, text and metadata keyed by global row
+  number, plus the vector dimension and segment size.
+
+Queries score each memory-mapped segment with one matrix-vector product and
+keep its best rows with ``np.argpartition``, so results are exact and
+opening a store only reads the row count. Vectors are appended before their
+metadata rows commit; rows past the committed count (an interrupted write)
+are cut off on open. A store has one writing process at a time.
+
+Past ``ann_min_rows`` rows an IVF index (see ``ivf.py``) is trained in a
+background thread, and from then on queries scan only the ``nprobe``
+closest cells, reranking candidates exactly; ``build_index`` retrains it on
+demand. Training works on the rows present when it starts, without the
+store lock, so searches and writes carry on; rows written meanwhile are
+filed before the new index is swapped in. The index is saved next to the
+segments and catches up with rows written since on open.
+
+Filtered queries pick a strategy by selectivity. When the filter matches
+no more rows than an IVF probe would scan, the matching rows are selected
+from the sidecar (common fields have SQLite expression indexes) and scored
+exactly, so a narrow filter is cheaper than an unfiltered search. Broader
+filters go through the index: over-fetched candidates are checked against
+the filter, and ``nprobe`` doubles until enough of them match. Chunks
+stored before ``fetched_at`` was recorded are dated to when the store is
+first opened, so max-age filters do not exclude them forever. Tenant stores
+are complete stores under ``tenants/<name>/``.
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from src.vectordb.base import VectorStore
+from src.vectordb.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_TOKENS
+from src.vectordb.embedders import DEFAULT_MODEL_NAME
+from src.vectordb.filters import Where, field_expression, to_sql
+from src.vectordb.ivf import DEFAULT_NPROBE, TRAINING_POINTS_PER_LIST, IVFIndex, default_n_lists
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_ROWS = 65536
+METADATA_FILE = "metadata.sqlite"
+SEGMENT_DIR = "segments"
+TENANT_DIR = "tenants"
+INDEXED_FIELDS = ("source", "domain", "fetched_at")
+INDEX_FILE = "ivf.npz"
+DEFAULT_ANN_MIN_ROWS = 200_000
+# PQ candidates reranked exactly per requested result.
+PQ_RERANK_FACTOR = 10
+# Extra IVF candidates fetched per result when a filter will discard some.
+FILTER_OVERFETCH = 4
+# Stay under SQLite's bound-parameter limit on older builds.
+SQL_BATCH = 500
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_rows(rows: np.ndarray, scores: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``n`` best (row, score) pairs, best first."""
+    if len(scores) > n:
+        keep = np.argpartition(-scores, n - 1)[:n]
+        rows, scores = rows[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store for research documents on memory-mapped NumPy segments."""
+
+    def __init__(
+        self,
+        path: str = "./vector_index",
+        model_name: str = DEFAULT_MODEL_NAME,
+        embedding_backend: Optional[str] = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        segment_rows: int = DEFAULT_SEGMENT_ROWS,
+        nprobe: Optional[int] = None,
+        ann_min_rows: Optional[int] = None,
+        pq_subvectors: Optional[int] = None,
+    ):
+        super().__init__(model_name, embedding_backend, chunk_tokens, chunk_overlap)
+        self.path = str(path)
+        os.makedirs(os.path.join(self.path, SEGMENT_DIR), exist_ok=True)
+        self._lock = threading.RLock()
+        self._maps: Dict[int, np.ndarray] = {}
+        self._db = sqlite3.connect(
+            os.path.join(self.path, METADATA_FILE), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+            """
+        )
+        for field in INDEXED_FIELDS:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS chunks_{field} ON chunks ({field_expression(field)})")
+        # Chunks written before fetched_at was recorded would fail every
+        # max-age filter; date them to now, as if just fetched.
+        self._db.execute(
+            f"UPDATE chunks SET metadata = json_set(metadata, '$.fetched_at', ?) "
+            f"WHERE {field_expression('fetched_at')} IS NULL",
+            (time.time(),),
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        settings = dict(self._db.execute("SELECT key, value FROM settings").fetchall())
+        self.dims: Optional[int] = int(settings["dims"]) if "dims" in settings else None
+        # The segment size of an existing store wins: row -> segment mapping depends on it.
+        self.segment_rows = int(settings.get("segment_rows", segment_rows))
+        self._db.execute(
+            "INSERT OR IGNORE INTO settings (key, value) VALUES ('segment_rows', ?)", (str(self.segment_rows),)
+        )
+        self._rows = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        self._repair()
+        self.nprobe = nprobe or int(os.getenv("VECTOR_ANN_NPROBE", str(DEFAULT_NPROBE)))
+        # 0 leaves the index to explicit build_index() calls.
+        self.ann_min_rows = ann_min_rows if ann_min_rows is not None else int(
+            os.getenv("VECTOR_ANN_MIN_ROWS", str(DEFAULT_ANN_MIN_ROWS))
+        )
+        self.pq_subvectors = pq_subvectors if pq_subvectors is not None else int(os.getenv("VECTOR_ANN_PQ", "0"))
+        self._index_dirty = False
+        self._index_builder: Optional[threading.Thread] = None
+        self.index: Optional[IVFIndex] = self._load_index()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, SEGMENT_DIR, f"{segment:06d}.f32")
+
+    def _segment_sizes(self) -> List[int]:
+        """Committed rows in each segment."""
+        full, tail = divmod(self._rows, self.segment_rows)
+        return [self.segment_rows] * full + ([tail] if tail else [])
+
+    def _repair(self) -> None:
+        """Make the segment files agree with the committed metadata rows."""
+        row_bytes = (self.dims or 0) * 4
+        # Rows whose vectors were lost (e.g. a crash before the OS flushed
+        # them) are dropped from the metadata.
+        available = 0
+        for segment, rows in enumerate(self._segment_sizes()):
+            path = self._segment_path(segment)
+            on_disk = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+            available += min(rows, on_disk)
+            if on_disk < rows:
+                break
+        if available < self._rows:
+            self._db.execute("DELETE FROM chunks WHERE row >= ?", (available,))
+            self._rows = available
+        sizes = self._segment_sizes()
+        for name in os.listdir(os.path.join(self.path, SEGMENT_DIR)):
+            if not name.endswith(".f32"):
+                continue
+            segment = int(name.split(".")[0])
+            path = self._segment_path(segment)
+            if segment >= len(sizes):
+                os.remove(path)
+            elif os.path.getsize(path) != sizes[segment] * row_bytes:
+                os.truncate(path, sizes[segment] * row_bytes)
+        self._maps.clear()
+
+    def _index_path(self, directory: Optional[str] = None) -> str:
+        return os.path.join(directory or self.path, INDEX_FILE)
+
+    def _load_index(self) -> Optional[IVFIndex]:
+        path = self._index_path()
+        if not os.path.exists(path):
+            return None
+        index = IVFIndex.load(path)
+        if len(index) > self._rows or index.centroids.shape[1] != self.dims:
+            # Covers rows that were cut off by _repair; retrain later.
+            os.remove(path)
+            return None
+        if len(index) < self._rows:
+            missing = np.arange(len(index), self._rows)
+            index.add(missing, self._gather(missing))
+            self._index_dirty = True
+        return index
+
+    def count(self) -> int:
+        return self._rows
+
+    def _select(self, sql: str, column: str, values: Sequence) -> List[tuple]:
+        rows: List[tuple] = []
+        with self._lock:
+            for start in range(0, len(values), SQL_BATCH):
+                batch = list(values[start:start + SQL_BATCH])
+                placeholders = ", ".join("?" * len(batch))
+                rows.extend(self._db.execute(f"{sql} WHERE {column} IN ({placeholders})", batch).fetchall())
+        return rows
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        return {row[0] for row in self._select("SELECT id FROM chunks", "id", ids)}
+
+    def _write(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict]) -> None:
+        vectors = normalize(embeddings)
+        with self._lock:
+            if self.dims is None:
+                self.dims = int(vectors.shape[1])
+                self._db.execute("INSERT INTO settings (key, value) VALUES ('dims', ?)", (str(self.dims),))
+            elif vectors.shape[1] != self.dims:
+                raise ValueError(f"Embedding has {vectors.shape[1]} dimensions; this store holds {self.dims}")
+            existing = self._existing_ids(ids)
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+            if not keep:
+                return
+            start = self._rows
+            try:
+                self._append_vectors(start, vectors[keep])
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT INTO chunks (row, id, content, metadata) VALUES (?, ?, ?, ?)",
+                    [(start + n, ids[i], texts[i], json.dumps(metadatas[i])) for n, i in enumerate(keep)],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                self._repair()
+                raise
+            self._rows += len(keep)
+            if self.index is not None:
+                self.index.add(np.arange(start, self._rows), vectors[keep])
+                self._index_dirty = True
+            elif self.ann_min_rows and self._rows >= self.ann_min_rows and self._index_builder is None:
+                # k-means takes minutes at this size; don't hold up the writer.
+                self._index_builder = threading.Thread(target=self._build_index_in_background, daemon=True)
+                self._index_builder.start()
+
+    def wait_for_index(self, timeout: Optional[float] = None) -> Optional[IVFIndex]:
+        """Block until a background index build finishes; returns the current index."""
+        builder = self._index_builder
+        if builder is not None:
+            builder.join(timeout)
+        return self.index
+
+    def _build_index_in_background(self) -> None:
+        try:
+            self.build_index()
+        except Exception:
+            logger.exception("Building the IVF index for %s failed", self.path)
+        finally:
+            with self._lock:
+                self._index_builder = None
+
+    def _touch(self, fetched_at: Dict[str, float]) -> None:
+        if not fetched_at:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "UPDATE chunks SET metadata = json_set(metadata, '$.fetched_at', ?1) "
+                    "WHERE id = ?2 AND COALESCE(json_extract(metadata, '$.fetched_at'), 0) < ?1",
+                    [(float(when), doc_id) for doc_id, when in fetched_at.items()],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                raise
+
+    def build_index(self, n_lists: Optional[int] = None, pq_subvectors: Optional[int] = None, seed: int = 0) -> IVFIndex:
+        """Train an IVF index on a sample of the stored vectors and file every row in it.
+
+        Only the swap at the end takes the store lock; the current index (or
+        exact search) keeps serving queries while this runs.
+        """
+        with self._lock:
+            rows = self._rows
+            if not rows:
+                raise ValueError("Cannot build an index over an empty store")
+            # Rows below ``rows`` never change, so they can be read unlocked.
+            segments = self._segments()
+        n_lists = n_lists or default_n_lists(rows)
+        pq_subvectors = self.pq_subvectors if pq_subvectors is None else pq_subvectors
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(rows, size=min(rows, n_lists * TRAINING_POINTS_PER_LIST), replace=False))
+        index = IVFIndex.train(self._gather(sample), n_lists, pq_subvectors, seed=seed)
+        for first_row, matrix in segments:
+            index.add(np.arange(first_row, first_row + len(matrix)), matrix)
+        with self._lock:
+            if self._rows > rows:
+                written = np.arange(rows, self._rows)
+                index.add(written, self._gather(written))
+            index.save(self._index_path())
+            self.index = index
+            self._index_dirty = False
+        return index
+
+    def _append_vectors(self, row: int, vectors: np.ndarray) -> None:
+        offset = 0
+        while offset < len(vectors):
+            segment, position = divmod(row, self.segment_rows)
+            part = vectors[offset:offset + self.segment_rows - position]
+            with open(self._segment_path(segment), "ab") as f:
+                f.write(np.ascontiguousarray(part).tobytes())
+            row += len(part)
+            offset += len(part)
+
+    def _segments(self) -> List[Tuple[int, np.ndarray]]:
+        """(first row, mapped matrix) per segment; full segments are mapped once."""
+        with self._lock:
+            segments = []
+            for segment, rows in enumerate(self._segment_sizes()):
+                matrix = self._maps.get(segment)
+                if matrix is None or matrix.shape[0] != rows:
+                    matrix = np.memmap(self._segment_path(segment), dtype=np.float32, mode="r", shape=(rows, self.dims))
+                    self._maps[segment] = matrix
+                segments.append((segment * self.segment_rows, matrix))
+            return segments
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """Stored vectors for ``rows``, in the given order."""
+        vectors = np.empty((len(rows), self.dims), dtype=np.float32)
+        segments = self._segments()
+        owners = rows // self.segment_rows
+        for segment in np.unique(owners):
+            mask = owners == segment
+            first_row, matrix = segments[segment]
+            vectors[mask] = matrix[rows[mask] - first_row]
+        return vectors
+
+    def _score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Exact similarities of ``rows`` to a unit query."""
+        scores = np.empty(len(rows), dtype=np.float32)
+        segments = self._segments()
+        owners = rows // self.segment_rows
+        for segment in np.unique(owners):
+            mask = owners == segment
+            first_row, matrix = segments[segment]
+            local = rows[mask] - first_row
+            # Past half a segment a full sequential pass beats random reads.
+            scores[mask] = (matrix @ query)[local] if 2 * len(local) > len(matrix) else matrix[local] @ query
+        return scores
+
+    def filter_rows(self, where: Where, limit: Optional[int] = None) -> np.ndarray:
+        """Rows whose metadata matches ``where``, ascending; at most ``limit`` of them."""
+        sql, params = to_sql(where)
+        if limit is not None:
+            sql, params = f"{sql} LIMIT ?", [*params, limit]
+        with self._lock:
+            # No ORDER BY: it makes SQLite scan the table instead of using the
+            # field indexes, and sorting in numpy is cheaper anyway.
+            rows = self._db.execute(f"SELECT row FROM chunks WHERE {sql}", params).fetchall()
+        return np.sort(np.fromiter((row for row, in rows), dtype=np.int64, count=len(rows)))
+
+    def _matching(self, rows: np.ndarray, where: Where) -> np.ndarray:
+        """The subset of ``rows`` whose metadata matches ``where``."""
+        sql, params = to_sql(where)
+        matched: List[int] = []
+        with self._lock:
+            for start in range(0, len(rows), SQL_BATCH):
+                batch = [int(row) for row in rows[start:start + SQL_BATCH]]
+                placeholders = ", ".join("?" * len(batch))
+                matched.extend(row for row, in self._db.execute(
+                    f"SELECT row FROM chunks WHERE row IN ({placeholders}) AND {sql}", [*batch, *params]
+                ))
+        return np.asarray(matched, dtype=np.int64)
+
+    def nearest_rows(
+        self,
+        embedding: Sequence[float],
+        n_results: int,
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+        where: Optional[Where] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and cosine similarities of the closest vectors, best first.
+
+        Goes through the IVF index when one is built, unless ``exact``.
+        With ``where`` a filter matching no more rows than a probe would scan
+        is answered by scoring those rows exactly; a broader one filters the
+        index's candidates, widening ``nprobe`` until ``n_results`` match.
+        """
+        query = normalize(embedding)
+        nprobe = nprobe or self.nprobe
+        if where is not None:
+            index = None if exact else self.index
+            if index is None:
+                rows = self.filter_rows(where)
+                return top_rows(rows, self._score_rows(rows, query), n_results)
+            probe_rows = max(n_results * PQ_RERANK_FACTOR, len(index) * nprobe // index.n_lists)
+            rows = self.filter_rows(where, limit=probe_rows + 1)
+            if len(rows) <= probe_rows:
+                return top_rows(rows, self._score_rows(rows, query), n_results)
+            return self._nearest_filtered(index, query, n_results, nprobe, where)
+        if self.index is not None and not exact:
+            candidates = self.index.search(query, nprobe, n_results * PQ_RERANK_FACTOR)
+            return top_rows(candidates, self._score_rows(candidates, query), n_results)
+
+        rows: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        for first_row, matrix in self._segments():
+            best, similarities = top_rows(np.arange(len(matrix)), matrix @ query, n_results)
+            rows.append(best + first_row)
+            scores.append(similarities)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return top_rows(np.concatenate(rows), np.concatenate(scores), n_results)
+
+    def _nearest_filtered(
+        self, index: IVFIndex, query: np.ndarray, n_results: int, nprobe: int, where: Where
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        n_candidates = n_results * PQ_RERANK_FACTOR * FILTER_OVERFETCH
+        while True:
+            rows = self._matching(index.search(query, nprobe, n_candidates), where)
+            if len(rows) >= n_results or nprobe >= index.n_lists:
+                return top_rows(rows, self._score_rows(rows, query), n_results)
+            nprobe *= 2
+            n_candidates *= 2
+
+    def _nearest(self, embedding: Sequence[float], n_results: int, where: Optional[Where] = None) -> List[Dict]:
+        rows, scores = self.nearest_rows(embedding, n_results, where=where)
+        best = [int(row) for row in rows]
+        records = {
+            row: (doc_id, content, metadata)
+            for row, doc_id, content, metadata in self._select("SELECT row, id, content, metadata FROM chunks", "row", best)
+        }
+        docs = []
+        for row, similarity in zip(best, scores):
+            doc_id, content, metadata = records[row]
+            docs.append({
+                "id": doc_id,
+                "content": content,
+                "metadata": json.loads(metadata),
+                "similarity": float(similarity),
+            })
+        return docs
+
+    def _fetch(self, ids: List[str]) -> List[Dict]:
+        return [
+            {"id": doc_id, "content": content, "metadata": json.loads(metadata)}
+            for doc_id, content, metadata in self._select("SELECT id, content, metadata FROM chunks", "id", ids)
+        ]
+
+    def _pages(self, page_size: int) -> Iterator[List[Tuple[str, str]]]:
+        last_row = -1
+        while True:
+            with self._lock:
+                page = self._db.execute(
+                    "SELECT row, id, content FROM chunks WHERE row > ? ORDER BY row LIMIT ?", (last_row, page_size)
+                ).fetchall()
+            if not page:
+                return
+            last_row = page[-1][0]
+            yield [(doc_id, content) for _, doc_id, content in page]
+
+    def _open_tenant(self, tenant: str) -> "NumpyVectorStore":
+        return NumpyVectorStore(
+            path=os.path.join(self.path, TENANT_DIR, tenant),
+            model_name=self.model_name,
+            embedding_backend=self.embedding_backend,
+            chunk_tokens=self.chunk_tokens,
+            chunk_overlap=self.chunk_overlap,
+            segment_rows=self.segment_rows,
+            nprobe=self.nprobe,
+            ann_min_rows=self.ann_min_rows,
+            pq_subvectors=self.pq_subvectors,
+        )
+
+    def snapshot(self, dest: str) -> None:
+        """Copy a consistent image of the store, tenants included, to the directory ``dest``."""
+        tenant_root = os.path.join(self.path, TENANT_DIR)
+        for tenant in sorted(os.listdir(tenant_root)) if os.path.isdir(tenant_root) else []:
+            self.for_tenant(tenant).snapshot(os.path.join(dest, TENANT_DIR, tenant))
+        with self._lock:
+            os.makedirs(os.path.join(dest, SEGMENT_DIR), exist_ok=True)
+            target = sqlite3.connect(os.path.join(dest, METADATA_FILE))
+            try:
+                self._db.backup(target)
+            finally:
+                target.close()
+            # Files only grow and hold no uncommitted rows while the lock is held.
+            for segment in range(len(self._segment_sizes())):
+                shutil.copyfile(self._segment_path(segment), os.path.join(dest, SEGMENT_DIR, f"{segment:06d}.f32"))
+            if self.index is not None:
+                self.index.save(self._index_path(dest))
+
+    def close(self) -> None:
+        with self._tenants_lock:
+            for store in self._tenants.values():
+                store.close()
+            self._tenants.clear()
+        with self._lock:
+            if self.index is not None and self._index_dirty:
+                self.index.save(self._index_path())
+            self._maps.clear()
+            self._db.close()
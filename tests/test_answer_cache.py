@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.cache.answer_cache import SemanticAnswerCache  # noqa: E402
+
+VOCAB = ["rag", "retrieval", "work", "how", "does", "pasta", "recipe", "cook"]
+
+
+def embed(texts):
+    """Bag-of-words over a tiny vocabulary; paraphrases share most words."""
+    return np.array([[text.lower().split().count(word) for word in VOCAB] for text in texts], dtype=np.float32)
+
+
+def result(name):
+    return {"query": name, "synthesis": {"title": name}}
+
+
+def test_paraphrase_hits_and_unrelated_misses():
+    cache = SemanticAnswerCache(embed, threshold=0.8)
+    assert cache.store("how does rag retrieval work", result("rag"), quality=0.8)
+    hit = cache.lookup("How does RAG retrieval work")
+    assert hit.result["synthesis"]["title"] == "rag"
+    assert hit.similarity == pytest.approx(1.0)
+    assert 0 <= hit.age_seconds < 5
+    assert cache.lookup("pasta recipe") is None
+
+
+def test_low_quality_results_are_not_admitted():
+    cache = SemanticAnswerCache(embed, min_quality=0.5)
+    assert not cache.store("rag", result("weak"), quality=0.2)
+    assert len(cache) == 0
+
+
+def test_eviction_prefers_low_quality_and_expiry_drops_old(monkeypatch):
+    cache = SemanticAnswerCache(embed, max_entries=2, threshold=0.99)
+    cache.store("rag retrieval", result("good"), quality=0.9)
+    cache.store("pasta recipe", result("weak"), quality=0.55)
+    cache.store("cook", result("new"), quality=0.7)
+    assert cache.lookup("pasta recipe") is None
+    assert cache.lookup("rag retrieval").result["query"] == "good"
+
+    cache.ttl_seconds = -1
+    assert cache.lookup("cook") is None
+    assert len(cache) == 0
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    SemanticAnswerCache(embed, path=path).store("rag retrieval", result("rag"), quality=0.9)
+    reopened = SemanticAnswerCache(embed, path=path)
+    assert reopened.lookup("retrieval rag").result["query"] == "rag"
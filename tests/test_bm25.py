@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.vectordb.bm25 import BM25Index, reciprocal_rank_fusion, tokenize  # noqa: E402
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("Error E1234: ERR_CONN_RESET in v1.2.3 (gpt-4o).") == [
+        "error", "e1234", "err_conn_reset", "in", "v1.2.3", "gpt-4o",
+    ]
+
+
+def test_rare_terms_outrank_common_ones():
+    index = BM25Index()
+    index.add("a", "the cache stores the results")
+    index.add("b", "the results of error E1234 in the cache")
+    index.add("c", "the weather today")
+    assert [doc_id for doc_id, _ in index.search("E1234 cache")] == ["b", "a"]
+    assert index.search("unknown") == []
+
+
+def test_add_is_idempotent_per_id():
+    index = BM25Index()
+    assert index.add("a", "alpha beta")
+    assert not index.add("a", "alpha beta")
+    assert index.stats() == {"documents": 1, "terms": 2, "postings": 2}
+
+
+def test_search_returns_top_k_in_order():
+    index = BM25Index()
+    index.add_many((str(i), "token " * (i + 1) + "filler " * 5) for i in range(100))
+    results = index.search("token", n_results=5)
+    assert len(results) == 5
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    assert results[0][0] == "99"
+
+
+def test_concurrent_adds_and_searches():
+    index = BM25Index()
+    errors = []
+
+    def writer(offset):
+        for i in range(200):
+            index.add(f"{offset}-{i}", f"shared term{i % 7}")
+
+    def reader():
+        try:
+            for _ in range(200):
+                index.search("shared term3", 5)
+        except Exception as exc:  # pragma: no cover - surfaced by the assert
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(3)] + [threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(index) == 600
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], k=60)
+    assert fused[0][0] == "b"
+    assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.cache import llm_cache, search_cache
+from src.cache.llm_cache import LLMResponseCache, llm_cache_key
+from src.cache.search_cache import CachedSearchError, SearchCache, classify_query
+from src.cache.tiered import TieredCache
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = TieredCache("test-lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_disk_tier_survives_new_instance_and_expires(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    TieredCache("test-disk", path=path).set("key", {"value": [1, 2]})
+    reopened = TieredCache("test-disk", path=path)
+    assert reopened.get("key") == {"value": [1, 2]}
+    assert reopened.stats.disk_hits >= 1
+
+    reopened.set("short", "gone", ttl_seconds=-1)
+    assert TieredCache("test-disk", path=path).get("short") is None
+
+
+def test_async_access_reads_and_writes_the_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    async def scenario():
+        cache = LLMResponseCache(TieredCache("test-async", path=path))
+        await cache.set_async("cached text", model="m", messages=[{"role": "user", "content": "hi"}])
+        return await cache.get_async(model="m", messages=[{"role": "user", "content": "hi"}])
+
+    assert asyncio.run(scenario()) == "cached text"
+    assert TieredCache("test-async", path=path).get(llm_cache_key("m", [{"role": "user", "content": "hi"}])) == "cached text"
+
+
+def test_llm_cache_key_covers_generation_parameters(tmp_path):
+    messages = [{"role": "user", "content": "What is RAG?"}]
+    assert llm_cache_key("m", messages, 0.7, 100) == llm_cache_key("m", [dict(messages[0])], 0.7, 100)
+    assert llm_cache_key("m", messages, 0.7, 100) != llm_cache_key("m", messages, 0.2, 100)
+
+    cache = LLMResponseCache(TieredCache("test-llm", path=str(tmp_path / "llm.sqlite")))
+    cache.set("answer", model="m", messages=messages, max_tokens=100)
+    assert cache.get(model="m", messages=messages, max_tokens=100) == "answer"
+    assert cache.get(model="m", messages=messages, max_tokens=200) is None
+
+
+def test_search_cache_normalizes_and_revalidates_stale_hits():
+    assert classify_query("latest ai news") == "news"
+    assert classify_query("what is rag") == "evergreen"
+
+    cache = SearchCache(TieredCache("test-search"), freshness_seconds={"evergreen": 0.01})
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return [{"url": f"https://example.com/{len(calls)}"}]
+
+    assert cache.search("What is RAG?", 3, fetch) == [{"url": "https://example.com/1"}]
+    assert cache.search("  what is   rag ", 3, fetch) == [{"url": "https://example.com/1"}]
+    assert len(calls) == 1
+
+    time.sleep(0.02)
+    # Stale hit: old results come back immediately while a refresh runs.
+    assert cache.search("what is rag", 3, fetch) == [{"url": "https://example.com/1"}]
+    for _ in range(100):
+        if len(calls) == 2 and cache.lookup("what is rag", 3)[0] == [{"url": "https://example.com/2"}]:
+            break
+        time.sleep(0.01)
+    assert cache.lookup("what is rag", 3)[0] == [{"url": "https://example.com/2"}]
+
+    def failing():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        cache.search("outage", 3, failing)
+    with pytest.raises(CachedSearchError):
+        cache.search("outage", 3, fetch)
+
+
+def test_failed_bypass_fetch_keeps_the_cached_results():
+    cache = SearchCache(TieredCache("test-search-bypass"))
+    cache.search("rag", 3, lambda: [{"url": "https://example.com/good"}])
+
+    def failing():
+        raise RuntimeError("provider down")
+
+    async def failing_async():
+        failing()
+
+    with pytest.raises(RuntimeError):
+        cache.search("rag", 3, failing, bypass=True)
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.search_async("rag", 3, failing_async, bypass=True))
+    assert cache.lookup("rag", 3)[0] == [{"url": "https://example.com/good"}]
+
+
+def concurrent_calls(factory, n=8):
+    barrier = threading.Barrier(n)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(factory())
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_llm_cache_singleton_is_built_once_across_threads(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    monkeypatch.setattr(llm_cache, "LLMResponseCache", lambda cache: time.sleep(0.01) or object())
+    assert len({id(cache) for cache in concurrent_calls(llm_cache.get_llm_cache)}) == 1
+
+
+def test_search_cache_singleton_is_built_once_across_threads(monkeypatch):
+    monkeypatch.setenv("SEARCH_CACHE_PATH", "")
+    monkeypatch.setattr(search_cache, "_search_cache", None)
+    monkeypatch.setattr(search_cache, "SearchCache", lambda cache, **kwargs: time.sleep(0.01) or object())
+    assert len({id(cache) for cache in concurrent_calls(search_cache.get_search_cache)}) == 1
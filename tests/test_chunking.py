@@ -0,0 +1,27 @@
+from src.vectordb.chunking import iter_chunks
+
+
+def test_short_text_is_one_chunk():
+    chunks = list(iter_chunks("One sentence only.", max_tokens=50))
+    assert [(c.index, c.text) for c in chunks] == [(0, "One sentence only.")]
+    assert list(iter_chunks("", max_tokens=50)) == []
+
+
+def test_chunks_respect_budget_overlap_and_sentences():
+    text = " ".join(f"Sentence number {i} is here." for i in range(100))
+    chunks = list(iter_chunks(text, max_tokens=40, overlap=8))
+    assert len(chunks) > 10
+    for chunk in chunks:
+        assert len(chunk.text.split()) <= 40
+        assert chunk.text == text[chunk.start:chunk.end]
+    # Boundaries snap to sentence ends, and consecutive chunks overlap.
+    assert all(chunk.text.endswith(".") for chunk in chunks)
+    assert all(nxt.start < cur.end for cur, nxt in zip(chunks, chunks[1:]))
+    assert chunks[-1].end == len(text)
+
+
+def test_text_without_sentence_breaks_still_splits():
+    text = "word " * 1000
+    chunks = list(iter_chunks(text, max_tokens=100, overlap=10))
+    assert len(chunks) == 11
+    assert chunks[-1].text.endswith("word")
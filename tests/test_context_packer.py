@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.observability.metrics import estimate_tokens  # noqa: E402
+from src.vectordb.context_packer import minhash, pack_context  # noqa: E402
+
+ARTICLE = " ".join(f"Fact {i} about vector databases is stated here." for i in range(40))
+
+
+def hit(title, content, similarity):
+    return {"content": content, "metadata": {"title": title}, "similarity": similarity}
+
+
+def test_orders_by_relevance_and_fits_budget():
+    docs = [hit("low", "Low relevance passage.", 0.2), hit("high", ARTICLE, 0.9)]
+    packed = pack_context(docs, token_budget=120)
+    assert packed.text.startswith("Source: high\n")
+    assert packed.tokens <= 120
+    assert packed.truncated and packed.used == 1
+    # Trimmed at a sentence boundary.
+    assert packed.text.endswith(".")
+
+
+def test_keeps_packing_after_a_trimmed_or_oversized_passage():
+    docs = [
+        hit("high", ARTICLE, 0.9),
+        hit("run-on", "word " * 50, 0.5),
+        hit("low", "Low relevance passage.", 0.2),
+    ]
+    packed = pack_context(docs, token_budget=128)
+    assert packed.truncated and packed.used == 2
+    assert "Source: run-on" not in packed.text
+    assert packed.text.endswith("Source: low\nLow relevance passage.")
+    assert packed.tokens <= 128
+
+
+def test_drops_near_duplicates():
+    mirror = ARTICLE.replace("Fact 3 ", "Fact three ")
+    docs = [hit("a", ARTICLE, 0.9), hit("mirror", mirror, 0.8), hit("other", "Something else entirely.", 0.5)]
+    packed = pack_context(docs, token_budget=5000)
+    assert packed.duplicates == 1
+    assert "Source: mirror" not in packed.text and "Source: other" in packed.text
+    assert pack_context(docs, token_budget=5000, dedupe_threshold=None).used == 3
+
+
+def test_raw_sources_and_custom_template():
+    sources = [{"title": "T", "content": "One. Two.", "score": 0.4}]
+    packed = pack_context(sources, token_budget=50, template="- {title}: {content}", separator="\n")
+    assert packed.text == "- T: One. Two."
+    assert packed.tokens == estimate_tokens(packed.text)
+
+
+def test_oversized_single_sentence_is_cut():
+    packed = pack_context([hit("long", "word " * 500, 1.0)], token_budget=40)
+    assert packed.used == 1 and packed.tokens <= 40
+
+
+def test_minhash_similarity_tracks_overlap():
+    same = (minhash(ARTICLE) == minhash(ARTICLE)).mean()
+    different = (minhash(ARTICLE) == minhash("completely unrelated words about cooking pasta tonight")).mean()
+    assert same == 1.0 and different < 0.2
@@ -0,0 +1,70 @@
+import asyncio
+
+from src.api.events import EventBus
+
+
+async def collect(bus, job_id, last_event_id=None):
+    return [event async for event in bus.subscribe(job_id, last_event_id, heartbeat_seconds=5)]
+
+
+def test_subscribers_receive_pushed_events_then_stop():
+    async def scenario():
+        bus = EventBus()
+        bus.open("job", {"status": "pending", "progress": 0.0})
+        watchers = [asyncio.create_task(collect(bus, "job")) for _ in range(3)]
+        await asyncio.sleep(0)
+        bus.publish("job", "agent_started", status="running", current_agent="researcher", progress=0.25)
+        bus.publish("job", "completed", status="completed", progress=1.0)
+        bus.close("job")
+        return await asyncio.gather(*watchers)
+
+    for events in asyncio.run(scenario()):
+        assert [e.data["event"] for e in events] == ["snapshot", "agent_started", "completed"]
+        assert events[1].data["current_agent"] == "researcher"
+        assert events[2].data["progress"] == 1.0
+
+
+def test_last_event_id_replays_missed_events():
+    async def scenario():
+        bus = EventBus()
+        bus.open("job")
+        first = bus.publish("job", "agent_started", current_agent="researcher")
+        bus.publish("job", "agent_finished", {"agent": "researcher"})
+        bus.close("job")
+        return first, await collect(bus, "job", last_event_id=first.id)
+
+    first, events = asyncio.run(scenario())
+    assert [e.data["event"] for e in events] == ["agent_finished"]
+    assert events[0].id == first.id + 1
+
+
+def test_resume_outside_replay_buffer_starts_with_snapshot():
+    async def scenario():
+        bus = EventBus(history_size=2)
+        bus.open("job")
+        for progress in (0.25, 0.5, 0.75):
+            bus.publish("job", "agent_started", progress=progress)
+        bus.close("job")
+        return await collect(bus, "job", last_event_id=1)
+
+    events = asyncio.run(scenario())
+    assert events[0].data == {"event": "snapshot", "progress": 0.75}
+    assert len(events) == 1
+
+
+def test_events_published_while_subscriber_is_paused_are_delivered():
+    async def scenario():
+        bus = EventBus()
+        bus.open("job")
+        subscriber = bus.subscribe("job", heartbeat_seconds=5)
+        events = [await subscriber.__anext__()]
+        bus.publish("job", "agent_started")
+        events.append(await subscriber.__anext__())
+        # The subscriber is suspended at the yield of agent_started.
+        bus.publish("job", "completed", status="completed")
+        bus.close("job")
+        events.extend([event async for event in subscriber])
+        return events
+
+    events = asyncio.run(scenario())
+    assert [e.data["event"] for e in events] == ["snapshot", "agent_started", "completed"]
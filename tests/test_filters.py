@@ -0,0 +1,50 @@
+import json
+import sqlite3
+
+import pytest
+
+from src.vectordb.filters import matches, normalize_where, to_sql
+
+ROWS = [
+    {"source": "web", "domain": "arxiv.org", "fetched_at": 100.0},
+    {"source": "web", "domain": "github.com", "fetched_at": 200.0},
+    {"source": "vector_store", "domain": "arxiv.org", "fetched_at": 300.0},
+    {"source": "upload"},
+]
+FILTERS = [
+    {"source": "web"},
+    {"domain": {"$ne": "arxiv.org"}},
+    {"fetched_at": {"$gte": 150}, "source": {"$in": ["web", "upload"]}},
+    {"$or": [{"domain": "github.com"}, {"fetched_at": {"$lt": 150}}]},
+    {"source": {"$nin": ["web"]}},
+    {"source": {"$in": []}},
+]
+
+
+@pytest.mark.parametrize("where", FILTERS)
+def test_sql_translation_agrees_with_python_evaluation(where):
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, metadata TEXT)")
+    db.executemany("INSERT INTO chunks VALUES (?, ?)", [(i, json.dumps(row)) for i, row in enumerate(ROWS)])
+    sql, params = to_sql(where)
+    from_sql = [row for row, in db.execute(f"SELECT row FROM chunks WHERE {sql} ORDER BY row", params)]
+    assert from_sql == [i for i, row in enumerate(ROWS) if matches(row, where)]
+
+
+def test_missing_fields_never_match():
+    assert not matches({"source": "upload"}, {"domain": {"$ne": "arxiv.org"}})
+    assert not matches({}, {"fetched_at": {"$lt": 10}})
+
+
+def test_normalize_where_produces_strict_chroma_filters():
+    assert normalize_where({"source": "web"}) == {"source": {"$eq": "web"}}
+    assert normalize_where({"source": "web", "fetched_at": {"$gte": 5}}) == {
+        "$and": [{"source": {"$eq": "web"}}, {"fetched_at": {"$gte": 5}}]
+    }
+    assert normalize_where({"$or": [{"domain": "a.com"}]}) == {"domain": {"$eq": "a.com"}}
+
+
+@pytest.mark.parametrize("where", [{}, {"source": {"$like": "w%"}}, {"bad field": 1}, {"$and": []}, {"source": {"$in": "web"}}])
+def test_invalid_filters_are_rejected(where):
+    with pytest.raises(ValueError):
+        to_sql(where)
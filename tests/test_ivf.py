@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.vectordb.ivf import IVFIndex, assign, default_n_lists, kmeans  # noqa: E402
+from src.vectordb.numpy_store import NumpyVectorStore, normalize  # noqa: E402
+
+
+def clustered(n=2000, dims=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims))
+    points = centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dims))
+    return normalize(points)
+
+
+def exact_top(vectors, query, k):
+    return set(np.argsort(-(vectors @ query))[:k])
+
+
+def test_kmeans_recovers_separated_clusters():
+    points = np.concatenate([np.full((50, 2), [5.0, 0.0]), np.full((50, 2), [0.0, 5.0])]).astype(np.float32)
+    centroids = kmeans(points, 2, spherical=False)
+    labels = assign(points, centroids, spherical=False)
+    assert len(set(labels[:50])) == 1 and len(set(labels[50:])) == 1 and labels[0] != labels[-1]
+
+
+def test_probing_every_list_is_exact_and_fewer_lists_scan_less():
+    vectors = clustered()
+    index = IVFIndex.train(vectors, n_lists=16)
+    index.add(np.arange(len(vectors)), vectors)
+    query = vectors[7]
+
+    assert set(index.search(query, nprobe=16)) == set(range(len(vectors)))
+    candidates = index.search(query, nprobe=2)
+    assert len(candidates) < len(vectors) // 2
+    assert 7 in candidates
+
+
+def test_product_quantized_candidates_keep_most_true_neighbours(tmp_path):
+    vectors = clustered(dims=32)
+    index = IVFIndex.train(vectors, n_lists=8, pq_subvectors=8)
+    index.add(np.arange(len(vectors)), vectors)
+    path = str(tmp_path / "ivf.npz")
+    index.save(path)
+    restored = IVFIndex.load(path)
+    assert len(restored) == len(vectors) and restored.pq_subvectors == 8
+
+    recall = []
+    for query in vectors[:20]:
+        candidates = set(restored.search(query, nprobe=8, n_candidates=100))
+        recall.append(len(candidates & exact_top(vectors, query, 10)) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_store_builds_index_past_threshold_and_catches_up_on_open(tmp_path):
+    vectors = clustered(n=600)
+    ids = [f"v{i}" for i in range(600)]
+    path = str(tmp_path / "index")
+    store = NumpyVectorStore(path=path, ann_min_rows=500, nprobe=4)
+    store.add_embeddings(ids[:400], vectors[:400], ids[:400])
+    assert store.index is None
+    store.add_embeddings(ids[400:500], vectors[400:500], ids[400:500])
+    # Training runs in the background; the writer does not wait for it.
+    assert store.wait_for_index(timeout=30) is not None and store.index.n_lists == default_n_lists(500)
+    store.close()
+
+    store = NumpyVectorStore(path=path, ann_min_rows=500, nprobe=4)
+    store.add_embeddings(ids[500:], vectors[500:], ids[500:])
+    store.close()
+    store = NumpyVectorStore(path=path, ann_min_rows=500, nprobe=4)
+    assert len(store.index) == 600
+
+    query = vectors[550]
+    rows, scores = store.nearest_rows(query, 5)
+    exact_rows, _ = store.nearest_rows(query, 5, exact=True)
+    assert rows[0] == exact_rows[0] == 550
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert [hit["id"] for hit in store._nearest(query, 1)] == ["v550"]
+    store.close()
+
+
+def test_filtered_search_uses_the_index_only_for_broad_filters(tmp_path, monkeypatch):
+    vectors = clustered(n=2000)
+    ids = [f"v{i}" for i in range(2000)]
+    groups = ["rare" if i % 200 == 0 else ("even" if i % 2 == 0 else "odd") for i in range(2000)]
+    store = NumpyVectorStore(path=str(tmp_path / "index"), ann_min_rows=0, nprobe=2)
+    store.add_embeddings(ids, vectors, ids, [{"group": group} for group in groups])
+    store.build_index(n_lists=32)
+    scored = []
+    score_rows = store._score_rows
+    monkeypatch.setattr(store, "_score_rows", lambda rows, query: scored.append(len(rows)) or score_rows(rows, query))
+
+    query = vectors[10]
+    rows, _ = store.nearest_rows(query, 5, where={"group": "even"})
+    assert rows[0] == 10 and all(groups[row] == "even" for row in rows)
+    # Only probed candidates were scored, not all 990 matching rows.
+    assert scored[-1] < 990
+
+    rows, _ = store.nearest_rows(query, 5, where={"group": "rare"})
+    assert scored[-1] == 10
+    assert set(rows) <= {i for i in range(0, 2000, 200)} and len(rows) == 5
+    store.close()
+
+
+def test_writes_and_searches_proceed_while_the_index_trains(tmp_path, monkeypatch):
+    vectors = clustered(n=600)
+    ids = [f"v{i}" for i in range(600)]
+    store = NumpyVectorStore(path=str(tmp_path / "index"), ann_min_rows=500, nprobe=4)
+    training, release = threading.Event(), threading.Event()
+    train = IVFIndex.train
+
+    def slow_train(*args, **kwargs):
+        training.set()
+        release.wait(10)
+        return train(*args, **kwargs)
+
+    monkeypatch.setattr(IVFIndex, "train", slow_train)
+    store.add_embeddings(ids[:500], vectors[:500], ids[:500])
+    assert training.wait(10) and store.index is None
+    store.add_embeddings(ids[500:], vectors[500:], ids[500:])
+    assert store.nearest_rows(vectors[550], 1)[0][0] == 550
+
+    release.set()
+    assert len(store.wait_for_index(timeout=30)) == 600
+    assert store.nearest_rows(vectors[550], 1)[0][0] == 550
+    store.close()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from src.api.job_queue import JobQueue, QueueRejected
+
+
+def test_workers_cap_concurrency_and_follow_priority():
+    async def scenario():
+        started, running, peak = [], 0, 0
+        gate = asyncio.Event()
+
+        async def handler(job_id):
+            nonlocal running, peak
+            started.append(job_id)
+            running += 1
+            peak = max(peak, running)
+            await gate.wait()
+            running -= 1
+
+        queue = JobQueue(handler, workers=1, max_depth=10)
+        await queue.submit("first")
+        await asyncio.sleep(0)  # the single worker takes "first"
+        await queue.submit("low", priority="low")
+        await queue.submit("normal")
+        assert await queue.submit("high", priority="high") == 1
+        assert [queue.position(j) for j in ("high", "normal", "low", "first")] == [1, 2, 3, None]
+        gate.set()
+        while len(started) < 4:
+            await asyncio.sleep(0)
+        await queue.stop()
+        return started, peak, queue.snapshot()
+
+    started, peak, snapshot = asyncio.run(scenario())
+    assert started == ["first", "high", "normal", "low"]
+    assert peak == 1
+    assert snapshot["submitted"] == 4
+
+
+def test_admission_control_rejects_with_retry_after():
+    async def scenario():
+        blocker = asyncio.Event()
+
+        async def handler(job_id):
+            await blocker.wait()
+
+        queue = JobQueue(handler, workers=1, max_depth=3, soft_limit=1)
+        await queue.submit("running")
+        await asyncio.sleep(0)
+        await queue.submit("waiting")
+        with pytest.raises(QueueRejected) as soft:
+            await queue.submit("deferred", priority="low")
+        await queue.submit("normal-1")
+        await queue.submit("normal-2")
+        with pytest.raises(QueueRejected) as full:
+            await queue.submit("overflow", priority="high")
+        await queue.stop()
+        return soft.value, full.value
+
+    soft, full = asyncio.run(scenario())
+    assert soft.status_code == 429 and full.status_code == 503
+    assert full.retry_after >= soft.retry_after >= 1
+
+
+def test_failing_handler_does_not_kill_the_worker():
+    async def scenario():
+        done = []
+
+        async def handler(job_id):
+            if job_id == "bad":
+                raise RuntimeError("boom")
+            done.append(job_id)
+
+        queue = JobQueue(handler, workers=1)
+        await queue.submit("bad")
+        await queue.submit("good")
+        while not done:
+            await asyncio.sleep(0)
+        await queue.stop()
+        return queue.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["failed"] == 1 and snapshot["completed"] == 1
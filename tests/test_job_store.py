@@ -0,0 +1,184 @@
+import asyncio
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.api.job_store import AsyncJobStore, InMemoryJobStore, RedisJobStore, SQLiteJobStore, create_job_store
+
+
+class FakeRedis:
+    """Just enough of the redis-py client for RedisJobStore."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k.encode(): v.encode() for k, v in mapping.items()})
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def expire(self, key, seconds):
+        if key in self.data:
+            self.ttls[key] = seconds
+
+    def ttl(self, key):
+        return self.ttls.get(key, -1) if key in self.data else -2
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore(ttl_seconds=10)
+    if request.param == "sqlite":
+        return SQLiteJobStore(str(tmp_path / "jobs.db"), ttl_seconds=10)
+    return RedisJobStore(FakeRedis(), ttl_seconds=10)
+
+
+def test_status_and_result_are_stored_separately(store):
+    store.create("job-1", {"status": "pending", "progress": 0.0, "current_agent": None})
+    store.update("job-1", status="running", current_agent="researcher", progress=0.25)
+    assert store.get("job-1") == {"status": "running", "progress": 0.25, "current_agent": "researcher"}
+    assert store.get_result("job-1") is None
+
+    store.set_result("job-1", {"synthesis": {"title": "Report"}})
+    store.update("job-1", status="completed", progress=1.0, current_agent=None)
+    assert "result" not in store.get("job-1")
+    assert store.get_result("job-1") == {"synthesis": {"title": "Report"}}
+    assert "job-1" in store
+    assert "missing" not in store
+
+
+def test_finished_jobs_expire(tmp_path):
+    for store in [InMemoryJobStore(ttl_seconds=10), SQLiteJobStore(str(tmp_path / "jobs.db"), ttl_seconds=10)]:
+        store.create("done", {"status": "pending"})
+        store.create("active", {"status": "running"})
+        store.set_result("done", {"ok": True})
+        store.update("done", status="completed")
+        assert store.evict_expired(now=10**12) == 1
+        assert store.get("done") is None and store.get_result("done") is None
+        assert store.get("active") is not None
+
+
+def test_redis_store_sets_ttl_on_finish():
+    client = FakeRedis()
+    store = RedisJobStore(client, ttl_seconds=30)
+    store.create("job-1", {"status": "running"})
+    store.set_result("job-1", {"partial": True})
+    store.update("job-1", status="error", error="boom")
+    assert client.ttls == {"research:job:job-1": 30, "research:job:job-1:result": 30}
+
+
+def test_jobs_created_finished_expire_with_their_result(tmp_path):
+    # Answer-cache hits are created completed and never updated.
+    for store in [InMemoryJobStore(ttl_seconds=10), SQLiteJobStore(str(tmp_path / "jobs.db"), ttl_seconds=10)]:
+        store.create("hit", {"status": "completed"})
+        store.set_result("hit", {"ok": True})
+        assert store.evict_expired(now=10**12) == 1
+        assert store.get("hit") is None and store.get_result("hit") is None
+
+    client = FakeRedis()
+    store = RedisJobStore(client, ttl_seconds=30)
+    store.create("hit", {"status": "completed"})
+    store.set_result("hit", {"ok": True})
+    assert client.ttls == {"research:job:hit": 30, "research:job:hit:result": 30}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    create_job_store(f"sqlite:///{path}").create("job-1", {"status": "pending"})
+    assert create_job_store(f"sqlite:///{path}").get("job-1") == {"status": "pending"}
+
+
+def test_inflight_claims_coalesce_until_the_holder_finishes(store):
+    store.create("job-1", {"status": "pending"})
+    assert store.claim_inflight("key", "job-1") == "job-1"
+    store.create("job-2", {"status": "pending"})
+    assert store.claim_inflight("key", "job-2") == "job-1"
+    assert store.claim_inflight("other", "job-2") == "job-2"
+
+    store.update("job-1", status="completed")
+    store.create("job-3", {"status": "pending"})
+    assert store.claim_inflight("key", "job-3") == "job-3"
+
+    store.release_inflight("key", "job-1")  # no longer the holder
+    assert store.claim_inflight("key", "job-4") == "job-3"
+    store.release_inflight("key", "job-3")
+    store.create("job-4", {"status": "pending"})
+    assert store.claim_inflight("key", "job-4") == "job-4"
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_sqlite_restart_fails_jobs_left_running_and_frees_their_keys(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    crashed = SQLiteJobStore(path)
+    crashed.owner = f"{crashed.host}:{exited_pid()}"
+    crashed.create("job-1", {"status": "running"})
+    assert crashed.claim_inflight("key", "job-1") == "job-1"
+
+    restarted = SQLiteJobStore(path)
+    assert restarted.get("job-1")["status"] == "error"
+    restarted.create("job-2", {"status": "pending"})
+    assert restarted.claim_inflight("key", "job-2") == "job-2"
+
+
+def test_sqlite_claim_takes_over_from_a_dead_worker(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    live = SQLiteJobStore(path)
+    dead = SQLiteJobStore(path)
+    dead.owner = f"{dead.host}:{exited_pid()}"
+    dead.create("job-1", {"status": "running"})
+    dead.claim_inflight("key", "job-1")
+
+    live.create("job-2", {"status": "pending"})
+    assert live.claim_inflight("key", "job-2") == "job-2"
+    assert live.get("job-1")["status"] == "error"
+    # A live holder is still respected.
+    live.create("job-3", {"status": "pending"})
+    assert SQLiteJobStore(path).claim_inflight("key", "job-3") == "job-2"
+
+
+def test_async_store_keeps_blocking_backends_off_the_event_loop(tmp_path):
+    class RecordingStore(SQLiteJobStore):
+        def get(self, job_id):
+            threads.append(threading.get_ident())
+            return super().get(job_id)
+
+    threads = []
+
+    async def scenario():
+        store = AsyncJobStore(RecordingStore(str(tmp_path / "jobs.db")))
+        await store.create("job-1", {"status": "pending"})
+        assert await store.claim_inflight("key", "job-1") == "job-1"
+        await store.update("job-1", status="running")
+        return threading.get_ident(), await store.get("job-1")
+
+    loop_thread, row = asyncio.run(scenario())
+    assert row == {"status": "running"}
+    assert threads and loop_thread not in threads
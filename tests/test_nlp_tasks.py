@@ -0,0 +1,172 @@
+import random
+import re
+
+import pytest
+
+from src.nlp_tasks_simple import (
+    Entity,
+    EntityExtractionResult,
+    Gazetteer,
+    Intent,
+    IntentMatcher,
+    IntentPrediction,
+    RuleBasedEntityExtractor,
+    RuleBasedIntentClassifier,
+)
+
+FRAGMENTS = [
+    "hi there", "do you have", "the iphone 15 pro", "in silver", "i'm looking for", "red nike shoes",
+    "where can i get", "a new smartphone", "show me", "what product", "i want to buy", "add to cart",
+    "proceed to payment", "i'll take it", "the screen is broken", "i want a refund", "return policy",
+    "money back", "doesn't work", "not as described", "really disappointed", "five star review",
+    "i don't recommend it", "my thoughts", "great experience", "how long is shipping", "could you",
+    "more information", "specifications", "wanted nice phones", "they behave well", "whatever",
+    "ordering", "buying soon", "thanks", "for $150", "size 10", "to new york", "asap", "ok",
+]
+MESSAGES = [
+    "Hi, do you have the iPhone 15 Pro in silver?",
+    "I want to buy 2 red Nike shoes for $150",
+    "Can you ship 3 pieces to New York, USA?",
+    "The Samsung Galaxy S24 I got for 800 dollars has a defect",
+    "Do you have a large dark blue shirt in XL?",
+    "I need 2 x Adidas socks shipped to San Diego",
+    "Is the 15 inch Dell laptop available in black or grey?",
+    "Please send five units to London, UK for €120 each",
+    "thanks, that's all",
+]
+
+
+def legacy_classify(text):
+    """The classifier before IntentMatcher: one re.search per pattern string."""
+    patterns = RuleBasedIntentClassifier.INTENT_PATTERNS
+    text_lower = text.lower()
+    scores = {}
+    for intent_name, intent_patterns in patterns.items():
+        matches = sum(1 for pattern in intent_patterns if re.search(pattern, text_lower, re.IGNORECASE))
+        scores[intent_name] = matches / len(intent_patterns)
+    top_intent = max(scores, key=scores.get)
+    confidence = scores[top_intent]
+    if confidence == 0:
+        top_intent = Intent.INQUIRY.value
+        confidence = 0.5
+    return IntentPrediction(
+        text=text,
+        intent=top_intent,
+        confidence=min(confidence, 1.0),
+        reasoning=f"Matched {int(scores[top_intent] * len(patterns[top_intent]))} patterns",
+    )
+
+
+def legacy_extract(text):
+    """The extractor before interval-based overlap checks: one re.finditer per rule."""
+    entities = []
+    seen_spans = set()
+    for entity_type, patterns in RuleBasedEntityExtractor.ENTITY_PATTERNS.items():
+        for pattern, _ in patterns:
+            if isinstance(pattern, tuple):
+                pattern = r'\b(' + '|'.join(pattern) + r')\b'
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                span = (match.start(), match.end())
+                if any(s <= span[0] < e or s < span[1] <= e for s, e in seen_spans):
+                    continue
+                entities.append(Entity(text=match.group(), type=entity_type, start=match.start(),
+                                       end=match.end(), confidence=0.9))
+                seen_spans.add(span)
+    entities.sort(key=lambda e: e.start)
+    return EntityExtractionResult(text=text, entities=entities)
+
+
+def synthetic_messages(n, seed):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.sample(FRAGMENTS, rng.randint(1, 5))).capitalize() + rng.choice(["", ".", "?", "!"])
+        for _ in range(n)
+    ]
+
+
+def chat_log(n_chars, seed):
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < n_chars:
+        line = f"{rng.choice(['user', 'agent'])}: {rng.choice(MESSAGES)}"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def spans(result):
+    return [(e.text, e.type) for e in result.entities]
+
+
+@pytest.mark.parametrize("text", [
+    "hello",
+    "Return policy?",  # "return policy" also holds the complaint keyword "return"
+    "my thoughts are bad quality",  # "my thoughts" also holds "thoughts"
+    "Do you have it",
+    "It doesn't have a case",
+    "I wanted a smartphone",
+    "They behave well",
+    "I want to buy it, add to cart",
+])
+def test_single_pass_matcher_agrees_with_per_pattern_search(text):
+    assert RuleBasedIntentClassifier().classify(text) == legacy_classify(text)
+
+
+def test_matcher_agrees_on_synthetic_messages():
+    classifier = RuleBasedIntentClassifier()
+    for text in synthetic_messages(2000, seed=1):
+        assert classifier.classify(text) == legacy_classify(text)
+
+
+def test_ties_go_to_the_first_listed_intent_and_no_match_is_inquiry():
+    classifier = RuleBasedIntentClassifier()
+    tie = classifier.classify("buy it, it's broken")  # purchase 1/3 vs complaint 1/4
+    assert tie.intent == "purchase"
+    nothing = classifier.classify("hello there")
+    assert (nothing.intent, nothing.confidence, nothing.reasoning) == ("inquiry", 0.5, "Matched 0 patterns")
+
+
+def test_phrases_that_straddle_another_match_are_still_found():
+    matcher = IntentMatcher({
+        "a": [r'\b(add to)\b'],
+        "b": [r'\b(to cart)\b'],
+    })
+    assert matcher.match_counts("add to cart") == {"a": 1, "b": 1}
+
+
+def test_batch_matches_single_classification_and_returns_separate_objects():
+    classifier = RuleBasedIntentClassifier()
+    texts = ["I want a refund", "What is the warranty?", "I want a refund"]
+    results = classifier.classify_batch(texts)
+    assert results == [classifier.classify(text) for text in texts]
+    assert results[0] is not results[2]
+
+
+def test_extractor_agrees_with_per_pattern_overlap_checks():
+    log = chat_log(4000, seed=2)
+    assert RuleBasedEntityExtractor().extract(log) == legacy_extract(log)
+
+
+def test_gazetteer_matches_whole_words_case_insensitively():
+    gazetteer = Gazetteer(("New York", "HP", "San Jose"))
+    text = "NEW YORK, new  york, HPs and HP in San Jose"
+    word_spans = [(m.start(), m.end()) for m in re.finditer(r"\w+", text)]
+    words = [text[start:end].lower() for start, end in word_spans]
+    found = [text[start:end] for start, end in gazetteer.find_spans(text, word_spans, words)]
+    assert found == ["NEW YORK", "HP", "San Jose"]
+
+
+def test_a_match_containing_an_accepted_entity_is_dropped():
+    extractor = RuleBasedEntityExtractor()
+    extractor.rules.insert(0, ("size", "tiny", re.compile("x")))
+    # "2 x Nike" contains the accepted "x"; overlapping either end was always rejected
+    assert spans(extractor.extract("2 x Nike")) == [("x", "size"), ("Nike", "brand")]
+
+
+def test_priority_rules_decide_overlaps():
+    text = "a light blue shirt"
+    assert spans(RuleBasedEntityExtractor().extract(text)) == [("blue", "color")]
+    assert spans(RuleBasedEntityExtractor(priority=["color_modifier"]).extract(text)) == [("light blue", "color")]
+    text = "2 x Nike"
+    assert spans(RuleBasedEntityExtractor(priority=["brand"]).extract(text)) == [("Nike", "brand")]
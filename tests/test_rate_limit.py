@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from src.providers import rate_limit
+from src.providers.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    is_rate_limit_error,
+    is_retryable_error,
+    is_transient_error,
+)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_bucket_spaces_out_reservations_once_the_burst_is_spent():
+    bucket = TokenBucket(per_minute=60)  # one per second
+    now = time.monotonic()
+    waits = [bucket.reserve(1, now) for _ in range(62)]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0) and waits[61] == pytest.approx(2.0)
+
+
+def test_token_budget_is_settled_with_actual_usage():
+    limiter = RateLimiter("test", tokens_per_minute=1000)
+    first = limiter.reserve(tokens=900)
+    assert first.wait_seconds == 0
+    assert limiter.reserve(tokens=200).wait_seconds > 0
+    limiter.settle(first, actual_tokens=100)  # 800 refunded
+    assert limiter.reserve(tokens=500).wait_seconds == 0
+    assert limiter.snapshot()["used_tokens"] == 100
+
+
+def test_rate_limited_calls_retry_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, "sleep", sleeps.append)
+    limiter = RateLimiter("test", requests_per_minute=600, base_backoff=0.5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited("Error code: 429 - rate_limit_exceeded")
+        return "ok"
+
+    assert limiter.call_sync(flaky) == "ok"
+    assert len(attempts) == 3 and len(sleeps) >= 2
+    assert limiter.snapshot()["rate_limited"] == 2
+
+
+def test_non_rate_limit_errors_and_exhausted_retries_raise():
+    limiter = RateLimiter("test", max_retries=1, base_backoff=0)
+    with pytest.raises(ValueError):
+        limiter.call_sync(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+
+    async def always_limited():
+        raise RateLimited("slow down")
+
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.call(always_limited))
+
+
+def test_async_call_reports_usage():
+    limiter = RateLimiter("test", requests_per_minute=60, tokens_per_minute=6000)
+
+    async def complete():
+        return {"total": 42}
+
+    result = asyncio.run(limiter.call(complete, tokens=500, usage=lambda r: r["total"]))
+    assert result == {"total": 42}
+    assert limiter.snapshot()["used_tokens"] == 42
+
+
+class ServerError(Exception):
+    status_code = 502
+
+
+class GroqError(Exception):
+    def __init__(self, message, body):
+        super().__init__(message)
+        self.body = body
+
+
+def test_is_rate_limit_error_understands_status_and_error_codes():
+    assert is_rate_limit_error(RateLimited())
+    assert is_rate_limit_error(GroqError("slow down", {"error": {"code": "rate_limit_exceeded"}}))
+    assert is_rate_limit_error("Error code: 429 - {'error': {'code': 'rate_limit_exceeded'}}")
+    assert not is_rate_limit_error(ValueError("order #4291 not found"))
+    assert not is_rate_limit_error(ValueError("invalid api key"))
+
+
+def test_transient_errors_retry_without_draining_the_buckets(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+    limiter = RateLimiter("test", requests_per_minute=60, base_backoff=0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ServerError("bad gateway")
+        if len(attempts) == 2:
+            raise ConnectionResetError("reset by peer")
+        return "ok"
+
+    assert is_transient_error(ServerError()) and not is_transient_error(ValueError("bad request"))
+    assert limiter.call_sync(flaky) == "ok"
+    stats = limiter.snapshot()
+    assert (stats["retries"], stats["rate_limited"]) == (2, 0)
+    # Three requests spent, the rest of the minute's burst still available.
+    assert limiter.reserve().wait_seconds == 0
+
+
+def test_tavily_quota_errors_and_timeouts_are_retryable(monkeypatch):
+    errors = pytest.importorskip("tavily.errors")
+    assert is_rate_limit_error(errors.UsageLimitExceededError("Rate limit exceeded"))
+    assert not is_transient_error(errors.UsageLimitExceededError("Rate limit exceeded"))
+    assert is_transient_error(errors.TimeoutError(60)) and not is_rate_limit_error(errors.TimeoutError(60))
+    assert not is_retryable_error(errors.InvalidAPIKeyError("bad key"))
+
+    monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+    limiter = RateLimiter("test-tavily", requests_per_minute=60, base_backoff=0)
+    attempts = []
+
+    def search():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise errors.UsageLimitExceededError("Rate limit exceeded")
+        return "ok"
+
+    assert limiter.call_sync(search) == "ok"
+    assert limiter.snapshot()["rate_limited"] == 1
@@ -0,0 +1,39 @@
+import json
+
+from src.api.streaming import IncrementalJSONParser
+
+
+def test_fields_are_emitted_as_soon_as_they_close():
+    report = {
+        "title": "RAG, explained",
+        "executive_summary": "Uses \"retrieval\" {braces} and, commas.",
+        "sections": [{"title": "Background", "content": "Details"}],
+        "word_count": 42,
+    }
+    text = "```json\n" + json.dumps(report) + "\n```"
+    parser = IncrementalJSONParser()
+    emitted = []
+    for idx in range(0, len(text), 3):
+        for key, _ in parser.feed(text[idx : idx + 3]):
+            emitted.append(key)
+            if key == "title":
+                # Title is available before the summary has streamed in.
+                assert "executive_summary" not in parser.fields
+    assert emitted == ["title", "executive_summary", "sections", "word_count"]
+    assert parser.fields == report
+    assert parser.done
+
+
+def test_truncated_stream_keeps_completed_fields():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "Report", "executive_summary": "cut off mid')
+    assert parser.fields == {"title": "Report"}
+    assert not parser.done
+
+
+def test_single_character_chunks_rebuild_long_fields():
+    report = {"title": "T", "sections": [{"content": "text, with \"quotes\" and } braces"}] * 500, "word_count": 1}
+    parser = IncrementalJSONParser()
+    for char in json.dumps(report):
+        parser.feed(char)
+    assert parser.fields == report and parser.done
@@ -0,0 +1,269 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.vectordb.base import create_vector_store  # noqa: E402
+from src.vectordb.bm25 import BM25Index  # noqa: E402
+from src.vectordb.embedders import EmbedderRegistry, embedder_registry  # noqa: E402
+from src.vectordb.embedding_cache import QueryEmbeddingCache  # noqa: E402
+from src.vectordb.numpy_store import NumpyVectorStore  # noqa: E402
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder so tests need no model download."""
+
+    dims = 64
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dims] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def chroma_store(request):
+    chromadb = pytest.importorskip("chromadb")
+    from src.vectordb.chroma_store import ChromaVectorStore
+
+    store = ChromaVectorStore(
+        collection_name=f"test_{hashlib.md5(request.node.name.encode()).hexdigest()}",
+        model_name=model_name(request),
+        embedding_backend="torch",
+        client=chromadb.EphemeralClient(),
+    )
+    store.query_cache = QueryEmbeddingCache()
+    return store
+
+
+def model_name(request):
+    name = f"hashing-{request.node.name}"
+    embedder_registry.register(name, HashingEmbedder())
+    return name
+
+
+@pytest.fixture(params=["chroma", "numpy"])
+def store(request, tmp_path):
+    if request.param == "chroma":
+        yield chroma_store(request)
+        return
+    store = NumpyVectorStore(path=str(tmp_path / "index"), model_name=model_name(request))
+    store.query_cache = QueryEmbeddingCache()
+    yield store
+    store.close()
+
+
+def docs(n, prefix="doc"):
+    return [{"title": f"{prefix} {i}", "url": f"https://example.com/{prefix}/{i}", "content": f"{prefix} content number {i}"} for i in range(n)]
+
+
+def test_ingest_streams_batches_and_skips_known_content(store):
+    stats = store.ingest(iter(docs(10) + docs(2)), batch_size=4)
+    assert (stats.received, stats.added, stats.skipped) == (12, 10, 2)
+    assert store.embedder.encoded == 10
+
+    again = store.ingest(iter(docs(12)), batch_size=5)
+    assert (again.added, again.skipped) == (2, 10)
+    assert store.embedder.encoded == 12
+    assert store.count() == 12
+    assert again.to_dict()["docs_per_second"] > 0
+
+
+def test_reingesting_known_content_refreshes_fetched_at(store):
+    store.ingest(dict(doc, fetched_at=1000.0) for doc in docs(3))
+    cutoff = {"fetched_at": {"$gte": 2000.0}}
+    assert store.search("doc content number 1", where=cutoff) == []
+
+    again = store.ingest(dict(doc, fetched_at=3000.0) for doc in docs(3))
+    assert (again.added, again.skipped) == (0, 3)
+    hits = store.search("doc content number 1", where=cutoff)
+    assert hits[0]["metadata"]["title"] == "doc 1"
+    assert hits[0]["metadata"]["fetched_at"] == 3000.0
+
+    # an older copy never moves the timestamp back
+    store.ingest(dict(doc, fetched_at=1500.0) for doc in docs(3))
+    assert store.search("doc content number 1", where=cutoff)[0]["metadata"]["fetched_at"] == 3000.0
+
+
+def test_chunks_stored_without_fetched_at_pass_max_age_filters_after_reopening(store):
+    texts = ["legacy chunk about caching"]
+    store.add_embeddings(["legacy"], store.embedder.encode(texts), texts, [{"title": "legacy"}])
+    opened_at = time.time()
+    if isinstance(store, NumpyVectorStore):
+        store.close()
+        reopened = NumpyVectorStore(path=store.path, model_name=store.model_name)
+    else:
+        reopened = type(store)(collection_name=store.collection.name, model_name=store.model_name, client=store.client)
+
+    hits = reopened.search("legacy chunk", where={"fetched_at": {"$gte": opened_at - 1}})
+    assert [hit["metadata"]["title"] for hit in hits] == ["legacy"]
+    if isinstance(reopened, NumpyVectorStore):
+        reopened.close()
+
+
+def test_search_returns_closest_document(store):
+    store.add_documents(docs(3, "alpha") + docs(3, "beta"))
+    hits = store.search("beta content number 2", n_results=2)
+    assert hits[0]["metadata"]["title"] == "beta 2"
+    assert 0 < hits[0]["similarity"] <= 1
+
+
+def test_repeated_queries_skip_the_encoder(store, tmp_path):
+    store.add_documents(docs(3))
+    encoded = store.embedder.encoded
+    store.search("doc content number 1")
+    store.search("  Doc content   number 1 ")
+    assert store.embedder.encoded == encoded + 1
+
+    path = str(tmp_path / "queries.npz")
+    store.query_cache.save(path)
+    restored = QueryEmbeddingCache(path=path)
+    cached = restored.get(store.model_name, "doc content number 1")
+    assert cached.dtype == np.float32
+    assert np.allclose(cached, store.embedder.encode(["doc content number 1"])[0])
+
+
+def test_registry_loads_each_model_once_across_threads(monkeypatch):
+    registry = EmbedderRegistry()
+    loads = []
+    monkeypatch.setattr(registry, "_load", lambda name, backend: loads.append(name) or HashingEmbedder())
+
+    threads = [threading.Thread(target=registry.get, args=("shared",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["shared"]
+    assert registry.get("shared") is registry.get("shared")
+    assert "load_seconds" in registry.stats()["shared"]
+
+
+def test_hybrid_search_surfaces_exact_identifier_matches(store):
+    store.add_documents(docs(20) + [{"title": "fix", "url": "https://example.com/fix", "content": "Resolve ERR_CONN_RESET by retrying"}])
+    hits = store.hybrid_search("why ERR_CONN_RESET", n_results=3)
+    assert hits[0]["metadata"]["title"] == "fix"
+    assert hits[0]["bm25"] > 0
+    assert hits[0]["rrf_score"] >= hits[-1]["rrf_score"]
+
+
+def test_hybrid_search_rebuilds_bm25_from_collection(store):
+    store.add_documents(docs(5))
+    store.bm25 = BM25Index()
+    hits = store.hybrid_search("content number 3", n_results=1)
+    assert len(store.bm25) == 5
+    assert hits[0]["metadata"]["title"] == "doc 3"
+
+
+def test_long_documents_are_chunked_and_collapsed_to_parents(store):
+    filler = " ".join(f"Sentence {i} talks about nothing much." for i in range(200))
+    long_doc = {"title": "long", "url": "https://example.com/long", "content": filler + " The answer is zebra."}
+    stats = store.ingest([long_doc] + docs(3))
+    assert stats.chunks > 4 and stats.added == stats.chunks
+    assert store.count() == stats.chunks
+
+    hits = store.search("the answer is zebra", n_results=3)
+    assert hits[0]["metadata"]["title"] == "long"
+    assert "zebra" in hits[0]["content"]
+    assert hits[0]["id"] == hits[0]["metadata"]["parent_id"] == store.add_documents([long_doc])[0]
+    assert len({hit["id"] for hit in hits}) == len(hits)
+
+
+def test_numpy_store_spans_segments_and_reopens(tmp_path, request):
+    path = str(tmp_path / "index")
+    store = NumpyVectorStore(path=path, model_name=model_name(request), segment_rows=4)
+    store.add_documents(docs(10))
+    assert sorted(p.name for p in (tmp_path / "index" / "segments").iterdir()) == ["000000.f32", "000001.f32", "000002.f32"]
+    store.close()
+
+    reopened = NumpyVectorStore(path=path, model_name=store.model_name, segment_rows=1000)
+    assert reopened.count() == 10 and reopened.segment_rows == 4
+    assert reopened.search("doc content number 9", n_results=1)[0]["metadata"]["title"] == "doc 9"
+    assert reopened.ingest(docs(10)).added == 0
+    reopened.close()
+
+
+def test_numpy_store_matches_brute_force_ranking(tmp_path, request):
+    store = NumpyVectorStore(path=str(tmp_path / "index"), model_name=model_name(request), segment_rows=7)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    ids = [f"v{i}" for i in range(50)]
+    assert store.add_embeddings(ids, vectors, ids, [{"title": doc_id} for doc_id in ids]) == 50
+
+    query = rng.normal(size=8).astype(np.float32)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [ids[i] for i in np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]]
+    hits = store._nearest(query, 5)
+    assert [hit["id"] for hit in hits] == expected
+    assert hits[0]["similarity"] >= hits[-1]["similarity"]
+    store.close()
+
+
+def test_numpy_store_drops_uncommitted_vectors_and_snapshots(tmp_path, request):
+    path = tmp_path / "index"
+    store = NumpyVectorStore(path=str(path), model_name=model_name(request))
+    store.add_documents(docs(3))
+    store.close()
+    # A write interrupted after appending vectors but before committing rows.
+    with open(path / "segments" / "000000.f32", "ab") as f:
+        f.write(np.ones(HashingEmbedder.dims * 2, dtype=np.float32).tobytes())
+
+    store = NumpyVectorStore(path=str(path), model_name=store.model_name)
+    assert (path / "segments" / "000000.f32").stat().st_size == 3 * HashingEmbedder.dims * 4
+    store.add_documents(docs(5))
+    store.snapshot(str(tmp_path / "copy"))
+    store.close()
+
+    copy = NumpyVectorStore(path=str(tmp_path / "copy"), model_name=store.model_name)
+    assert copy.count() == 5
+    assert copy.search("doc content number 3", n_results=1)[0]["metadata"]["title"] == "doc 3"
+    copy.close()
+
+
+def test_create_vector_store_selects_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    store = create_vector_store(path=str(tmp_path / "index"))
+    assert isinstance(store, NumpyVectorStore)
+    store.close()
+    with pytest.raises(ValueError):
+        create_vector_store("faiss")
+
+
+def test_filtered_search_restricts_domain_and_freshness(store):
+    store.add_documents(
+        [{**doc, "url": f"https://www.arxiv.org/{i}", "fetched_at": 1000.0 + i} for i, doc in enumerate(docs(4, "paper"))]
+        + [{**doc, "url": f"https://blog.example.com/{i}", "fetched_at": 5000.0} for i, doc in enumerate(docs(4, "post"))]
+    )
+    hits = store.search("paper content number 1", n_results=3, where={"domain": "blog.example.com"})
+    assert hits and all(hit["metadata"]["domain"] == "blog.example.com" for hit in hits)
+
+    hits = store.search("paper content number 1", n_results=5, where={"domain": "arxiv.org", "fetched_at": {"$gte": 1002}})
+    assert sorted(hit["metadata"]["title"] for hit in hits) == ["paper 2", "paper 3"]
+
+    hybrid = store.hybrid_search("post content", n_results=3, where={"fetched_at": {"$lt": 2000}})
+    assert hybrid and all(hit["metadata"]["domain"] == "arxiv.org" for hit in hybrid)
+    assert store.search("paper", where={"source": "upload"}) == []
+
+
+def test_tenants_are_isolated(store):
+    acme = store.for_tenant("acme")
+    assert store.for_tenant("acme") is acme
+    acme.add_documents([{"title": "secret", "url": "https://acme.test/plan", "content": "acme launch plan details"}])
+    store.add_documents(docs(2))
+
+    assert acme.count() == 1 and store.count() == 2
+    assert store.for_tenant("globex").search("acme launch plan") == []
+    hit = acme.search("acme launch plan", n_results=1)[0]
+    assert hit["metadata"]["tenant"] == "acme"
+    assert all(hit["metadata"]["tenant"] == "" for hit in store.search("acme launch plan"))
+    with pytest.raises(ValueError):
+        store.for_tenant("../etc")